@@ -1,84 +1,213 @@
 # ml_api/app.py
-import io
+import asyncio
+import bisect
+import hashlib
+import importlib.util
 import os
 import json
 import re
-import requests
+import threading
+import time
+from functools import cached_property
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel
-import openai
 
 import joblib
 import numpy as np
-import pdfplumber
-from docx import Document as DocxDocument
+
+from extraction import (
+    OCR_AVAILABLE, PDF_ENGINE, PDF_ENGINES, PDF_MAX_CHARS, PDF_MAX_PAGES,
+    extract_text_from_pdf_bytes, extract_text_from_docx_bytes, extract_with_timings,
+)
+from extraction_cache import ExtractionCache
+from extraction_pool import ExtractionPool, ExtractionTimeout
+from uploads import SpooledUpload, UploadLimitMiddleware, UploadTooLarge, spool_upload
+from batcher import MicroBatcher
+from numpy_lstm import NumpyLSTMModel, NumpyTokenizer, pad_sequences
+import metrics
+from metrics import observe_stage, timed_stage
+from ollama_client import OllamaClient, OllamaError
+from llm_cache import LLMCache
+from jd_store import JobDescriptionStore
+from candidate_index import CandidateIndex
+from near_duplicates import NearDuplicateIndex
+from job_queue import STATUSES as JOB_STATUSES, JobQueue
+from embedding_index import EmbeddingIndex, mean_embedding
+from skill_similarity import SkillSimilarity, skill_tokens
+import httpx
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Set OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-# Optional OCR imports (only used if available)
-try:
-    from pdf2image import convert_from_bytes
-    import pytesseract
-    OCR_AVAILABLE = True
-except Exception:
-    OCR_AVAILABLE = False
-
-# Gensim
-import gensim
-
-# TensorFlow / Keras
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from tensorflow.keras.preprocessing.text import tokenizer_from_json
-
-# NLTK for tokenization & stopwords (download if necessary)
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-
-try:
-    nltk.data.find("tokenizers/punkt")
-except Exception:
-    nltk.download("punkt")
-try:
-    nltk.data.find("corpora/stopwords")
-except Exception:
-    nltk.download("stopwords")
-STOP_WORDS = set(stopwords.words("english"))
+# NLTK stopwords (download if necessary). Importing nltk takes over a second,
+# so this runs on first use via the "stopwords" artifact below.
+def load_stop_words() -> set:
+    import nltk
+    from nltk.corpus import stopwords
+
+    try:
+        nltk.data.find("corpora/stopwords")
+    except Exception:
+        nltk.download("stopwords")
+    return set(stopwords.words("english"))
 
 # -----------------------------
 # Configuration
 # -----------------------------
 MODELS_DIR = os.getenv("MODEL_DIR", "models")  # relative to ml_api/
+# SQLite files and indexes written at runtime; the default does not depend on the working directory
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
 TFIDF_PATH = os.path.join(MODELS_DIR, "tfidf_vectorizer.joblib")
 CLF_CAT_PATH = os.path.join(MODELS_DIR, "resume_category_classifier.joblib")
 CLF_TYPE_PATH = os.path.join(MODELS_DIR, "resume_skill_type_classifier.joblib")
 W2V_PATH = os.path.join(MODELS_DIR, "resume_w2v.model")
+# Word2Vec vectors without training state, written by convert_models_mmap.py (preferred when present)
+W2V_KV_PATH = os.path.join(MODELS_DIR, "resume_w2v.kv")
 LSTM_CAT_PATH = os.path.join(MODELS_DIR, "resume_category_lstm.h5")
 LSTM_TYPE_PATH = os.path.join(MODELS_DIR, "resume_skilltype_lstm.h5")
+# NumPy exports of the LSTMs (see export_lstm_numpy.py)
+LSTM_CAT_NPZ_PATH = os.path.join(MODELS_DIR, "resume_category_lstm.npz")
+LSTM_TYPE_NPZ_PATH = os.path.join(MODELS_DIR, "resume_skilltype_lstm.npz")
 TOKENIZER_PATH = os.path.join(MODELS_DIR, "tokenizer.json")
 CONFIG_PATH = os.path.join(MODELS_DIR, "config.json")
-
-# OpenAI Configuration
+# Memory-map numeric model arrays read-only, so uvicorn workers share one copy
+# of them in the page cache. Run convert_models_mmap.py once to make the
+# artifacts mappable; compressed joblib files are still loaded privately.
+MODEL_MMAP = os.getenv("MODEL_MMAP", "false").lower() in ("1", "true", "yes")
+# Skill x skill Word2Vec similarity, derived from the w2v model on first load
+SKILL_SIMILARITY_PATH = os.path.join(MODELS_DIR, "skill_similarity.npz")
+
+# Skill matching in the ML fallback: "exact" or "soft" (near matches earn partial credit)
+SKILL_MATCH_MODE = os.getenv("SKILL_MATCH_MODE", "exact").lower()
+SOFT_MATCH_THRESHOLD = float(os.getenv("SOFT_MATCH_THRESHOLD", "0.6"))  # min similarity that earns credit
+
+# Extracted-text cache shared by all upload endpoints.
+# Bump EXTRACTOR_VERSION whenever extraction output changes so old entries are ignored.
+# The PDF engine and caps (PDF_ENGINE, PDF_MAX_PAGES, PDF_MAX_CHARS in extraction.py) are part of the key too.
+EXTRACTOR_VERSION = "3"
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "")  # empty = memory only
+
+# Upload limits. Bodies over MAX_REQUEST_MB are refused while still streaming in.
+# MAX_UPLOAD_MB is checked per file after multipart parsing (Starlette keeps parts
+# over 1 MB in its own temp file), so it bounds the work done, and MAX_REQUEST_MB
+# bounds what is received. Files over UPLOAD_SPOOL_KB are extracted from a temp
+# file of their own in UPLOAD_DIR (default: the system temp dir).
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "20"))  # per file, 0 = no limit
+MAX_REQUEST_MB = float(os.getenv("MAX_REQUEST_MB", "200"))  # whole request (e.g. a batch), 0 = no limit
+UPLOAD_SPOOL_KB = int(os.getenv("UPLOAD_SPOOL_KB", "1024"))
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "") or None
+
+# Process pool that runs PDF/DOCX/OCR extraction off the event loop
+EXTRACTION_POOL_SIZE = int(os.getenv("EXTRACTION_POOL_SIZE", str(os.cpu_count() or 1)))  # 0 = thread, no processes
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "120"))  # seconds per document
+EXTRACTION_POOL_RECYCLE = int(os.getenv("EXTRACTION_POOL_RECYCLE", "100"))  # tasks per extraction process before it is replaced (Python 3.11+)
+
+# LSTM inference engine: "keras", "numpy" (TensorFlow-free, needs the .npz exports)
+# or "auto" = keras when TensorFlow is installed, numpy otherwise
+LSTM_ENGINE = os.getenv("LSTM_ENGINE", "auto").lower()
+if LSTM_ENGINE == "auto":
+    LSTM_ENGINE = "keras" if importlib.util.find_spec("tensorflow") is not None else "numpy"
+
+# Micro-batching for the LSTM models: concurrent requests share one forward pass
+LSTM_BATCH_MAX = int(os.getenv("LSTM_BATCH_MAX", "32"))
+LSTM_BATCH_WAIT_MS = float(os.getenv("LSTM_BATCH_WAIT_MS", "5"))
+
+# Files analyzed at once by the streaming (NDJSON) mode of /batch/analyze
+BATCH_STREAM_CONCURRENCY = int(os.getenv("BATCH_STREAM_CONCURRENCY", str(max(2, 2 * (os.cpu_count() or 1)))))
+
+# Models are loaded lazily on first use. WARMUP_MODELS lists artifacts to load in
+# the background at startup ("all" or comma-separated names); /ready reports 503
+# until they are loaded.
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "").strip()
+
+# Ollama (local LLM) used by /analyze/resume-ollama
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "tinyllama")  # lightweight (637MB); alternatives: orca-mini, neural-chat
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))  # seconds per request, not counting time queued
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "1"))  # match OLLAMA_NUM_PARALLEL on the server
+OLLAMA_STREAM = os.getenv("OLLAMA_STREAM", "true").lower() in ("1", "true", "yes")  # stop reading at the first complete JSON object
+# Latency budget for /analyze/resume-ollama (overridable per request with ?deadline_ms=).
+# When Ollama has no parseable answer in time the ML fallback is returned instead.
+OLLAMA_DEADLINE_MS = int(os.getenv("OLLAMA_DEADLINE_MS", "0"))  # 0 = wait for Ollama (up to OLLAMA_TIMEOUT)
+# What happens to an Ollama call that missed its deadline: "cache" lets it finish so its
+# answer lands in the LLM cache for the next identical request, "cancel" aborts it to
+# free the Ollama slot
+OLLAMA_LATE_RESULTS = os.getenv("OLLAMA_LATE_RESULTS", "cache").lower()
+OLLAMA_OPTIONS = {"temperature": 0.1, "top_k": 40, "top_p": 0.9}
+
+# Parsed LLM answers (Ollama and OpenAI), keyed on resume + JD + model + sampling
+# params + prompt version. Bump a *_PROMPT_VERSION whenever its prompt template changes.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds, 0 = never expire
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", os.path.join(DATA_DIR, "llm_cache.sqlite3"))  # empty = memory only
+OLLAMA_PROMPT_VERSION = "1"
+# Only Ollama answers with all of these are cached (the fields the prompt asks for and the endpoints read)
+OLLAMA_ANSWER_FIELDS = ("skill_match_score", "project_skills_implemented", "future_skills_required")
+OPENAI_ANALYZE_PROMPT_VERSION = "1"
+OPENAI_EXTRACT_PROMPT_VERSION = "1"
+
+llm_cache = LLMCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_DB)
+
+# Job descriptions registered through POST /jobs/descriptions (empty = memory only)
+JD_STORE_DB = os.getenv("JD_STORE_DB", os.path.join(DATA_DIR, "job_descriptions.sqlite3"))
+
+# Keep every analyzed resume's skill set for POST /rank (off by default)
+CANDIDATE_INDEX_ENABLED = os.getenv("CANDIDATE_INDEX", "false").lower() in ("1", "true", "yes")
+CANDIDATE_INDEX_DB = os.getenv("CANDIDATE_INDEX_DB", os.path.join(DATA_DIR, "candidates.sqlite3"))  # empty = memory only
+
+# Flag uploads that are near-duplicates of an earlier resume (MinHash + LSH over the
+# cleaned text, off by default); ?reuse_duplicates=true returns the earlier result
+# (/analyze/file, /predict for the same JD, /analyze/resume-ollama for the same JD)
+NEAR_DUPLICATES_ENABLED = os.getenv("NEAR_DUPLICATES", "false").lower() in ("1", "true", "yes")
+NEAR_DUPLICATES_DB = os.getenv("NEAR_DUPLICATES_DB", os.path.join(DATA_DIR, "near_duplicates.sqlite3"))  # empty = memory only
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))  # estimated Jaccard of 3-word shingles
+
+# Background jobs (POST /jobs): queued in SQLite, run by JOB_WORKERS tasks in every API process
+# The queue is always SQLite: every worker process has to see every job
+JOBS_DB = os.getenv("JOBS_DB", "") or os.path.join(DATA_DIR, "jobs.sqlite3")
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(DATA_DIR, "jobs"))  # uploaded files of unfinished jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # jobs run at once per process, 0 = queue only
+JOB_FILE_CONCURRENCY = int(os.getenv("JOB_FILE_CONCURRENCY", "4"))  # files of one job processed at once
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))  # a job not renewed for this long is claimed again
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))  # finished jobs kept this long, 0 = forever
+JOB_POLL_SECONDS = 1.0  # how often idle workers look for jobs submitted to other processes
+
+# Keep a Word2Vec embedding of every analyzed resume for POST /search (off by default)
+EMBEDDING_INDEX_ENABLED = os.getenv("EMBEDDING_INDEX", "false").lower() in ("1", "true", "yes")
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", os.path.join(DATA_DIR, "embeddings"))  # empty = memory only
+
+# OpenAI Configuration (the client is imported on first use to keep startup fast)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-if OPENAI_API_KEY:
+
+def get_openai():
+    import openai
     openai.api_key = OPENAI_API_KEY
+    return openai
 
-def analyze_resume_with_openai(resume_text: str, job_description: str = "") -> Dict[str, Any]:
+def analyze_resume_with_openai(resume_text: str, job_description: str = "", use_cache: bool = True) -> Dict[str, Any]:
     """
-    Use OpenAI to analyze resume and provide intelligent insights
+    Use OpenAI to analyze resume and provide intelligent insights.
+    Parsed answers are cached (see LLM_CACHE_*); use_cache=False skips the
+    lookup but still stores the fresh answer.
     """
     if not OPENAI_API_KEY:
         return {"error": "OpenAI API key not configured"}
     
+    params = {"temperature": 0.7, "max_tokens": 2000}
+    key = llm_cache.make_key("openai-analyze", "gpt-3.5-turbo", params, OPENAI_ANALYZE_PROMPT_VERSION, resume_text, job_description)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+    
     try:
         job_context = f"\n\nJob Description:\n{job_description}" if job_description else ""
         
@@ -100,14 +229,13 @@ Provide a JSON response with:
 
 Return ONLY valid JSON, no markdown or extra text."""
 
-        response = openai.ChatCompletion.create(
+        response = get_openai().ChatCompletion.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are an expert resume analyst. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            max_tokens=2000
+            **params
         )
         
         response_text = response.choices[0].message.content
@@ -121,20 +249,29 @@ Return ONLY valid JSON, no markdown or extra text."""
             if json_match:
                 analysis = json.loads(json_match.group(1))
             else:
-                analysis = {"raw_response": response_text}
+                return {"raw_response": response_text}
         
+        llm_cache.put(key, analysis)
         return analysis
     
     except Exception as e:
         return {"error": f"OpenAI analysis failed: {str(e)}"}
 
-def extract_resume_text_with_openai(raw_text: str) -> Dict[str, Any]:
+def extract_resume_text_with_openai(raw_text: str, use_cache: bool = True) -> Dict[str, Any]:
     """
-    Use OpenAI to extract structured information from resume
+    Use OpenAI to extract structured information from resume.
+    Cached like analyze_resume_with_openai.
     """
     if not OPENAI_API_KEY:
         return {"error": "OpenAI API key not configured", "raw_text": raw_text}
     
+    params = {"temperature": 0.3, "max_tokens": 1500}
+    key = llm_cache.make_key("openai-extract", "gpt-3.5-turbo", params, OPENAI_EXTRACT_PROMPT_VERSION, raw_text)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+    
     try:
         prompt = f"""Extract structured information from this resume and return as JSON.
 
@@ -155,14 +292,13 @@ Extract and return JSON with:
 
 Return ONLY valid JSON, no markdown or extra text."""
 
-        response = openai.ChatCompletion.create(
+        response = get_openai().ChatCompletion.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are an expert at extracting structured data from resumes. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3,
-            max_tokens=1500
+            **params
         )
         
         response_text = response.choices[0].message.content
@@ -176,8 +312,9 @@ Return ONLY valid JSON, no markdown or extra text."""
             if json_match:
                 extracted = json.loads(json_match.group(1))
             else:
-                extracted = {"raw_text": raw_text}
+                return {"raw_text": raw_text}
         
+        llm_cache.put(key, extracted)
         return extracted
     
     except Exception as e:
@@ -204,224 +341,505 @@ SKILL_KEYWORDS = [
 ]
 
 # Preprocessing helpers (must match training)
-def clean_text(text: str) -> str:
+_EMAIL_RE = re.compile(r'\S+@\S+')
+_URL_RE = re.compile(r'http\S+|www\.\S+')
+_NON_LETTER_RE = re.compile(r'[^a-zA-Z\s]')
+
+@timed_stage("clean_text")
+def clean_tokens(text: str) -> List[str]:
+    """The cleaned words of text; clean_text is these joined by single spaces."""
     if not text:
-        return ""
+        return []
     text = str(text).lower()
     # remove emails and urls
-    text = re.sub(r'\S+@\S+', ' ', text)
-    text = re.sub(r'http\S+|www\.\S+', ' ', text)
+    text = _EMAIL_RE.sub(' ', text)
+    text = _URL_RE.sub(' ', text)
     # keep only letters and spaces
-    text = re.sub(r'[^a-zA-Z\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _NON_LETTER_RE.sub(' ', text)
     # remove stopwords
-    tokens = [w for w in text.split() if w not in STOP_WORDS and len(w) > 1]
-    return " ".join(tokens)
+    stop_words = get_model("stopwords")
+    return [w for w in text.split() if w not in stop_words and len(w) > 1]
+
+def clean_text(text: str) -> str:
+    return " ".join(clean_tokens(text))
+
+# Skill patterns with word boundaries to avoid false matches.
+# Keys are the canonical skill names; alternatives are top-level '|' branches
+# that each start with \b (see _build_skill_matcher).
+SKILL_PATTERNS = {
+    'python': r'\bpython\b',
+    'javascript': r'\bjavascript\b|\bjs\b',
+    'typescript': r'\btypescript\b|\bts\b',
+    'java': r'\bjava\b(?!script)',  # Java but not JavaScript
+    'csharp': r'\bc#\b|\bcsharp\b',
+    'cpp': r'\bc\+\+\b',
+    'php': r'\bphp\b',
+    'go': r'\bgo\b(?:lang)?\b',
+    'rust': r'\brust\b',
+    'ruby': r'\bruby\b',
+    'kotlin': r'\bkotlin\b',
+    'swift': r'\bswift\b',
+    'react': r'\breact\b',
+    'vue': r'\bvue\.?js\b|\bvue\b',
+    'angular': r'\bangular\b',
+    'html': r'\bhtml\b',
+    'css': r'\bcss\b',
+    'bootstrap': r'\bbootstrap\b',
+    'tailwind': r'\btailwind\b',
+    'webpack': r'\bwebpack\b',
+    'nextjs': r'\bnext\.?js\b',
+    'svelte': r'\bsvelte\b',
+    'nodejs': r'\bnode\.?js\b',
+    'node': r'\bnode\b(?!\.js)',
+    'express': r'\bexpress\b',
+    'django': r'\bdjango\b',
+    'flask': r'\bflask\b',
+    'fastapi': r'\bfastapi\b',
+    'spring': r'\bspring\b',
+    'laravel': r'\blaravel\b',
+    'aspnet': r'\basp\.net\b',
+    'sql': r'\bsql\b',
+    'postgresql': r'\bpostgres(?:ql)?\b',
+    'mysql': r'\bmysql\b',
+    'mongodb': r'\bmongo(?:db)?\b',
+    'firebase': r'\bfirebase\b',
+    'redis': r'\bredis\b',
+    'elasticsearch': r'\belasticsearch\b',
+    'oracle': r'\boracle\b',
+    'cassandra': r'\bcassandra\b',
+    'aws': r'\baws\b',
+    'azure': r'\bazure\b',
+    'gcp': r'\bgcp\b|\bgoogle\s+cloud\b',
+    'docker': r'\bdocker\b',
+    'kubernetes': r'\bkubernetes\b|\bk8s\b',
+    'k8s': r'\bk8s\b',
+    'git': r'\bgit\b',
+    'cicd': r'\bci\s*/?cd\b',
+    'jenkins': r'\bjenkins\b',
+    'terraform': r'\bterraform\b',
+    'ansible': r'\bansible\b',
+    'linux': r'\blinux\b',
+    'machinelearning': r'\bmachine\s+learning\b|\bml\b',
+    'tensorflow': r'\btensorflow\b',
+    'pytorch': r'\bpytorch\b',
+    'keras': r'\bkeras\b',
+    'scikitlearn': r'\bscikit[\s-]?learn\b',
+    'pandas': r'\bpandas\b',
+    'numpy': r'\bnumpy\b',
+    'opencv': r'\bopencv\b',
+    'jupyter': r'\bjupyter\b',
+    'nlp': r'\bnlp\b',
+    'restapi': r'\brest\s+api\b|\brestful\b',
+    'graphql': r'\bgraphql\b',
+    'websocket': r'\bwebsocket\b',
+    'soap': r'\bsoap\b',
+    'agile': r'\bagile\b',
+    'scrum': r'\bscrum\b',
+    'jira': r'\bjira\b',
+    'slack': r'\bslack\b',
+    'github': r'\bgithub\b',
+    'gitlab': r'\bgitlab\b',
+    'communication': r'\bcommunication\b',
+    'teamwork': r'\bteamwork\b',
+    'leadership': r'\bleadership\b',
+    'management': r'\bmanagement\b',
+    'problemsolving': r'\bproblem\s+solving\b',
+    'analytical': r'\banalytical\b',
+    'creative': r'\bcreative\b',
+    'collaboration': r'\bcollaboration\b'
+}
+
+_WORD_RE = re.compile(r'\w+')
+_PLAIN_WORD_ALT_RE = re.compile(r'\\b(\w+)\\b')
+_LEADING_WORD_RE = re.compile(r'\\b(\w+)')
+
+def _build_skill_matcher(patterns: Dict[str, str]):
+    """
+    Precompile SKILL_PATTERNS once at import into:
+      - word_skills: plain whole-word alternatives keyed by the word. These hit
+        exactly when the word is one of the text's word tokens.
+      - complex_alts: (leading word, compiled regex, skills) for alternatives
+        with punctuation, whitespace or lookarounds (c++, node.js, rest api...).
+        They only need a regex check when some token starts with the leading word.
+    """
+    word_skills: Dict[str, List[str]] = {}
+    complex_skills: Dict[str, List[str]] = {}
+    for skill, pattern in patterns.items():
+        for alt in pattern.split("|"):
+            plain = _PLAIN_WORD_ALT_RE.fullmatch(alt)
+            target = word_skills.setdefault(plain.group(1), []) if plain else complex_skills.setdefault(alt, [])
+            target.append(skill)
+
+    complex_alts = []
+    for alt, skills in complex_skills.items():
+        lead = _LEADING_WORD_RE.match(alt)
+        complex_alts.append((lead.group(1) if lead else "", re.compile(alt), skills))
+    return word_skills, complex_alts
+
+_SKILL_WORDS, _SKILL_COMPLEX_ALTS = _build_skill_matcher(SKILL_PATTERNS)
+_SKILL_ORDER = {skill: i for i, skill in enumerate(SKILL_PATTERNS)}
+# Stored skill lists are re-extracted when the patterns change
+SKILLS_VERSION = hashlib.sha256(json.dumps(SKILL_PATTERNS, sort_keys=True).encode("utf-8")).hexdigest()[:12]
 
 def extract_skills_from_text(cleaned_text: str) -> List[str]:
     """Extract skills from text with proper word boundary matching"""
-    found = []
     text_lower = cleaned_text.lower()
-    
-    # Skill patterns with word boundaries to avoid false matches
-    skill_patterns = {
-        'python': r'\bpython\b',
-        'javascript': r'\bjavascript\b|\bjs\b',
-        'typescript': r'\btypescript\b|\bts\b',
-        'java': r'\bjava\b(?!script)',  # Java but not JavaScript
-        'csharp': r'\bc#\b|\bcsharp\b',
-        'cpp': r'\bc\+\+\b',
-        'php': r'\bphp\b',
-        'go': r'\bgo\b(?:lang)?\b',
-        'rust': r'\brust\b',
-        'ruby': r'\bruby\b',
-        'kotlin': r'\bkotlin\b',
-        'swift': r'\bswift\b',
-        'react': r'\breact\b',
-        'vue': r'\bvue\.?js\b|\bvue\b',
-        'angular': r'\bangular\b',
-        'html': r'\bhtml\b',
-        'css': r'\bcss\b',
-        'bootstrap': r'\bbootstrap\b',
-        'tailwind': r'\btailwind\b',
-        'webpack': r'\bwebpack\b',
-        'nextjs': r'\bnext\.?js\b',
-        'svelte': r'\bsvelte\b',
-        'nodejs': r'\bnode\.?js\b',
-        'node': r'\bnode\b(?!\.js)',
-        'express': r'\bexpress\b',
-        'django': r'\bdjango\b',
-        'flask': r'\bflask\b',
-        'fastapi': r'\bfastapi\b',
-        'spring': r'\bspring\b',
-        'laravel': r'\blaravel\b',
-        'aspnet': r'\basp\.net\b',
-        'sql': r'\bsql\b',
-        'postgresql': r'\bpostgres(?:ql)?\b',
-        'mysql': r'\bmysql\b',
-        'mongodb': r'\bmongo(?:db)?\b',
-        'firebase': r'\bfirebase\b',
-        'redis': r'\bredis\b',
-        'elasticsearch': r'\belasticsearch\b',
-        'oracle': r'\boracle\b',
-        'cassandra': r'\bcassandra\b',
-        'aws': r'\baws\b',
-        'azure': r'\bazure\b',
-        'gcp': r'\bgcp\b|\bgoogle\s+cloud\b',
-        'docker': r'\bdocker\b',
-        'kubernetes': r'\bkubernetes\b|\bk8s\b',
-        'k8s': r'\bk8s\b',
-        'git': r'\bgit\b',
-        'cicd': r'\bci\s*/?cd\b',
-        'jenkins': r'\bjenkins\b',
-        'terraform': r'\bterraform\b',
-        'ansible': r'\bansible\b',
-        'linux': r'\blinux\b',
-        'machinelearning': r'\bmachine\s+learning\b|\bml\b',
-        'tensorflow': r'\btensorflow\b',
-        'pytorch': r'\bpytorch\b',
-        'keras': r'\bkeras\b',
-        'scikitlearn': r'\bscikit[\s-]?learn\b',
-        'pandas': r'\bpandas\b',
-        'numpy': r'\bnumpy\b',
-        'opencv': r'\bopencv\b',
-        'jupyter': r'\bjupyter\b',
-        'nlp': r'\bnlp\b',
-        'restapi': r'\brest\s+api\b|\brestful\b',
-        'graphql': r'\bgraphql\b',
-        'websocket': r'\bwebsocket\b',
-        'soap': r'\bsoap\b',
-        'agile': r'\bagile\b',
-        'scrum': r'\bscrum\b',
-        'jira': r'\bjira\b',
-        'slack': r'\bslack\b',
-        'github': r'\bgithub\b',
-        'gitlab': r'\bgitlab\b',
-        'communication': r'\bcommunication\b',
-        'teamwork': r'\bteamwork\b',
-        'leadership': r'\bleadership\b',
-        'management': r'\bmanagement\b',
-        'problemsolving': r'\bproblem\s+solving\b',
-        'analytical': r'\banalytical\b',
-        'creative': r'\bcreative\b',
-        'collaboration': r'\bcollaboration\b'
-    }
-    
-    for skill, pattern in skill_patterns.items():
-        if re.search(pattern, text_lower):
-            if skill not in found:
-                found.append(skill)
-    
-    return found
+    return extract_skills_from_tokens(_WORD_RE.findall(text_lower), text_lower)
+
+@timed_stage("extract_skills")
+def extract_skills_from_tokens(words: List[str], text_lower: str) -> List[str]:
+    """
+    extract_skills_from_text for text that is already lowercased and split
+    into words (e.g. ProcessedDocument.tokens of the cleaned text).
+    """
+    # Everything below works on the unique tokens
+    tokens = set(words)
+    hits = set()
+    for word in tokens.intersection(_SKILL_WORDS):
+        hits.update(_SKILL_WORDS[word])
+
+    sorted_tokens = sorted(tokens)
+    for lead, regex, skills in _SKILL_COMPLEX_ALTS:
+        if hits.issuperset(skills):
+            continue
+        i = bisect.bisect_left(sorted_tokens, lead)
+        if i < len(sorted_tokens) and sorted_tokens[i].startswith(lead) and regex.search(text_lower):
+            hits.update(skills)
+
+    # Same ordering as the pattern table
+    return sorted(hits, key=_SKILL_ORDER.__getitem__)
+
+jd_store = JobDescriptionStore(extract_skills_from_text, SKILLS_VERSION, JD_STORE_DB)
+candidate_index = CandidateIndex(list(SKILL_PATTERNS), CANDIDATE_INDEX_DB) if CANDIDATE_INDEX_ENABLED else None
+job_queue = JobQueue(JOBS_DB, JOBS_DIR, JOB_MAX_ATTEMPTS)
+near_duplicate_index = (
+    NearDuplicateIndex(threshold=NEAR_DUPLICATE_THRESHOLD, db_path=NEAR_DUPLICATES_DB) if NEAR_DUPLICATES_ENABLED else None
+)
+
+_embedding_index: Optional[EmbeddingIndex] = None
+_embedding_index_lock = threading.Lock()
+
+def get_embedding_index() -> Optional[EmbeddingIndex]:
+    """The embedding index, opened on first use with the Word2Vec vector size (None if disabled or no model)."""
+    global _embedding_index
+    if not EMBEDDING_INDEX_ENABLED:
+        return None
+    if _embedding_index is None:
+        w2v = get_model("w2v")
+        if w2v is None:
+            return None
+        with _embedding_index_lock:
+            if _embedding_index is None:
+                _embedding_index = EmbeddingIndex(w2v.vector_size, EMBEDDING_INDEX_DIR)
+    return _embedding_index
+
+def embed_tokens(tokens: List[str]) -> Optional[np.ndarray]:
+    """Normalized mean Word2Vec vector of cleaned tokens (None without a model or known tokens)."""
+    w2v = get_model("w2v")
+    if w2v is None:
+        return None
+    with observe_stage("embed"):
+        return mean_embedding(tokens, w2v.key_to_index, w2v.vectors)
+
+def index_candidate(doc: "ProcessedDocument") -> Optional[str]:
+    """Add a resume to the candidate and embedding indexes (if enabled); returns its candidate_id."""
+    embedding_index = get_embedding_index()
+    if candidate_index is None and embedding_index is None:
+        return None
+    candidate_id = doc.candidate_id
+    if candidate_index is not None:
+        candidate_index.add(candidate_id, doc.skills, doc.filename)
+    if embedding_index is not None:
+        vector = doc.embedding
+        if vector is not None:
+            embedding_index.add(candidate_id, vector, doc.filename)
+    return candidate_id
+
+def _reopen_after_fork() -> None:
+    """Workers forked by serve.py need their own SQLite connections and file handles."""
+    llm_cache.reopen()
+    jd_store.reopen()
+    job_queue.reopen()
+    if candidate_index is not None:
+        candidate_index.reopen()
+    if near_duplicate_index is not None:
+        near_duplicate_index.reopen()
+    if _embedding_index is not None:
+        _embedding_index.reopen()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
 
 # -----------------------------
 # Text extraction utilities
 # -----------------------------
-def extract_text_from_pdf_bytes(file_bytes: bytes) -> str:
-    """
-    Primary method: pdfplumber for text-based PDFs.
-    If pdfplumber returns empty text and OCR is available, use OCR fallback.
-    """
-    text = ""
+# The extractors themselves live in extraction.py so pool workers can import
+# them without loading the models.
+extraction_cache = ExtractionCache(
+    max_items=EXTRACTION_CACHE_SIZE,
+    disk_dir=EXTRACTION_CACHE_DIR,
+    version=f"{EXTRACTOR_VERSION}-{PDF_ENGINE}-{PDF_MAX_PAGES}-{PDF_MAX_CHARS}",
+)
+
+extraction_pool = ExtractionPool(
+    size=EXTRACTION_POOL_SIZE,
+    timeout=EXTRACTION_TIMEOUT,
+    recycle_after=EXTRACTION_POOL_RECYCLE,
+)
+
+def _record_extraction_timings(timings: Dict[str, Any]) -> None:
+    endpoint = metrics.current_endpoint.get()
+    for stage in PDF_ENGINES + ("ocr", "docx"):
+        if stage in timings:
+            metrics.STAGE_SECONDS.observe(timings[stage], stage=f"extract_{stage}")
+            if stage in PDF_ENGINES:
+                metrics.PDF_PAGES.inc(timings.get("pdf_pages", 0), engine=stage)
+    if timings.get("pdf_truncated"):
+        metrics.PDF_TRUNCATED.inc(endpoint=endpoint)
+    if timings.get("ocr_pages"):
+        metrics.OCR_INVOCATIONS.inc(endpoint=endpoint)
+        metrics.OCR_PAGES.inc(timings["ocr_pages"], endpoint=endpoint)
+
+async def receive_upload(file: UploadFile) -> SpooledUpload:
+    """Read an upload in chunks, spooling large files to disk; 413 past MAX_UPLOAD_MB."""
     try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            pages_text = []
-            for p in pdf.pages:
-                page_text = p.extract_text()
-                if page_text:
-                    pages_text.append(page_text)
-            text = "\n".join(pages_text).strip()
+        with observe_stage("receive_upload"):
+            upload = await spool_upload(file, UPLOAD_SPOOL_KB * 1024, int(MAX_UPLOAD_MB * 1024 * 1024), UPLOAD_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    metrics.UPLOAD_BYTES.inc(upload.size, storage="disk" if upload.spooled else "memory")
+    return upload
+
+async def cached_extract(upload: SpooledUpload, extractor: str) -> str:
+    """Return cached text for the upload, otherwise run the extractor in the extraction pool."""
+    key = extraction_cache.make_key(upload.data, extractor, digest=upload.sha256)
+    text = extraction_cache.get(key)
+    if text is not None:
+        return text
+    try:
+        with metrics.WORK_IN_FLIGHT.track(kind="extraction"):
+            text, timings = await extraction_pool.run(extract_with_timings, extractor, upload.source)
+        _record_extraction_timings(timings)
+    except ExtractionTimeout:
+        raise HTTPException(status_code=504, detail=f"Text extraction timed out after {EXTRACTION_TIMEOUT:g}s.")
     except Exception:
         text = ""
-
-    # If pdfplumber returned no text and OCR tools are installed, try OCR
-    if (not text) and OCR_AVAILABLE:
-        try:
-            images = convert_from_bytes(file_bytes)
-            ocr_texts = []
-            for img in images:
-                ocr_text = pytesseract.image_to_string(img)
-                ocr_texts.append(ocr_text)
-            text = "\n".join(ocr_texts).strip()
-        except Exception:
-            text = ""
+    if text:
+        extraction_cache.put(key, text)
     return text
 
-def extract_text_from_docx_bytes(file_bytes: bytes) -> str:
-    try:
-        bio = io.BytesIO(file_bytes)
-        doc = DocxDocument(bio)
-        paragraphs = [p.text for p in doc.paragraphs if p.text]
-        return "\n".join(paragraphs)
-    except Exception:
-        return ""
+async def extract_text_from_upload(upload: SpooledUpload) -> str:
+    """
+    Extract raw text from an uploaded file, dispatching on its extension.
+    PDF and DOCX results are cached by content hash, so re-uploading the same
+    file to any endpoint skips parsing and OCR.
+    """
+    filename = upload.filename
+    ext = (filename.split(".")[-1] if "." in filename else "").lower()
+
+    if ext == "pdf":
+        return await cached_extract(upload, "pdf")
+    if ext == "docx":
+        return await cached_extract(upload, "docx")
+    if ext == "txt":
+        with observe_stage("extract_txt"):
+            try:
+                return upload.read_bytes().decode("utf-8", errors="ignore")
+            except Exception:
+                return ""
+
+    # Unknown extension: try PDF first, then docx
+    raw_text = await cached_extract(upload, "pdf")
+    if not raw_text:
+        raw_text = await cached_extract(upload, "docx")
+    return raw_text
 
 # -----------------------------
-# Model loading (at startup)
+# Model loading (lazy, on first use)
 # -----------------------------
 def safe_load_joblib(path: str):
     if os.path.exists(path):
-        return joblib.load(path)
+        return joblib.load(path, mmap_mode="r" if MODEL_MMAP else None)
     return None
 
 def safe_load_keras(path: str):
     if os.path.exists(path):
+        from tensorflow.keras.models import load_model
         return load_model(path)
     return None
 
-def safe_load_gensim(path: str):
+def safe_load_numpy_lstm(path: str):
     if os.path.exists(path):
-        return gensim.models.Word2Vec.load(path)
+        return NumpyLSTMModel.load(path)
     return None
 
-# Initialize model variables (global)
-tfidf = None
-clf_cat = None
-clf_type = None
-w2v = None
-lstm_cat = None
-lstm_type = None
-tokenizer = None
-max_len = None
-
-def load_all_models():
-    global tfidf, clf_cat, clf_type, w2v, lstm_cat, lstm_type, tokenizer, max_len
+def load_lstm(h5_path: str, npz_path: str):
+    if LSTM_ENGINE == "numpy":
+        return safe_load_numpy_lstm(npz_path)
+    return safe_load_keras(h5_path)
 
-    # sklearn artifacts
-    tfidf = safe_load_joblib(TFIDF_PATH)
-    clf_cat = safe_load_joblib(CLF_CAT_PATH)
-    clf_type = safe_load_joblib(CLF_TYPE_PATH)
+def w2v_source_path() -> str:
+    return W2V_KV_PATH if os.path.exists(W2V_KV_PATH) else W2V_PATH
 
-    # gensim
-    w2v = safe_load_gensim(W2V_PATH)
+def safe_load_gensim(path: str):
+    """Word2Vec KeyedVectors from a converted .kv file, or from the full training model."""
+    if not os.path.exists(path):
+        return None
+    import gensim
+    mmap = "r" if MODEL_MMAP else None
+    if path.endswith(".kv"):
+        return gensim.models.KeyedVectors.load(path, mmap=mmap)
+    return gensim.models.Word2Vec.load(path, mmap=mmap).wv
+
+def load_skill_similarity():
+    """Skill similarity matrix saved with the models, rebuilt from w2v when missing or stale."""
+    w2v = get_model("w2v")
+    if w2v is None:
+        return None
+    stat = os.stat(w2v_source_path())
+    fingerprint = f"{SKILLS_VERSION}:{stat.st_size}:{int(stat.st_mtime)}"
+    if os.path.exists(SKILL_SIMILARITY_PATH):
+        try:
+            loaded = SkillSimilarity.load(SKILL_SIMILARITY_PATH, fingerprint)
+            if loaded is not None:
+                return loaded
+        except Exception as e:
+            print(f"[Models] Ignoring unreadable {SKILL_SIMILARITY_PATH}: {e}")
+    tokens = {skill: skill_tokens(skill, pattern) for skill, pattern in SKILL_PATTERNS.items()}
+    similarity = SkillSimilarity.build(tokens, w2v.key_to_index, w2v.vectors, fingerprint)
+    try:
+        similarity.save(SKILL_SIMILARITY_PATH)
+    except OSError as e:
+        print(f"[Models] Could not save {SKILL_SIMILARITY_PATH}: {e}")
+    return similarity
+
+def load_tokenizer(path: str):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tokenizer_json = f.read()
+        if LSTM_ENGINE == "numpy":
+            return NumpyTokenizer.from_json(tokenizer_json)
+        from tensorflow.keras.preprocessing.text import tokenizer_from_json
+        return tokenizer_from_json(tokenizer_json)
+    except Exception:
+        return None
 
-    # keras lstm models
-    lstm_cat = safe_load_keras(LSTM_CAT_PATH)
-    lstm_type = safe_load_keras(LSTM_TYPE_PATH)
+def load_max_len(path: str) -> int:
+    if not os.path.exists(path):
+        return 100
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        return int(cfg.get("max_len", 100))
+    except Exception:
+        return 100
 
-    # tokenizer + config for LSTM
-    if os.path.exists(TOKENIZER_PATH):
-        try:
-            with open(TOKENIZER_PATH, "r", encoding="utf-8") as f:
-                tokenizer_json = f.read()
-            tokenizer = tokenizer_from_json(tokenizer_json)
-        except Exception:
-            tokenizer = None
-    else:
-        tokenizer = None
+class LazyArtifact:
+    """
+    A model artifact loaded on first get(). Loading happens once even when
+    several threads ask at the same time; a missing file loads as None.
+    """
 
-    if os.path.exists(CONFIG_PATH):
-        try:
-            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-            max_len = int(cfg.get("max_len", 100))
-        except Exception:
-            max_len = 100
-    else:
-        max_len = 100
+    def __init__(self, name: str, loader):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value = None
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self._loader()
+                except Exception as e:
+                    self._value = None
+                    self.error = str(e)
+                    print(f"[Models] Failed to load {self.name}: {e}")
+                self.load_seconds = time.perf_counter() - start
+                self._loaded = True
+        return self._value
+
+    def set(self, value) -> None:
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+MODEL_ARTIFACTS: Dict[str, LazyArtifact] = {
+    "tfidf": LazyArtifact("tfidf", lambda: safe_load_joblib(TFIDF_PATH)),
+    "clf_cat": LazyArtifact("clf_cat", lambda: safe_load_joblib(CLF_CAT_PATH)),
+    "clf_type": LazyArtifact("clf_type", lambda: safe_load_joblib(CLF_TYPE_PATH)),
+    "w2v": LazyArtifact("w2v", lambda: safe_load_gensim(w2v_source_path())),
+    "skill_similarity": LazyArtifact("skill_similarity", load_skill_similarity),
+    "lstm_cat": LazyArtifact("lstm_cat", lambda: load_lstm(LSTM_CAT_PATH, LSTM_CAT_NPZ_PATH)),
+    "lstm_type": LazyArtifact("lstm_type", lambda: load_lstm(LSTM_TYPE_PATH, LSTM_TYPE_NPZ_PATH)),
+    "tokenizer": LazyArtifact("tokenizer", lambda: load_tokenizer(TOKENIZER_PATH)),
+    "max_len": LazyArtifact("max_len", lambda: load_max_len(CONFIG_PATH)),
+    "stopwords": LazyArtifact("stopwords", load_stop_words),
+}
+
+def get_model(name: str):
+    """Return a model artifact, loading it on first use (None if unavailable)."""
+    return MODEL_ARTIFACTS[name].get()
 
-# Load on import
-load_all_models()
+def load_all_models():
+    """Eagerly load every artifact (e.g. before serving, see WARMUP_MODELS)."""
+    for artifact in MODEL_ARTIFACTS.values():
+        artifact.get()
+
+def _test_run_model(name: str, model) -> None:
+    """Push a tiny input through a loaded artifact so first-request costs are paid now."""
+    sample = "python developer docker aws"
+    if name == "tfidf":
+        model.transform([sample])
+    elif name in ("clf_cat", "clf_type"):
+        tfidf = get_model("tfidf")
+        if tfidf is not None:
+            model.predict(tfidf.transform([sample]))
+    elif name in ("lstm_cat", "lstm_type"):
+        model.predict_on_batch(np.zeros((1, get_model("max_len")), dtype="int32"))
+    elif name == "tokenizer":
+        model.texts_to_sequences([sample])
+    elif name == "w2v":
+        if len(model.index_to_key):
+            model[model.index_to_key[0]]
+
+def warmup_models(names: List[str]) -> Dict[str, Any]:
+    """Load and test-run the named artifacts. Returns per-artifact status."""
+    report = {}
+    for name in names:
+        artifact = MODEL_ARTIFACTS[name]
+        model = artifact.get()
+        status = {"available": model is not None, "load_seconds": artifact.load_seconds, "error": artifact.error}
+        if model is not None:
+            start = time.perf_counter()
+            try:
+                _test_run_model(name, model)
+                status["test_ok"] = True
+            except Exception as e:
+                status["test_ok"] = False
+                status["error"] = str(e)
+            status["test_seconds"] = time.perf_counter() - start
+        report[name] = status
+    return report
+
+def parse_model_list(value: str) -> List[str]:
+    if value.lower() == "all":
+        return list(MODEL_ARTIFACTS)
+    return [name.strip() for name in value.split(",") if name.strip() in MODEL_ARTIFACTS]
+
+warmup_state: Dict[str, Any] = {"done": not WARMUP_MODELS, "error": None}
 
 # -----------------------------
 # FastAPI app
@@ -437,13 +855,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(UploadLimitMiddleware, max_bytes=int(MAX_REQUEST_MB * 1024 * 1024))
+
+def route_label(scope) -> str:
+    """
+    Route template for metric labels (e.g. /jobs/{job_id}), so ids in paths
+    do not each become a series; "unmatched" for paths no route serves.
+    """
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # right path, wrong method (405)
+    return partial or "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    endpoint = route_label(request.scope)
+    token = metrics.current_endpoint.set(endpoint)
+    metrics.REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        metrics.REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(status))
+        if status >= 400:
+            metrics.REQUEST_ERRORS.inc(endpoint=endpoint)
+        metrics.current_endpoint.reset(token)
+
+def _collect_component_stats() -> None:
+    """Copy cache / pool / batcher counters into gauges right before /metrics renders."""
+    components = {
+        "extraction_cache": extraction_cache.stats(),
+        "extraction_pool": extraction_pool.stats(),
+        "lstm_cat_batcher": lstm_cat_batcher.stats(),
+        "lstm_type_batcher": lstm_type_batcher.stats(),
+        "ollama_client": ollama_client.stats(),
+        "llm_cache": llm_cache.stats(),
+        "job_queue": job_queue.stats(),
+    }
+    if candidate_index is not None:
+        components["candidate_index"] = candidate_index.stats()
+    if near_duplicate_index is not None:
+        components["near_duplicates"] = near_duplicate_index.stats()
+    if _embedding_index is not None:
+        components["embedding_index"] = _embedding_index.stats()
+    for component, stats in components.items():
+        for stat, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics.COMPONENT_STATS.set(value, component=component, stat=stat)
+
+metrics.REGISTRY.add_collector(_collect_component_stats)
+
 # Response models
 class AnalyzeTextRequest(BaseModel):
     text: str
 
+class WarmupRequest(BaseModel):
+    models: Optional[List[str]] = None
+
+class JobDescriptionRequest(BaseModel):
+    text: str
+    title: Optional[str] = None
+
+class RankRequest(BaseModel):
+    job_description: Optional[str] = None
+    jd_id: Optional[str] = None
+    top_k: int = 10
+
+class SearchRequest(BaseModel):
+    query: Optional[str] = None
+    jd_id: Optional[str] = None
+    top_k: int = 10
+
 # -----------------------------
 # Helper inference utilities
 # -----------------------------
+@timed_stage("sklearn_predict")
 def sklearn_predict_with_confidence(clf, tfidf_vec, classes_map=None) -> Dict[str, Any]:
     """
     Returns {'label': label, 'confidence': prob}
@@ -468,6 +963,31 @@ def sklearn_predict_with_confidence(clf, tfidf_vec, classes_map=None) -> Dict[st
         except Exception:
             return {"label": None, "confidence": None}
 
+@timed_stage("sklearn_predict")
+def sklearn_predict_batch(clf, tfidf_matrix) -> List[Dict[str, Any]]:
+    """
+    Row-wise sklearn_predict_with_confidence for a whole TF-IDF matrix,
+    using a single predict_proba / predict call.
+    """
+    n_rows = tfidf_matrix.shape[0]
+    empty = [{"label": None, "confidence": None} for _ in range(n_rows)]
+    if clf is None or n_rows == 0:
+        return empty
+    try:
+        if hasattr(clf, "predict_proba"):
+            probs = clf.predict_proba(tfidf_matrix)
+            idx = np.argmax(probs, axis=1)
+            conf = probs[np.arange(n_rows), idx]
+            return [{"label": str(clf.classes_[i]), "confidence": float(c)} for i, c in zip(idx, conf)]
+        labels = clf.predict(tfidf_matrix)
+        return [{"label": str(label), "confidence": None} for label in labels]
+    except Exception:
+        try:
+            labels = clf.predict(tfidf_matrix)
+            return [{"label": str(label), "confidence": None} for label in labels]
+        except Exception:
+            return empty
+
 def lstm_predict_with_confidence(model, tokenizer_obj, text: str, max_len_val: int):
     """
     Returns {'label': decoded_label, 'confidence': prob, 'raw': logits}
@@ -479,7 +999,8 @@ def lstm_predict_with_confidence(model, tokenizer_obj, text: str, max_len_val: i
     try:
         seq = tokenizer_obj.texts_to_sequences([text])
         pad = pad_sequences(seq, maxlen=max_len_val, padding="post")
-        preds = model.predict(pad)
+        with observe_stage("lstm_predict"):
+            preds = model.predict(pad)
         if preds.ndim == 2:
             idx = int(np.argmax(preds[0]))
             confidence = float(np.max(preds[0]))
@@ -493,46 +1014,223 @@ def lstm_predict_with_confidence(model, tokenizer_obj, text: str, max_len_val: i
 # If you have saved label encoders, load them and use inverse_transform to map LSTM index to label.
 # For simplicity we return index (user can map on client or add encoders to models folder).
 
+def _lstm_row_result(row) -> Dict[str, Any]:
+    """Decode one row of LSTM softmax output into index + confidence."""
+    row = np.asarray(row)
+    if row.ndim != 1:
+        return {"label_index": None, "confidence": None}
+    return {"label_index": int(np.argmax(row)), "confidence": float(np.max(row))}
+
+def _lstm_forward(name: str, batch: np.ndarray):
+    with observe_stage("lstm_predict"):
+        return get_model(name).predict_on_batch(batch)
+
+lstm_cat_batcher = MicroBatcher(lambda batch: _lstm_forward("lstm_cat", batch), LSTM_BATCH_MAX, LSTM_BATCH_WAIT_MS, name="lstm_cat")
+lstm_type_batcher = MicroBatcher(lambda batch: _lstm_forward("lstm_type", batch), LSTM_BATCH_MAX, LSTM_BATCH_WAIT_MS, name="lstm_type")
+
+async def lstm_predict_batched(doc: "ProcessedDocument"):
+    """
+    Category and skill-type LSTM predictions for one document, from its
+    padded sequence; each model call goes through its micro-batcher so
+    concurrent requests share a forward pass.
+    """
+    empty = {"label_index": None, "confidence": None}
+    lstm_cat, lstm_type = get_model("lstm_cat"), get_model("lstm_type")
+    if lstm_cat is None and lstm_type is None:
+        return empty, empty
+    pad = doc.padded_sequence
+    if pad is None:
+        return empty, empty
+
+    async def run(model, batcher):
+        if model is None:
+            return empty
+        try:
+            with metrics.WORK_IN_FLIGHT.track(kind="lstm"):
+                return _lstm_row_result(await batcher.submit(pad))
+        except Exception:
+            return empty
+
+    return await asyncio.gather(run(lstm_cat, lstm_cat_batcher), run(lstm_type, lstm_type_batcher))
+
+async def lstm_predict_many(docs: List["ProcessedDocument"]):
+    """
+    LSTM predictions for many documents as one padded batch per model.
+    Returns (category results, skill-type results), one dict per document.
+    """
+    empty = [{"label_index": None, "confidence": None} for _ in docs]
+    if not docs:
+        return empty, list(empty)
+    lstm_cat, lstm_type = get_model("lstm_cat"), get_model("lstm_type")
+    if lstm_cat is None and lstm_type is None:
+        return empty, list(empty)
+    rows = [doc.padded_sequence for doc in docs]
+    if any(row is None for row in rows):
+        return empty, list(empty)
+    pad = np.stack(rows)
+
+    async def run(model, batcher):
+        if model is None:
+            return list(empty)
+        try:
+            with metrics.WORK_IN_FLIGHT.track(len(docs), kind="lstm"):
+                preds = await batcher.predict_many(pad)
+            return [_lstm_row_result(row) for row in preds]
+        except Exception:
+            return list(empty)
+
+    cat_results, type_results = await asyncio.gather(run(lstm_cat, lstm_cat_batcher), run(lstm_type, lstm_type_batcher))
+    return cat_results, type_results
+
 # -----------------------------
-# Endpoints
+# Document pipeline
 # -----------------------------
-@app.get("/health")
-def health():
-    loaded = {
-        "tfidf": bool(tfidf),
-        "clf_cat": bool(clf_cat),
-        "clf_type": bool(clf_type),
-        "w2v": bool(w2v),
-        "lstm_cat": bool(lstm_cat),
-        "lstm_type": bool(lstm_type),
-        "tokenizer": bool(tokenizer),
-        "ocr_available": OCR_AVAILABLE
-    }
-    return {"status": "ok", "models": loaded, "max_len": max_len}
+_TFIDF_DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+def _tfidf_accepts_tokens(tfidf) -> bool:
+    return (
+        getattr(tfidf, "analyzer", None) == "word"
+        and tuple(getattr(tfidf, "ngram_range", ())) == (1, 1)
+        and getattr(tfidf, "tokenizer", None) is None
+        and getattr(tfidf, "preprocessor", None) is None
+        and getattr(tfidf, "token_pattern", None) == _TFIDF_DEFAULT_TOKEN_PATTERN
+        and (getattr(tfidf, "stop_words", None) is None or not getattr(tfidf, "fixed_vocabulary_", False))
+        and hasattr(tfidf, "vocabulary_")
+        and hasattr(tfidf, "_tfidf")
+    )
+
+def tfidf_transform_tokens(tfidf, token_lists: List[List[str]]):
+    """
+    Same as tfidf.transform([" ".join(tokens), ...]) for lowercase word
+    lists, but counts terms straight from vocabulary_ instead of running the
+    vectorizer's analyzer over the text again. Vectorizers with a custom
+    analyzer, n-grams or token pattern take the regular path.
+    """
+    with observe_stage("tfidf_transform"):
+        if not _tfidf_accepts_tokens(tfidf):
+            return tfidf.transform([" ".join(tokens) for tokens in token_lists])
+        from scipy.sparse import csr_matrix
+        vocabulary = tfidf.vocabulary_
+        indptr, indices, counts = [0], [], []
+        for tokens in token_lists:
+            row: Dict[int, int] = {}
+            for token in tokens:
+                j = vocabulary.get(token)
+                if j is not None:
+                    row[j] = row.get(j, 0) + 1
+            indices.extend(row)
+            counts.extend(row.values())
+            indptr.append(len(indices))
+        X = csr_matrix(
+            (np.array(counts, dtype=np.int64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+            shape=(len(token_lists), len(vocabulary)),
+        )
+        X.sort_indices()
+        if tfidf.binary:
+            X.data.fill(1)
+        return tfidf._tfidf.transform(X, copy=False)
 
-@app.post("/analyze/text")
-async def analyze_text(payload: AnalyzeTextRequest):
-    text = payload.text or ""
-    cleaned = clean_text(text)
-    skills_found = extract_skills_from_text(cleaned)
-    skills_text = " ".join(skills_found) if skills_found else cleaned[:1000]
-
-    # TF-IDF + sklearn
-    tfidf_vec = None
-    cat_res = {"label": None, "confidence": None}
-    type_res = {"label": None, "confidence": None}
-    if tfidf is not None:
+class ProcessedDocument:
+    """
+    One resume (or JD / search query) and everything derived from it.
+
+    Each artifact is computed on first access and then shared by every
+    consumer in the request: the raw text is cleaned and split into words
+    once (tokens), and the cleaned text, skills, TF-IDF row, padded LSTM
+    sequence and Word2Vec embedding are all built from those words instead
+    of re-scanning the text.
+    """
+
+    def __init__(self, raw_text: str = "", filename: str = ""):
+        self.raw_text = raw_text or ""
+        self.filename = filename
+
+    @classmethod
+    async def from_upload(cls, upload: SpooledUpload) -> "ProcessedDocument":
+        return cls(await extract_text_from_upload(upload), upload.filename)
+
+    @classmethod
+    async def from_file(cls, file: UploadFile) -> "ProcessedDocument":
+        """Spool an UploadFile (see receive_upload), extract its text and drop the spooled copy."""
+        with await receive_upload(file) as upload:
+            return await cls.from_upload(upload)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return clean_tokens(self.raw_text)
+
+    @cached_property
+    def cleaned(self) -> str:
+        return " ".join(self.tokens)
+
+    @cached_property
+    def skills(self) -> List[str]:
+        return extract_skills_from_tokens(self.tokens, self.cleaned)
+
+    @cached_property
+    def model_tokens(self) -> List[str]:
+        """Words the TF-IDF models see: the skills, or the start of the text if none were found."""
+        return self.skills if self.skills else self.cleaned[:1000].split()
+
+    @cached_property
+    def tfidf_row(self):
+        tfidf = get_model("tfidf")
+        if tfidf is None:
+            return None
+        return tfidf_transform_tokens(tfidf, [self.model_tokens])
+
+    @cached_property
+    def padded_sequence(self) -> Optional[np.ndarray]:
+        tokenizer = get_model("tokenizer")
+        if tokenizer is None:
+            return None
         try:
-            tfidf_vec = tfidf.transform([skills_text])
-            cat_res = sklearn_predict_with_confidence(clf_cat, tfidf_vec)
-            type_res = sklearn_predict_with_confidence(clf_type, tfidf_vec)
+            if isinstance(tokenizer, NumpyTokenizer) and tokenizer.accepts_words():
+                seq = tokenizer.words_to_sequence(self.tokens)
+            else:
+                seq = tokenizer.texts_to_sequences([self.cleaned])[0]
+            return pad_sequences([seq], maxlen=get_model("max_len"), padding="post")[0]
         except Exception:
-            pass
+            return None
+
+    @cached_property
+    def embedding(self) -> Optional[np.ndarray]:
+        return embed_tokens(self.tokens)
+
+    @cached_property
+    def candidate_id(self) -> str:
+        return "cand_" + hashlib.sha256(self.cleaned.encode("utf-8")).hexdigest()[:16]
+
+    @cached_property
+    def signature(self) -> Optional[np.ndarray]:
+        """MinHash signature of the tokens (None when near-duplicate detection is off)."""
+        if near_duplicate_index is None:
+            return None
+        with observe_stage("minhash"):
+            return near_duplicate_index.signature(self.tokens)
+
+def tfidf_predictions(docs: List[ProcessedDocument]):
+    """(category, skill-type) TF-IDF classifier results per document, one transform for all."""
+    empty = [{"label": None, "confidence": None} for _ in docs]
+    tfidf = get_model("tfidf") if docs else None
+    if tfidf is None:
+        return empty, list(empty)
+    try:
+        if len(docs) == 1:
+            matrix = docs[0].tfidf_row
+            return [sklearn_predict_with_confidence(get_model("clf_cat"), matrix)], [sklearn_predict_with_confidence(get_model("clf_type"), matrix)]
+        matrix = tfidf_transform_tokens(tfidf, [doc.model_tokens for doc in docs])
+        return sklearn_predict_batch(get_model("clf_cat"), matrix), sklearn_predict_batch(get_model("clf_type"), matrix)
+    except Exception:
+        return empty, list(empty)
 
-    # LSTM (if tokenizer + model loaded)
-    lstm_cat_res = lstm_predict_with_confidence(lstm_cat, tokenizer, cleaned, max_len) if (lstm_cat and tokenizer) else {"label_index": None, "confidence": None}
-    lstm_type_res = lstm_predict_with_confidence(lstm_type, tokenizer, cleaned, max_len) if (lstm_type and tokenizer) else {"label_index": None, "confidence": None}
+async def analyze_document(doc: ProcessedDocument) -> Dict[str, Any]:
+    """TF-IDF + LSTM classification and skills of one document (/analyze/text, /analyze/file)."""
+    (cat_res,), (type_res,) = tfidf_predictions([doc])
+    lstm_cat_res, lstm_type_res = await lstm_predict_batched(doc)
+    return document_result(doc, cat_res, type_res, lstm_cat_res, lstm_type_res)
 
+def document_result(doc: ProcessedDocument, cat_res, type_res, lstm_cat_res, lstm_type_res) -> Dict[str, Any]:
     return {
         "category_tfidf": cat_res["label"],
         "category_tfidf_conf": cat_res["confidence"],
@@ -542,137 +1240,607 @@ async def analyze_text(payload: AnalyzeTextRequest):
         "category_lstm_conf": lstm_cat_res.get("confidence"),
         "skill_type_lstm_index": lstm_type_res.get("label_index"),
         "skill_type_lstm_conf": lstm_type_res.get("confidence"),
-        "skills_found": skills_found,
-        "text_snippet": cleaned[:2000]
+        "skills_found": doc.skills,
+        "text_snippet": doc.cleaned[:2000]
+    }
+
+def check_duplicate(doc: ProcessedDocument) -> Optional[Dict[str, Any]]:
+    """
+    Look the document up in the near-duplicate index, then add it there.
+    Returns the closest earlier resume as {"candidate_id", "filename",
+    "similarity", "reused": False}, or None (no match, or detection off).
+    """
+    if doc.signature is None:
+        return None
+    match = near_duplicate_index.find(doc.signature)
+    near_duplicate_index.add(doc.candidate_id, doc.signature, doc.filename)
+    if match is None:
+        return None
+    metrics.NEAR_DUPLICATES.inc(endpoint=metrics.current_endpoint.get(), reused="false")
+    return {"candidate_id": match["id"], "filename": match["filename"], "similarity": match["similarity"], "reused": False}
+
+def result_key(kind: str, *inputs: Any) -> str:
+    """Key of a stored result that also depends on request inputs, e.g. a /predict match against one JD."""
+    return kind + "-" + hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def stored_analysis(doc: ProcessedDocument, duplicate: Optional[Dict[str, Any]],
+                    key: str = "analysis") -> Optional[Dict[str, Any]]:
+    """The result kept under key for the duplicate's original (None if there is none), also stored for doc."""
+    if duplicate is None:
+        return None
+    previous = near_duplicate_index.get_result(duplicate["candidate_id"], key)
+    if previous is not None:
+        reuse_analysis(doc, duplicate, previous, key)
+    return previous
+
+def reuse_analysis(doc: ProcessedDocument, duplicate: Dict[str, Any], previous: Dict[str, Any],
+                   key: str = "analysis") -> None:
+    near_duplicate_index.set_result(doc.candidate_id, previous, key)
+    duplicate["reused"] = True
+    metrics.NEAR_DUPLICATES.inc(endpoint=metrics.current_endpoint.get(), reused="true")
+
+def remember_analysis(doc: ProcessedDocument, result: Dict[str, Any], key: str = "analysis") -> None:
+    """Keep a freshly computed result for later near-duplicates of doc."""
+    if doc.signature is not None:
+        near_duplicate_index.set_result(doc.candidate_id, result, key)
+
+def reused_candidate_id(duplicate: Dict[str, Any]) -> Optional[str]:
+    """A reused copy is not indexed again; it answers with the original's candidate_id."""
+    if candidate_index is None and not EMBEDDING_INDEX_ENABLED:
+        return None
+    return duplicate["candidate_id"]
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+@app.get("/health")
+def health():
+    # Liveness only: reports what has been loaded so far without loading anything
+    loaded = {name: artifact.loaded for name, artifact in MODEL_ARTIFACTS.items() if name not in ("max_len", "stopwords")}
+    loaded["ocr_available"] = OCR_AVAILABLE
+    max_len = MODEL_ARTIFACTS["max_len"]
+    return {
+        "status": "ok",
+        "models": loaded,
+        "lstm_engine": LSTM_ENGINE,
+        "pdf_engine": PDF_ENGINE,
+        "max_len": max_len.get() if max_len.loaded else None,
+        "model_mmap": MODEL_MMAP,
+        "pid": os.getpid(),
+        "memory": metrics.process_memory(),
     }
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness: 200 once the WARMUP_MODELS set has been loaded, 503 before.
+    With no WARMUP_MODELS the service is ready immediately and loads lazily.
+    """
+    body = {"ready": warmup_state["done"], "warmup_models": WARMUP_MODELS, "error": warmup_state["error"]}
+    if not warmup_state["done"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.post("/warmup")
+async def warmup(payload: Optional[WarmupRequest] = None):
+    """Load (and test-run) a subset of models; all models if none are given."""
+    names = (payload.models if payload and payload.models else list(MODEL_ARTIFACTS))
+    unknown = [n for n in names if n not in MODEL_ARTIFACTS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown models: {', '.join(unknown)}")
+    loop = asyncio.get_running_loop()
+    return {"models": await loop.run_in_executor(None, warmup_models, names)}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text-format metrics (stage latencies, request counters, in-flight gauges)."""
+    # The collectors read SQLite-backed stats (job queue, indexes)
+    return PlainTextResponse(await in_thread(metrics.REGISTRY.render), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit / miss / eviction counters for the extracted-text and LLM response caches."""
+    return {"extraction": extraction_cache.stats(), "llm": llm_cache.stats()}
+
+@app.get("/lstm/batching")
+def lstm_batching_stats():
+    """Batch-size histograms for the LSTM micro-batchers."""
+    return {"lstm_cat": lstm_cat_batcher.stats(), "lstm_type": lstm_type_batcher.stats()}
+
+@app.get("/extraction/pool")
+def extraction_pool_stats():
+    return extraction_pool.stats()
+
+@app.on_event("startup")
+def open_stores():
+    # SQLite files are created here (or on first use), not when app is imported;
+    # under serve.py this runs in each worker after the fork
+    llm_cache.open()
+    jd_store.open()
+    job_queue.open()
+    if candidate_index is not None:
+        candidate_index.open()
+    if near_duplicate_index is not None:
+        near_duplicate_index.open()
+
+@app.on_event("startup")
+async def start_warmup():
+    if not WARMUP_MODELS:
+        return
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, warmup_models, parse_model_list(WARMUP_MODELS))
+        except Exception as e:
+            warmup_state["error"] = str(e)
+        warmup_state["done"] = True
+
+    asyncio.get_running_loop().create_task(run())
+
+@app.on_event("startup")
+async def start_job_workers():
+    global _job_wakeup
+    await purge_finished_jobs()
+    _job_wakeup = asyncio.Event()
+    for worker in range(max(0, JOB_WORKERS)):
+        _job_workers.append(asyncio.get_running_loop().create_task(job_worker(worker)))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    # Before the extraction pool goes away, so running jobs are requeued rather than failed
+    for task in _job_workers:
+        task.cancel()
+    await asyncio.gather(*_job_workers, return_exceptions=True)
+    _job_workers.clear()
+
+@app.on_event("shutdown")
+def shutdown_extraction_pool():
+    extraction_pool.shutdown()
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama_client.aclose()
+
+@app.post("/analyze/text")
+async def analyze_text(payload: AnalyzeTextRequest):
+    return await analyze_document(ProcessedDocument(payload.text or ""))
+
 @app.post("/analyze/file")
-async def analyze_file(file: UploadFile = File(...)):
+async def analyze_file(file: UploadFile = File(...), reuse_duplicates: bool = False):
+    """
+    With NEAR_DUPLICATES=true, duplicate_of names an earlier resume this one
+    is a near-copy of; with reuse_duplicates=true its stored analysis is
+    returned instead of classifying the file again.
+    """
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded.")
-    content = await file.read()
-    filename = file.filename or ""
+    return await analyze_uploaded_document(await ProcessedDocument.from_file(file), reuse_duplicates)
 
-    # Determine type by extension
-    ext = (filename.split(".")[-1] if "." in filename else "").lower()
-    raw_text = ""
+async def analyze_uploaded_document(doc: ProcessedDocument, reuse_duplicates: bool = False) -> Dict[str, Any]:
+    """/analyze/file for a document whose text has been extracted (also run by kind=analyze jobs)."""
+    if not doc.raw_text:
+        raise HTTPException(status_code=400, detail="Could not extract text from file. If it's a scanned PDF ensure OCR (pytesseract + pdf2image) is installed.")
 
-    if ext in ["pdf"]:
-        raw_text = extract_text_from_pdf_bytes(content)
-    elif ext in ["docx"]:
-        raw_text = extract_text_from_docx_bytes(content)
-    elif ext in ["txt"]:
-        try:
-            raw_text = content.decode("utf-8", errors="ignore")
-        except Exception:
-            raw_text = ""
-    else:
-        # try pdfplumber first
-        raw_text = extract_text_from_pdf_bytes(content)
-        if not raw_text:
-            # try docx
-            raw_text = extract_text_from_docx_bytes(content)
+    duplicate = check_duplicate(doc)
+    previous = stored_analysis(doc, duplicate) if reuse_duplicates else None
+    if previous is not None:
+        return {"filename": doc.filename, "candidate_id": reused_candidate_id(duplicate), **previous, "duplicate_of": duplicate}
 
-    if not raw_text:
+    result = await analyze_document(doc)
+    remember_analysis(doc, result)
+    return {"filename": doc.filename, "candidate_id": index_candidate(doc), **result, "duplicate_of": duplicate}
+
+async def _extract_for_batch(file: UploadFile) -> ProcessedDocument:
+    doc = await ProcessedDocument.from_file(file)
+    if not doc.raw_text:
         raise HTTPException(status_code=400, detail="Could not extract text from file. If it's a scanned PDF ensure OCR (pytesseract + pdf2image) is installed.")
+    return doc
 
-    # Reuse analyze_text logic
-    cleaned = clean_text(raw_text)
-    skills_found = extract_skills_from_text(cleaned)
-    skills_text = " ".join(skills_found) if skills_found else cleaned[:1000]
+async def _stream_batch(files: List[UploadFile], reuse_duplicates: bool = False):
+    """
+    Yield one NDJSON line per file as soon as it is analyzed (completion
+    order). At most BATCH_STREAM_CONCURRENCY files are read and processed at
+    a time, so memory stays bounded however large the batch is; LSTM calls
+    from the in-flight files still share forward passes via the micro-batchers.
+    """
+    slots = asyncio.Semaphore(max(1, BATCH_STREAM_CONCURRENCY))
+
+    async def run(index: int, file: UploadFile) -> Dict[str, Any]:
+        async with slots:
+            filename = getattr(file, "filename", None)
+            try:
+                res = await analyze_file(file, reuse_duplicates)
+            except HTTPException as e:
+                res = {"filename": filename, "error": str(e.detail)}
+            except Exception as e:
+                res = {"filename": filename, "error": str(e)}
+            finally:
+                await file.close()
+            return {"index": index, **res}
+
+    tasks = [asyncio.ensure_future(run(i, f)) for i, f in enumerate(files)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@app.post("/batch/analyze")
+async def batch_analyze(request: Request, files: List[UploadFile] = File(...), stream: bool = False,
+                        reuse_duplicates: bool = False):
+    """
+    Analyze many files with the same output as /analyze/file per file.
+    Extraction runs concurrently; TF-IDF, both classifiers and both LSTMs
+    then run once over all successfully extracted documents.
+
+    With `Accept: application/x-ndjson` (or ?stream=true) results are instead
+    streamed one JSON object per line, in completion order, each tagged with
+    the file's index in the upload.
+
+    Near-duplicates (NEAR_DUPLICATES=true) are flagged as in /analyze/file,
+    including copies of an earlier file in the same batch; with
+    reuse_duplicates=true only one copy is classified.
+    """
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(_stream_batch(files, reuse_duplicates), media_type="application/x-ndjson")
+
+    extracted = await asyncio.gather(*[_extract_for_batch(f) for f in files], return_exceptions=True)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    ok_indices, docs = [], []
+    for i, (file, doc) in enumerate(zip(files, extracted)):
+        filename = getattr(file, "filename", None)
+        if isinstance(doc, HTTPException):
+            results[i] = {"filename": filename, "error": str(doc.detail)}
+        elif isinstance(doc, BaseException):
+            results[i] = {"filename": filename, "error": str(doc)}
+        else:
+            ok_indices.append(i)
+            docs.append(doc)
+
+    # In upload order, so a later copy matches an earlier file of the same batch
+    duplicates = [check_duplicate(doc) for doc in docs]
+    analyses: Dict[int, Dict[str, Any]] = {}  # doc position -> analysis
+    copies: Dict[int, int] = {}  # doc position -> position of its original in this batch
+    in_batch: Dict[str, int] = {}  # candidate_id -> position of the doc that will be analyzed for it
+    for j, (doc, duplicate) in enumerate(zip(docs, duplicates)):
+        if reuse_duplicates and duplicate is not None:
+            if duplicate["candidate_id"] in in_batch:
+                copies[j] = in_batch[duplicate["candidate_id"]]
+                in_batch.setdefault(doc.candidate_id, copies[j])
+                continue
+            previous = stored_analysis(doc, duplicate)
+            if previous is not None:
+                analyses[j] = previous
+                continue
+        in_batch.setdefault(doc.candidate_id, j)
+    fresh = [j for j in range(len(docs)) if j not in analyses and j not in copies]
+    fresh_docs = [docs[j] for j in fresh]
+
+    # TF-IDF + sklearn over the whole batch
+    cat_results, type_results = tfidf_predictions(fresh_docs)
+
+    # One padded LSTM batch per model
+    lstm_cat_results, lstm_type_results = await lstm_predict_many(fresh_docs)
+
+    for k, j in enumerate(fresh):
+        analyses[j] = document_result(docs[j], cat_results[k], type_results[k], lstm_cat_results[k], lstm_type_results[k])
+        remember_analysis(docs[j], analyses[j])
+    for j, original in copies.items():
+        analyses[j] = analyses[original]
+        reuse_analysis(docs[j], duplicates[j], analyses[original])
+
+    fresh_set = set(fresh)
+    for j, i in enumerate(ok_indices):
+        candidate_id = index_candidate(docs[j]) if j in fresh_set else reused_candidate_id(duplicates[j])
+        results[i] = {"filename": files[i].filename or "", "candidate_id": candidate_id, **analyses[j], "duplicate_of": duplicates[j]}
+    return {"results": results}
 
-    # TF-IDF predictions
-    tfidf_vec = None
-    cat_res = {"label": None, "confidence": None}
-    type_res = {"label": None, "confidence": None}
-    if tfidf is not None:
-        try:
-            tfidf_vec = tfidf.transform([skills_text])
-            cat_res = sklearn_predict_with_confidence(clf_cat, tfidf_vec)
-            type_res = sklearn_predict_with_confidence(clf_type, tfidf_vec)
-        except Exception:
-            pass
 
-    # LSTM predictions
-    lstm_cat_res = lstm_predict_with_confidence(lstm_cat, tokenizer, cleaned, max_len) if (lstm_cat and tokenizer) else {"label_index": None, "confidence": None}
-    lstm_type_res = lstm_predict_with_confidence(lstm_type, tokenizer, cleaned, max_len) if (lstm_type and tokenizer) else {"label_index": None, "confidence": None}
+# -----------------------------
+# Registered job descriptions
+# -----------------------------
+def resolve_job_description(job_description: str, jd_id: Optional[str]):
+    """Return (JD text, precomputed skills or None) for a raw JD or a registered jd_id."""
+    if not jd_id:
+        return job_description, None
+    entry = jd_store.get(jd_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown jd_id: {jd_id}")
+    return entry["text"], entry["skills"]
+
+@app.post("/jobs/descriptions")
+def register_job_description(req: JobDescriptionRequest):
+    """
+    Store a job description and extract its required skills once.
+    Pass the returned id as jd_id to /predict or /analyze/resume-ollama
+    instead of sending the text with every resume. Registering the same
+    text again returns the existing id.
+    """
+    if not req.text or not req.text.strip():
+        raise HTTPException(status_code=400, detail="Job description text is empty.")
+    entry = jd_store.add(req.text, req.title)
+    return {"id": entry["id"], "title": entry["title"], "skills": entry["skills"], "created": entry["created"]}
 
+@app.get("/jobs/descriptions")
+def list_job_descriptions():
     return {
-        "filename": filename,
-        "category_tfidf": cat_res["label"],
-        "category_tfidf_conf": cat_res["confidence"],
-        "skill_type_tfidf": type_res["label"],
-        "skill_type_tfidf_conf": type_res["confidence"],
-        "category_lstm_index": lstm_cat_res.get("label_index"),
-        "category_lstm_conf": lstm_cat_res.get("confidence"),
-        "skill_type_lstm_index": lstm_type_res.get("label_index"),
-        "skill_type_lstm_conf": lstm_type_res.get("confidence"),
-        "skills_found": skills_found,
-        "text_snippet": cleaned[:2000]
+        "count": len(jd_store),
+        "job_descriptions": [
+            {"id": e["id"], "title": e["title"], "skills": e["skills"], "created": e["created"]} for e in jd_store.list()
+        ],
     }
 
-@app.post("/batch/analyze")
-async def batch_analyze(files: List[UploadFile] = File(...)):
-    results = []
-    for file in files:
+@app.get("/jobs/descriptions/{jd_id}")
+def get_job_description(jd_id: str):
+    entry = jd_store.get(jd_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown jd_id: {jd_id}")
+    return entry
+
+@app.delete("/jobs/descriptions/{jd_id}")
+def delete_job_description(jd_id: str):
+    if not jd_store.delete(jd_id):
+        raise HTTPException(status_code=404, detail=f"Unknown jd_id: {jd_id}")
+    return {"deleted": jd_id}
+
+# -----------------------------
+# Background jobs
+# -----------------------------
+# Analyses that take longer than an HTTP client will wait (OCR-heavy PDFs,
+# Ollama, large batches). POST /jobs stores the files in job_queue and
+# returns at once; JOB_WORKERS tasks per process run the jobs and
+# GET /jobs/{job_id} reports progress and results.
+JOB_KINDS = ("analyze", "predict", "ollama")
+
+_job_workers: List[asyncio.Task] = []
+_job_wakeup: Optional[asyncio.Event] = None
+_jobs_purged = 0.0
+
+async def in_thread(fn, *args):
+    """Run a blocking call (job_queue or llm_cache SQLite, file moves) off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+async def purge_finished_jobs() -> None:
+    """Drop jobs finished more than JOB_RETENTION_HOURS ago (at most once an hour)."""
+    global _jobs_purged
+    if JOB_RETENTION_HOURS <= 0 or time.time() - _jobs_purged < 3600:
+        return
+    _jobs_purged = time.time()
+    await in_thread(job_queue.purge, JOB_RETENTION_HOURS * 3600)
+
+async def run_job_file(job: Dict[str, Any], file: Dict[str, Any]) -> Dict[str, Any]:
+    """One file of a job, with the same result as the synchronous endpoint for its kind."""
+    if not file["path"] or not os.path.exists(file["path"]):
+        raise HTTPException(status_code=410, detail="Uploaded file is no longer available.")
+    upload = SpooledUpload(file["filename"], path=file["path"], size=file["size"], sha256=file["sha256"])
+    doc = await ProcessedDocument.from_upload(upload)
+    options = job["options"]
+    if job["kind"] == "analyze":
+        return await analyze_uploaded_document(doc, options.get("reuse_duplicates", False))
+    if job["kind"] == "predict":
+        return predict_document(doc, options.get("job_description", ""), options.get("job_skills"), options.get("match_mode"),
+                                options.get("reuse_duplicates", False))
+    return await analyze_document_with_ollama(doc, options.get("job_description", ""), options.get("job_skills"),
+                                              no_cache=options.get("no_cache", False),
+                                              reuse_duplicates=options.get("reuse_duplicates", False))
+
+async def run_job(job: Dict[str, Any]) -> str:
+    """Process a claimed job's unfinished files, JOB_FILE_CONCURRENCY at a time, renewing its lease."""
+    slots = asyncio.Semaphore(max(1, JOB_FILE_CONCURRENCY))
+
+    async def run(file: Dict[str, Any]) -> None:
+        async with slots:
+            try:
+                result, error = await run_job_file(job, file), None
+            except HTTPException as e:
+                result, error = None, str(e.detail)
+            except Exception as e:
+                result, error = None, str(e)
+            await in_thread(job_queue.file_done, job["id"], file["index"], result, error)
+            metrics.JOB_FILES.inc(kind=job["kind"], outcome="error" if error is not None else "ok")
+
+    async def renew_lease() -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            await in_thread(job_queue.renew, job["id"], JOB_LEASE_SECONDS)
+
+    heartbeat = asyncio.ensure_future(renew_lease())
+    try:
+        await asyncio.gather(*[run(file) for file in job["files"]])
+    finally:
+        heartbeat.cancel()
+    return await in_thread(job_queue.finish, job["id"])
+
+async def job_worker(worker: int) -> None:
+    """Claim and run jobs until cancelled; an interrupted job goes back to the queue."""
+    metrics.current_endpoint.set("/jobs")
+    while True:
+        _job_wakeup.clear()
         try:
-            res = await analyze_file(file)  # reuses analyze_file logic
-            results.append(res)
-        except HTTPException as e:
-            results.append({"filename": getattr(file, "filename", None), "error": str(e.detail)})
+            job = await in_thread(job_queue.claim, JOB_LEASE_SECONDS)
         except Exception as e:
-            results.append({"filename": getattr(file, "filename", None), "error": str(e)})
-    return {"results": results}
+            print(f"[job worker {worker}] Could not claim a job: {e}")
+            job = None
+        if job is None:
+            await purge_finished_jobs()
+            try:
+                await asyncio.wait_for(_job_wakeup.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        try:
+            status = await run_job(job)
+        except asyncio.CancelledError:
+            job_queue.release(job["id"])  # on shutdown; one quick UPDATE
+            raise
+        except Exception as e:
+            # Leave it running: the lease runs out and the job is retried (up to JOB_MAX_ATTEMPTS)
+            print(f"[job worker {worker}] Job {job['id']} failed: {e}")
+            continue
+        metrics.JOBS.inc(kind=job["kind"], status=status)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(files: List[UploadFile] = File(...), kind: str = "analyze", job_description: str = "",
+                     jd_id: Optional[str] = None, match_mode: Optional[str] = None,
+                     reuse_duplicates: bool = False, no_cache: bool = False):
+    """
+    Queue one or more files and return the job id immediately.
+    kind picks what runs per file, with that endpoint's options and output:
+    analyze = /analyze/file, predict = /predict (job_description or jd_id,
+    match_mode), ollama = /analyze/resume-ollama (job_description or jd_id,
+    no_cache; no deadline); reuse_duplicates applies to all three.
+    Poll GET /jobs/{id}.
+    """
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind} (expected one of {', '.join(JOB_KINDS)})")
+    if not files:
+        raise HTTPException(status_code=400, detail="No file uploaded.")
+    options: Dict[str, Any] = {"reuse_duplicates": reuse_duplicates}
+    if kind != "analyze":
+        # A registered JD is resolved now, so deleting it later does not break the job
+        text, skills = resolve_job_description(job_description, jd_id)
+        options.update(job_description=text, job_skills=skills, jd_id=jd_id)
+        if kind == "predict":
+            options["match_mode"] = match_mode
+        else:
+            options["no_cache"] = no_cache
 
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await receive_upload(file))
+        job = await in_thread(job_queue.submit, kind, options, uploads)
+    finally:
+        for upload in uploads:
+            upload.close()
+    if _job_wakeup is not None:
+        _job_wakeup.set()
+    return JSONResponse(status_code=202, content=job, headers={"Location": f"/jobs/{job['id']}"})
+
+@app.get("/jobs")
+def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """Most recent jobs first, with progress but without results."""
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+    jobs = job_queue.list(status, max(1, min(limit, 1000)))
+    return {"count": len(jobs), "jobs": jobs}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, progress and per-file results (in upload order) of a job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.delete("/jobs/{job_id}")
+def delete_job(job_id: str):
+    """Drop a queued or finished job with its files and results (409 while it runs)."""
+    if job_queue.delete(job_id):
+        return {"deleted": job_id}
+    if job_queue.get(job_id, results=False) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    raise HTTPException(status_code=409, detail=f"Job {job_id} is running.")
+
+# -----------------------------
+# Candidate ranking
+# -----------------------------
+@app.post("/rank")
+def rank_candidates(req: RankRequest):
+    """
+    Rank every indexed resume against a JD (text or jd_id) by the same
+    match score /predict reports, and return the top_k.
+    """
+    if candidate_index is None:
+        raise HTTPException(status_code=503, detail="Candidate index is disabled; set CANDIDATE_INDEX=true.")
+    job_description, job_skills = resolve_job_description(req.job_description or "", req.jd_id)
+    if job_skills is None:
+        job_skills = extract_skills_from_text(job_description) if job_description else []
+    start = time.perf_counter()
+    ranked = candidate_index.rank(job_skills, req.top_k)
+    return {
+        "job_skills": job_skills,
+        "total_candidates": ranked["total"],
+        "top_k": req.top_k,
+        "took_ms": round((time.perf_counter() - start) * 1000, 3),
+        "results": ranked["results"],
+    }
+
+@app.post("/search")
+def search_candidates(req: SearchRequest):
+    """
+    Semantic search over indexed resumes: embed the query (free text, or a
+    registered JD via jd_id) and return the top_k resumes by cosine similarity.
+    """
+    if not EMBEDDING_INDEX_ENABLED:
+        raise HTTPException(status_code=503, detail="Embedding index is disabled; set EMBEDDING_INDEX=true.")
+    embedding_index = get_embedding_index()
+    if embedding_index is None:
+        raise HTTPException(status_code=503, detail="Word2Vec model not available.")
+    query, _ = resolve_job_description(req.query or "", req.jd_id)
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Provide a query or a jd_id.")
+    query_vector = ProcessedDocument(query).embedding
+    if query_vector is None:
+        raise HTTPException(status_code=400, detail="None of the query words are in the Word2Vec vocabulary.")
+    start = time.perf_counter()
+    found = embedding_index.search(query_vector, req.top_k)
+    return {
+        "total_candidates": found["total"],
+        "top_k": req.top_k,
+        "took_ms": round((time.perf_counter() - start) * 1000, 3),
+        "results": found["results"],
+    }
+
+@app.get("/candidates/{candidate_id}")
+def get_candidate(candidate_id: str):
+    entry = candidate_index.get(candidate_id) if candidate_index is not None else None
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown candidate_id: {candidate_id}")
+    return entry
 
 @app.post("/predict")
-async def predict(file: UploadFile = File(...), job_description: str = ""):
+async def predict(file: UploadFile = File(...), job_description: str = "", jd_id: Optional[str] = None,
+                  match_mode: Optional[str] = None, reuse_duplicates: bool = False):
     """
     Analyze resume and match it against job description.
     Returns complete skill analysis with detailed breakdown.
+    jd_id (from POST /jobs/descriptions) can be used instead of job_description.
+    match_mode=soft gives partial credit for near-miss skills (default SKILL_MATCH_MODE).
+    With NEAR_DUPLICATES=true and reuse_duplicates=true, a near-copy of a resume
+    already matched against the same JD and mode gets that earlier answer.
     """
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded.")
     
-    content = await file.read()
-    filename = file.filename or ""
-
-    # Determine type by extension
-    ext = (filename.split(".")[-1] if "." in filename else "").lower()
-    raw_text = ""
-
-    if ext in ["pdf"]:
-        raw_text = extract_text_from_pdf_bytes(content)
-    elif ext in ["docx"]:
-        raw_text = extract_text_from_docx_bytes(content)
-    elif ext in ["txt"]:
-        try:
-            raw_text = content.decode("utf-8", errors="ignore")
-        except Exception:
-            raw_text = ""
-    else:
-        # try pdfplumber first
-        raw_text = extract_text_from_pdf_bytes(content)
-        if not raw_text:
-            # try docx
-            raw_text = extract_text_from_docx_bytes(content)
-
-    if not raw_text:
+    job_description, job_skills = resolve_job_description(job_description, jd_id)
+    doc = await ProcessedDocument.from_file(file)
+    return predict_document(doc, job_description, job_skills, match_mode, reuse_duplicates)
+
+def predict_document(doc: ProcessedDocument, job_description: str = "", job_skills: Optional[List[str]] = None,
+                     match_mode: Optional[str] = None, reuse_duplicates: bool = False) -> Dict[str, Any]:
+    """/predict for a document whose text has been extracted (also run by kind=predict jobs)."""
+    if not doc.raw_text:
         raise HTTPException(status_code=400, detail="Could not extract text from file.")
 
-    # Clean text
-    cleaned_text = clean_text(raw_text)
+    duplicate = check_duplicate(doc)
+    key = result_key("predict", job_description, job_skills, match_mode or SKILL_MATCH_MODE)
+    previous = stored_analysis(doc, duplicate, key) if reuse_duplicates else None
+    if previous is not None:
+        return {"filename": doc.filename, "candidate_id": reused_candidate_id(duplicate), "duplicate_of": duplicate, **previous}
     
     # Use ML fallback analysis (accurate skill extraction and matching)
-    result = generate_ml_fallback_analysis(cleaned_text, job_description)
+    result = generate_ml_fallback_analysis(doc.cleaned, job_description, job_skills, match_mode, resume_skills=doc.skills)
     
     # Extract analysis data
     analysis = result.get("analysis", {})
     
     # Format response with all required fields compatible with frontend
-    return {
-        "filename": filename,
-        "resume_text": cleaned_text[:1000],
+    response = {
+        "resume_text": doc.cleaned[:1000],
         "engine": "ML Fallback",
         "model": "skill-matcher-v2",
         "job_match_score": analysis.get("skill_match_score", 0),
@@ -685,6 +1853,7 @@ async def predict(file: UploadFile = File(...), job_description: str = ""):
             "resume_skills_detected": analysis.get("resume_skills_detected", []),
             "required_skills_from_job": analysis.get("required_skills_from_job", []),
             "matching_skills": analysis.get("matching_skills", []),
+            "near_matches": analysis.get("near_matches", []),
             "missing_skills": analysis.get("missing_skills", []),
             "experience_alignment": analysis.get("experience_alignment", ""),
             "experience_level": analysis.get("experience_level", ""),
@@ -692,22 +1861,70 @@ async def predict(file: UploadFile = File(...), job_description: str = ""):
             "calculation_audit": analysis.get("calculation_audit", {})
         }
     }
+    remember_analysis(doc, response, key)
+    return {"filename": doc.filename, "candidate_id": index_candidate(doc), "duplicate_of": duplicate, **response}
 
 
 # ==============================
 # OLLAMA INTEGRATION
 # ==============================
 
-def call_ollama(resume_text: str, job_description: str = "") -> Dict[str, Any]:
+ollama_client = OllamaClient(OLLAMA_URL, OLLAMA_MODEL, OLLAMA_TIMEOUT, OLLAMA_CONCURRENCY)
+
+def first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the first complete, parseable JSON object in text, or None if
+    there is none yet (e.g. the object is still being streamed).
+    """
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        obj = json.loads(text[start:i + 1])
+                        if isinstance(obj, dict):
+                            return obj
+                    except ValueError:
+                        pass
+                    break
+        else:
+            return None  # unbalanced: still incomplete
+        start = text.find("{", start + 1)
+    return None
+
+@timed_stage("call_ollama")
+async def call_ollama(resume_text: str, job_description: str = "", stream: bool = OLLAMA_STREAM,
+                      use_cache: bool = True) -> Dict[str, Any]:
     """
     Call Ollama LLM for intelligent resume analysis.
     Falls back gracefully if Ollama is not available.
+    With stream=True the response is read incrementally and the call ends
+    as soon as a complete JSON object has arrived. Parsed answers are cached;
+    use_cache=False skips the lookup but still stores the fresh answer.
     """
+    key = llm_cache.make_key("ollama", OLLAMA_MODEL, OLLAMA_OPTIONS, OLLAMA_PROMPT_VERSION, resume_text, job_description)
+    if use_cache:
+        cached = await in_thread(llm_cache.get, key)  # SQLite when LLM_CACHE_DB is set
+        if cached is not None:
+            return {"success": True, "analysis": cached, "cached": True}
+
     try:
-        OLLAMA_API_URL = "http://localhost:11434/api/generate"
-        OLLAMA_MODEL = "tinyllama"  # Lightweight model (637MB) - works with limited RAM. Alternatives: orca-mini, neural-chat
-        OLLAMA_TIMEOUT = 120  # Reduced timeout to 2 minutes - tinyllama is too slow
-        
         print(f"[Ollama] Calling {OLLAMA_MODEL} with {OLLAMA_TIMEOUT}s timeout...")
         
         # Create intelligent prompt - simplified for better JSON parsing
@@ -728,25 +1945,12 @@ RESUME: {resume_text[:600]}
 Return ONLY a valid JSON object:
 {{"skill_match_score": 0, "project_skills_implemented": ["skill1", "skill2"], "future_skills_required": [], "experience_level": "Mid-level", "summary": "Analysis"}}"""
         
-        # Call Ollama with shorter timeout
-        response = requests.post(
-            OLLAMA_API_URL,
-            json={
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "temperature": 0.1,
-                "top_k": 40,
-                "top_p": 0.9
-            },
-            timeout=OLLAMA_TIMEOUT
+        # Waits for a free slot (OLLAMA_CONCURRENCY) without blocking the event loop
+        data = await ollama_client.generate(
+            prompt,
+            options=OLLAMA_OPTIONS,
+            until=first_json_object if stream else None,
         )
-        
-        if response.status_code != 200:
-            return {"error": f"Ollama error: {response.status_code}"}
-        
-        # Parse response
-        data = response.json()
         response_text = data.get("response", "").strip()
         
         print(f"[Ollama] Response received: {response_text[:100]}")
@@ -756,17 +1960,21 @@ Return ONLY a valid JSON object:
             # First, try direct JSON parsing
             try:
                 result = json.loads(response_text)
-                return {"success": True, "analysis": result}
             except json.JSONDecodeError:
-                pass
+                result = None
             
             # Second, try to find JSON object in response
             start_idx = response_text.find('{')
             end_idx = response_text.rfind('}')
             
-            if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
+            if not isinstance(result, dict) and start_idx != -1 and end_idx != -1 and end_idx > start_idx:
                 json_str = response_text[start_idx:end_idx+1]
                 result = json.loads(json_str)
+            
+            if isinstance(result, dict):
+                # Incomplete answers are returned but not cached, so the next request asks again
+                if all(field in result for field in OLLAMA_ANSWER_FIELDS):
+                    await in_thread(llm_cache.put, key, result)
                 return {"success": True, "analysis": result}
             
         except Exception as parse_error:
@@ -775,10 +1983,12 @@ Return ONLY a valid JSON object:
         
         return {"error": f"Could not parse Ollama response"}
         
-    except requests.exceptions.Timeout:
-        print(f"[Ollama] Timeout after {OLLAMA_TIMEOUT}s - Ollama is too slow")
+    except OllamaError as e:
+        return {"error": f"Ollama error: {e.status_code}"}
+    except httpx.TimeoutException:
+        print(f"[Ollama] Timeout after {OLLAMA_TIMEOUT:g}s - Ollama is too slow")
         return {"error": f"Ollama timeout - model is processing too slowly"}
-    except requests.exceptions.ConnectionError:
+    except httpx.TransportError:
         print(f"[Ollama] Connection error - Ollama not running")
         return {"error": "Ollama not running. Start with: ollama serve"}
     except Exception as e:
@@ -787,18 +1997,31 @@ Return ONLY a valid JSON object:
 
 
 
-def generate_ml_fallback_analysis(resume_text: str, job_description: str = "") -> Dict[str, Any]:
+@timed_stage("ml_fallback_analysis")
+def generate_ml_fallback_analysis(resume_text: str, job_description: str = "",
+                                  job_skills: Optional[List[str]] = None,
+                                  match_mode: Optional[str] = None,
+                                  resume_skills: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Fast fallback analysis using regex and keyword matching if Ollama fails.
     More accurate skill matching and scoring.
+    Pass job_skills (e.g. from a registered JD) and resume_skills (e.g. from a
+    ProcessedDocument) to skip extracting them again.
+    match_mode="soft" (default SKILL_MATCH_MODE) also credits each missing
+    required skill with its similarity to the closest resume skill.
     """
     try:
         # Extract skills from both texts
-        resume_skills = extract_skills_from_text(resume_text)
-        job_skills = extract_skills_from_text(job_description) if job_description else []
+        if resume_skills is None:
+            resume_skills = extract_skills_from_text(resume_text)
+        if job_skills is None:
+            job_skills = extract_skills_from_text(job_description) if job_description else []
         
         # Initialize matched_skills to empty list
         matched_skills = []
+        near_matches = []
+        soft = (match_mode or SKILL_MATCH_MODE) == "soft"
+        similarity = get_model("skill_similarity") if soft else None
         
         # Calculate match score more accurately
         if job_skills:
@@ -806,9 +2029,16 @@ def generate_ml_fallback_analysis(resume_text: str, job_description: str = "") -
             matched_skills = [s for s in job_skills if s in resume_skills]
             matched_count = len(matched_skills)
             total_required = len(job_skills)
+            credit = float(matched_count)
+            
+            if similarity is not None:
+                for required, (closest, score) in zip(job_skills, similarity.best_matches(job_skills, resume_skills)):
+                    if closest is not None and closest != required and score >= SOFT_MATCH_THRESHOLD:
+                        near_matches.append({"required": required, "matched_with": closest, "similarity": round(score, 3)})
+                        credit += round(score, 3)
             
             # Score is percentage of required skills that candidate has
-            match_score = int((matched_count / total_required) * 100) if total_required > 0 else 0
+            match_score = int((credit / total_required) * 100) if total_required > 0 else 0
         else:
             # No job description provided - use resume skills count as baseline
             # Max 70% without specific job match
@@ -869,6 +2099,16 @@ def generate_ml_fallback_analysis(resume_text: str, job_description: str = "") -
                 "authorization": "Based on industry-standard skill definitions"
             }
         }
+        if similarity is not None:
+            near_credit = round(sum(m["similarity"] for m in near_matches), 3)
+            calculation_audit["algorithm"] = "Soft Skill Matching (exact matches + Word2Vec near matches)"
+            calculation_audit["formula"] = "((Matching Required Skills + Near-Match Similarity) / Total Required Skills) × 100"
+            calculation_audit["near_matches"] = near_matches
+            calculation_audit["calculation"]["near_match_credit"] = near_credit
+            calculation_audit["calculation"]["near_match_threshold"] = SOFT_MATCH_THRESHOLD
+            if job_skills:
+                calculation_audit["calculation"]["formula_applied"] = f"(({len(matched_skills)} + {near_credit}) ÷ {len(job_skills)}) × 100"
+            calculation_audit["trustworthiness"]["method"] = "EXACT MATCHING plus precomputed Word2Vec skill similarity"
         
         return {
             "success": True,
@@ -877,6 +2117,7 @@ def generate_ml_fallback_analysis(resume_text: str, job_description: str = "") -
                 "resume_skills_detected": resume_skills,  # ALL skills found in resume
                 "job_skills_required": job_skills,  # ALL required skills from job
                 "matching_skills": matched_skills,  # Skills that match between resume and job
+                "near_matches": near_matches,  # Missing skills credited via a similar resume skill (soft mode)
                 "missing_skills": future_skills,  # Skills needed but not in resume
                 "project_skills_implemented": project_skills,
                 "future_skills_required": future_skills,
@@ -892,68 +2133,101 @@ def generate_ml_fallback_analysis(resume_text: str, job_description: str = "") -
         return {"error": f"Fallback analysis failed: {str(e)}"}
 
 
+# Ollama calls left running after their deadline (referenced so they are not garbage collected)
+_late_ollama_calls = set()
+
+async def _tracked_call_ollama(cleaned_text: str, job_description: str, use_cache: bool = True) -> Dict[str, Any]:
+    with metrics.WORK_IN_FLIGHT.track(kind="ollama"):
+        return await call_ollama(cleaned_text, job_description, use_cache=use_cache)
+
 @app.post("/analyze/resume-ollama")
 async def analyze_resume_with_ollama(
     file: UploadFile = File(...),
-    job_description: str = ""
+    job_description: str = "",
+    deadline_ms: Optional[int] = None,
+    no_cache: bool = False,
+    jd_id: Optional[str] = None,
+    reuse_duplicates: bool = False
 ):
     """
     Upload resume and optionally job description.
     Extracts text and analyzes with Ollama LLM.
+    deadline_ms (default OLLAMA_DEADLINE_MS, 0 = none) caps how long to wait
+    for Ollama; past it the ML fallback, computed up front, is returned.
+    no_cache=true ignores any cached Ollama answer for this resume/JD.
+    jd_id (from POST /jobs/descriptions) can be used instead of job_description.
+    With NEAR_DUPLICATES=true and reuse_duplicates=true, a near-copy of a resume
+    Ollama already analyzed against the same JD gets that answer without a call.
     """
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded.")
-    
-    content = await file.read()
-    filename = file.filename or ""
+    job_description, job_skills = resolve_job_description(job_description, jd_id)
     
     # Extract text from file
-    ext = (filename.split(".")[-1] if "." in filename else "").lower()
-    raw_text = ""
-    
-    if ext == "pdf":
-        raw_text = extract_text_from_pdf_bytes(content)
-    elif ext == "docx":
-        raw_text = extract_text_from_docx_bytes(content)
-    elif ext == "txt":
-        try:
-            raw_text = content.decode("utf-8", errors="ignore")
-        except:
-            raw_text = ""
-    else:
-        # Try all methods
-        raw_text = extract_text_from_pdf_bytes(content)
-        if not raw_text:
-            raw_text = extract_text_from_docx_bytes(content)
-    
-    if not raw_text:
+    doc = await ProcessedDocument.from_file(file)
+    deadline = OLLAMA_DEADLINE_MS if deadline_ms is None else deadline_ms
+    return await analyze_document_with_ollama(doc, job_description, job_skills, deadline, no_cache, reuse_duplicates)
+
+async def analyze_document_with_ollama(doc: ProcessedDocument, job_description: str = "",
+                                       job_skills: Optional[List[str]] = None, deadline: int = 0,
+                                       no_cache: bool = False, reuse_duplicates: bool = False) -> Dict[str, Any]:
+    """/analyze/resume-ollama for an extracted document (also run by kind=ollama jobs, without a deadline)."""
+    filename = doc.filename
+    if not doc.raw_text:
         raise HTTPException(status_code=400, detail="Could not extract text from resume file.")
+    cleaned_text = doc.cleaned
+
+    # Only Ollama answers are kept for near-duplicates, never the fallback; no_cache asks for a fresh one
+    duplicate = check_duplicate(doc)
+    key = result_key("ollama", OLLAMA_MODEL, OLLAMA_PROMPT_VERSION, job_description)
+    previous = stored_analysis(doc, duplicate, key) if reuse_duplicates and not no_cache else None
+    if previous is not None:
+        return {"filename": filename, "candidate_id": reused_candidate_id(duplicate), "duplicate_of": duplicate, **previous}
     
-    # Clean text
-    cleaned_text = clean_text(raw_text)
-    
-    # Call Ollama with 2-minute timeout
+    # The fallback takes microseconds, so it is ready before Ollama is even asked
+    fallback = generate_ml_fallback_analysis(cleaned_text, job_description, job_skills, resume_skills=doc.skills)
+    fallback_reason = None
+
+    # Cache hits return immediately, well inside any deadline
     print(f"[/analyze/resume-ollama] Starting Ollama analysis for {filename}")
-    result = call_ollama(cleaned_text, job_description)
+    task = asyncio.ensure_future(_tracked_call_ollama(cleaned_text, job_description, use_cache=not no_cache))
+    if deadline and deadline > 0:
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), deadline / 1000.0)
+        except asyncio.TimeoutError:
+            result = {"error": f"No Ollama answer within {deadline} ms"}
+            fallback_reason = "deadline"
+            if OLLAMA_LATE_RESULTS == "cancel":
+                task.cancel()
+            else:
+                # call_ollama caches the answer when it arrives
+                _late_ollama_calls.add(task)
+                task.add_done_callback(_late_ollama_calls.discard)
+    else:
+        result = await task
     print(f"[/analyze/resume-ollama] Ollama result: {result}")
     
-    # If Ollama failed, use fast ML fallback instead
+    # If Ollama failed or missed the deadline, use the ML fallback instead
     if "error" in result:
-        print(f"[/analyze/resume-ollama] Ollama failed, using ML fallback")
-        result = generate_ml_fallback_analysis(cleaned_text, job_description)
+        fallback_reason = fallback_reason or "ollama_error"
+        print(f"[/analyze/resume-ollama] Ollama failed ({fallback_reason}), using ML fallback")
+        metrics.OLLAMA_FALLBACKS.inc(endpoint=metrics.current_endpoint.get(), reason=fallback_reason)
+        result = fallback
         engine = "Fallback ML"
     else:
         engine = "Ollama LLM"
     
     # Extract analysis data
     analysis = result.get("analysis", {})
+    resume_skills = fallback.get("analysis", {}).get("resume_skills_detected", [])
     
     # Format response with all required fields
-    return {
-        "filename": filename,
+    response = {
         "resume_text": cleaned_text[:1000],
         "engine": engine,
-        "model": "tinyllama" if engine == "Ollama LLM" else "ml-fallback",
+        "model": OLLAMA_MODEL if engine == "Ollama LLM" else "ml-fallback",
+        "fallback_reason": fallback_reason,
+        "cached": bool(result.get("cached")),
         "job_match_score": analysis.get("skill_match_score", 0),
         "matched_skills_count": len(analysis.get("project_skills_implemented", [])),
         "total_skills": len(analysis.get("project_skills_implemented", [])) + len(analysis.get("future_skills_required", [])),
@@ -966,6 +2240,9 @@ async def analyze_resume_with_ollama(
             "summary": analysis.get("summary", "")
         }
     }
+    if engine == "Ollama LLM":
+        remember_analysis(doc, response, key)
+    return {"filename": filename, "candidate_id": index_candidate(doc), "duplicate_of": duplicate, **response}
 
 
 
@@ -999,25 +2276,23 @@ async def check_ollama_status():
     Check if Ollama is running and list available models.
     """
     try:
-        import requests
-        
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            models = [m.get("name", "") for m in data.get("models", [])]
-            return {
-                "status": "connected",
-                "available": True,
-                "models": models,
-                "message": "Ollama is running and ready!"
-            }
-        else:
-            return {
-                "status": "error",
-                "available": False,
-                "message": f"Ollama returned status {response.status_code}"
-            }
-    except:
+        data = await ollama_client.tags(timeout=5)
+        models = [m.get("name", "") for m in data.get("models", [])]
+        return {
+            "status": "connected",
+            "available": True,
+            "models": models,
+            "configured_model": OLLAMA_MODEL,
+            "client": ollama_client.stats(),
+            "message": "Ollama is running and ready!"
+        }
+    except OllamaError as e:
+        return {
+            "status": "error",
+            "available": False,
+            "message": f"Ollama returned status {e.status_code}"
+        }
+    except Exception:
         return {
             "status": "disconnected",
             "available": False,
@@ -0,0 +1,95 @@
+# ml_api/batcher.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a model's forward pass.
+
+    Concurrent callers submit one input row each. Rows are collected until
+    max_batch rows are waiting or max_wait_ms has passed since the first one,
+    then stacked and run through predict_fn in a single call. Each caller
+    gets back its own output row. Forward passes run one at a time on a
+    dedicated thread, so requests that arrive during a pass form the next batch.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], Any], max_batch: int = 32, max_wait_ms: float = 5.0, name: str = ""):
+        self.predict_fn = predict_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"batcher-{name}")
+        self._lock = threading.Lock()
+        self._histogram: Dict[int, int] = {}
+        self._rows = 0
+        self._batches = 0
+
+    async def submit(self, row: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            loop.create_task(self._run(loop, batch))
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        rows = np.stack([row for row, _ in batch])
+        try:
+            outputs = await loop.run_in_executor(self._executor, self.predict_fn, rows)
+            outputs = np.asarray(outputs)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._record(len(batch))
+
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(outputs[i])
+
+    async def predict_many(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Run an already-assembled batch (e.g. a whole /batch/analyze upload) in
+        one forward pass, serialized with the micro-batches on the same thread.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return np.asarray(await loop.run_in_executor(self._executor, self.predict_fn, rows))
+        finally:
+            self._record(len(rows))
+
+    def _record(self, size: int) -> None:
+        with self._lock:
+            self._histogram[size] = self._histogram.get(size, 0) + 1
+            self._rows += size
+            self._batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "rows": self._rows,
+                "mean_batch_size": (self._rows / self._batches) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._histogram.items())),
+            }
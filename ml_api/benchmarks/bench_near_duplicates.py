@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for NearDuplicateIndex (near-duplicate resume lookup).
+
+Fills an index with random MinHash signatures (unrelated documents), adds
+synthetic resumes from corpus.py, then times lookups of lightly edited
+copies of those resumes and of unrelated texts. Also reports how often an
+edited copy is found, per fraction of words replaced.
+
+Run from ml_api/:  python benchmarks/bench_near_duplicates.py [--signatures 1000000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import resume_lines
+from near_duplicates import NearDuplicateIndex
+
+
+def tokens(lines):
+    return re.findall(r"[a-z]+", " ".join(lines).lower())
+
+
+def edited(words, fraction, rng):
+    words = list(words)
+    for _ in range(int(len(words) * fraction)):
+        words[rng.randrange(len(words))] = rng.choice(["senior", "lead", "remote", "contract", "team"])
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signatures", type=int, default=1_000_000)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    index = NearDuplicateIndex()
+
+    start = time.perf_counter()
+    block = 10_000
+    for offset in range(0, args.signatures, block):
+        signatures = np_rng.integers(0, 2 ** 32, size=(min(block, args.signatures - offset), index.num_perm), dtype=np.uint32)
+        for i, signature in enumerate(signatures):
+            index.add(f"random_{offset + i}", signature)
+    print(f"added {len(index)} random signatures in {time.perf_counter() - start:.1f}s")
+
+    resumes = [tokens(resume_lines(random.Random(1000 + i), 8)) for i in range(args.resumes)]
+    start = time.perf_counter()
+    signatures = [index.signature(words) for words in resumes]
+    print(f"{(time.perf_counter() - start) / len(resumes) * 1000:.3f} ms / signature ({np.mean([len(w) for w in resumes]):.0f} words)")
+    for i, signature in enumerate(signatures):
+        index.add(f"resume_{i}", signature)
+    print(index.stats())
+
+    print(f"\n{'words replaced':>14} {'found':>7} {'ms / lookup':>12}")
+    for fraction in (0.0, 0.02, 0.05, 0.1):
+        queries = [index.signature(edited(words, fraction, rng)) for words in resumes]
+        start = time.perf_counter()
+        found = [index.find(q) for q in queries]
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        hits = sum(1 for i, f in enumerate(found) if f and f["id"] == f"resume_{i}")
+        print(f"{fraction:>14.0%} {hits / len(queries):>7.1%} {elapsed:>12.3f}")
+
+    unrelated = [index.signature(tokens(resume_lines(random.Random(5000 + i), 8))) for i in range(len(resumes))]
+    start = time.perf_counter()
+    false_hits = sum(1 for q in unrelated if index.find(q))
+    elapsed = (time.perf_counter() - start) / len(unrelated) * 1000
+    print(f"{'unrelated':>14} {false_hits / len(unrelated):>7.1%} {elapsed:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
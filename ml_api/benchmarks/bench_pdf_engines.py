@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Pages per second of each PDF text engine (PDF_ENGINE in extraction.py).
+
+Builds text-layer PDFs from the synthetic corpus (see corpus.py) and runs
+extract_text_from_pdf_bytes with every installed engine, without page or
+character caps. A last run on a --long-pages document shows what
+PDF_MAX_PAGES / PDF_MAX_CHARS would save on an oversized upload.
+
+Run from ml_api/:  python benchmarks/bench_pdf_engines.py [--repeat 5] [--long-pages 400]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SIZES, resume_lines, to_pdf
+from extraction import PDF_MAX_CHARS, PDF_MAX_PAGES, available_pdf_engines, extract_text_from_pdf_bytes
+
+# Caps for the oversized run when PDF_MAX_PAGES / PDF_MAX_CHARS are off (the default)
+MAX_PAGES = PDF_MAX_PAGES or 50
+MAX_CHARS = PDF_MAX_CHARS or 100000
+
+
+def time_engine(content: bytes, engine: str, repeat: int, max_pages: int = 0, max_chars: int = 0):
+    """Best-of-repeat seconds, pages read and characters returned."""
+    best = float("inf")
+    for _ in range(repeat):
+        timings = {}
+        start = time.perf_counter()
+        text = extract_text_from_pdf_bytes(content, timings, engine=engine, max_pages=max_pages, max_chars=max_chars)
+        best = min(best, time.perf_counter() - start)
+    return best, timings.get("pdf_pages", 0), len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--long-pages", type=int, default=400, help="pages in the oversized document (0 = skip)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engines = available_pdf_engines()
+    rng = random.Random(args.seed)
+    docs = [(size, to_pdf(resume_lines(rng, entries))) for size, entries in SIZES.items()]
+
+    print(f"{'document':<10} {'engine':<11} {'pages':>5} {'chars':>7} {'ms':>9} {'pages/s':>9}")
+    for size, content in docs:
+        for engine in engines:
+            seconds, pages, chars = time_engine(content, engine, args.repeat)
+            print(f"{size:<10} {engine:<11} {pages:>5} {chars:>7} {seconds * 1000:>9.1f} {pages / seconds:>9.1f}")
+
+    if args.long_pages:
+        entries = SIZES["large"] * max(1, args.long_pages // 6)  # "large" fills about 6 pages
+        content = to_pdf(resume_lines(rng, entries))
+        print(f"\noversized document, caps PDF_MAX_PAGES={MAX_PAGES} PDF_MAX_CHARS={MAX_CHARS}")
+        for engine in engines:
+            for label, max_pages, max_chars in (("uncapped", 0, 0), ("capped", MAX_PAGES, MAX_CHARS)):
+                seconds, pages, chars = time_engine(content, engine, 1, max_pages, max_chars)
+                print(f"{label:<10} {engine:<11} {pages:>5} {chars:>7} {seconds * 1000:>9.1f} {pages / seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark on a deterministic synthetic corpus.
+
+Generates resumes and job descriptions as TXT, DOCX, text-layer PDF and
+image-only PDF in several sizes (see corpus.py). Each pipeline stage from
+app.py is timed in-process: extraction, clean_text, skill extraction,
+TF-IDF + sklearn, LSTM and the fallback scoring. No server, cache or
+worker pool is involved. Results are written as JSON. Pass --baseline to
+compare against an earlier run; the script exits 1 if any stage's median
+got slower by more than --threshold.
+
+Run from ml_api/:
+    python benchmarks/bench_pipeline.py --output benchmarks/results/baseline.json
+    python benchmarks/bench_pipeline.py --baseline benchmarks/results/baseline.json
+    python benchmarks/bench_pipeline.py --formats txt pdf --sizes small --repeat 3
+    python benchmarks/bench_pipeline.py --write-corpus /tmp/corpus   # dump the files too
+
+Stages whose models are missing from MODEL_DIR are reported as skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import FORMATS, SIZES, build_corpus
+
+RESULT_VERSION = 1
+
+
+def time_stage(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run fn once untimed, then `repeat` timed runs; return millisecond stats."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": samples[0],
+        "p95_ms": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "runs": repeat,
+    }
+
+
+def extractor_for(fmt: str):
+    from extraction import extract_text_from_docx_bytes, extract_text_from_pdf_bytes
+
+    if fmt == "txt":
+        return lambda content: content.decode("utf-8", errors="ignore")
+    if fmt == "docx":
+        return extract_text_from_docx_bytes
+    return extract_text_from_pdf_bytes
+
+
+def bench_document(app, doc: Dict, repeat: int) -> Dict[str, Dict]:
+    stages: Dict[str, Dict] = {}
+    extract = extractor_for(doc["format"])
+    content = doc["content"]
+    stages["extract"] = time_stage(lambda: extract(content), repeat)
+    raw_text = extract(content)
+    if not raw_text.strip():
+        # e.g. an image-only PDF without tesseract/poppler: nothing left to time
+        stages["extract"]["empty_text"] = True
+        return stages
+
+    cleaned = app.clean_text(raw_text)
+    stages["clean_text"] = time_stage(lambda: app.clean_text(raw_text), repeat)
+    stages["extract_skills"] = time_stage(lambda: app.extract_skills_from_text(cleaned), repeat)
+    skills_text = " ".join(app.extract_skills_from_text(cleaned)) or cleaned
+
+    tfidf = app.get_model("tfidf")
+    if tfidf is not None:
+        stages["tfidf_transform"] = time_stage(lambda: tfidf.transform([skills_text]), repeat)
+        vec = tfidf.transform([skills_text])
+        clf_cat, clf_type = app.get_model("clf_cat"), app.get_model("clf_type")
+        if clf_cat is not None or clf_type is not None:
+            stages["sklearn_predict"] = time_stage(
+                lambda: (app.sklearn_predict_with_confidence(clf_cat, vec), app.sklearn_predict_with_confidence(clf_type, vec)),
+                repeat,
+            )
+
+    tokenizer, max_len = app.get_model("tokenizer"), app.get_model("max_len")
+    lstm_cat, lstm_type = app.get_model("lstm_cat"), app.get_model("lstm_type")
+    if tokenizer is not None and (lstm_cat is not None or lstm_type is not None):
+        stages["lstm_predict"] = time_stage(
+            lambda: (
+                app.lstm_predict_with_confidence(lstm_cat, tokenizer, cleaned, max_len),
+                app.lstm_predict_with_confidence(lstm_type, tokenizer, cleaned, max_len),
+            ),
+            repeat,
+        )
+
+    jd = doc["job_description"]
+    stages["fallback_scoring"] = time_stage(lambda: app.generate_ml_fallback_analysis(cleaned, jd), repeat)
+
+    # Everything an endpoint derives from one resume, built separately from
+    # the text (as before ProcessedDocument) and then from one shared token pass
+    def separate():
+        text = app.clean_text(raw_text)
+        skills = app.extract_skills_from_text(text)
+        if tfidf is not None:
+            tfidf.transform([" ".join(skills) or text[:1000]])
+        if tokenizer is not None:
+            tokenizer.texts_to_sequences([text])
+        app.generate_ml_fallback_analysis(text, jd)
+
+    def shared():
+        processed = app.ProcessedDocument(raw_text)
+        processed.tfidf_row, processed.padded_sequence
+        app.generate_ml_fallback_analysis(processed.cleaned, jd, resume_skills=processed.skills)
+
+    stages["document_separate"] = time_stage(separate, repeat)
+    stages["document_shared"] = time_stage(shared, repeat)
+    return stages
+
+
+def run(formats: List[str], sizes: List[str], repeat: int, seed: int, corpus_dir: Optional[str] = None) -> Dict:
+    import app
+
+    load_seconds = {}
+    for name in ("tfidf", "clf_cat", "clf_type", "lstm_cat", "lstm_type", "tokenizer", "max_len", "stopwords"):
+        start = time.perf_counter()
+        app.get_model(name)
+        load_seconds[name] = round(time.perf_counter() - start, 4)
+
+    docs = build_corpus(seed, formats, sizes)
+    if corpus_dir:
+        os.makedirs(corpus_dir, exist_ok=True)
+        for doc in docs:
+            with open(os.path.join(corpus_dir, doc["filename"]), "wb") as f:
+                f.write(doc["content"])
+
+    results = {}
+    for doc in docs:
+        stages = bench_document(app, doc, repeat)
+        results[doc["id"]] = {"format": doc["format"], "size": doc["size"], "bytes": len(doc["content"]), "stages": stages}
+        summary = "  ".join(f"{name}={s['median_ms']:.2f}ms" for name, s in stages.items())
+        print(f"{doc['id']:<20} {summary}")
+
+    import extraction
+
+    return {
+        "version": RESULT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ocr_available": extraction.OCR_AVAILABLE,
+            "lstm_engine": app.LSTM_ENGINE,
+        },
+        "config": {"seed": seed, "repeat": repeat, "formats": formats, "sizes": sizes},
+        "model_load_seconds": load_seconds,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Return one line per regression: a stage whose median grew by more than
+    `threshold` (fraction) and by more than `min_delta_ms` in absolute terms,
+    so sub-millisecond noise does not fail the gate.
+    """
+    regressions = []
+    print(f"\n{'case':<20} {'stage':<18} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for case, entry in current["results"].items():
+        base_entry = baseline.get("results", {}).get(case)
+        if not base_entry:
+            continue
+        for stage, stats in entry["stages"].items():
+            base_stats = base_entry["stages"].get(stage)
+            if not base_stats:
+                continue
+            base_ms, cur_ms = base_stats["median_ms"], stats["median_ms"]
+            change = (cur_ms - base_ms) / base_ms if base_ms > 0 else 0.0
+            regressed = change > threshold and (cur_ms - base_ms) > min_delta_ms
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{case:<20} {stage:<18} {base_ms:>12.3f} {cur_ms:>12.3f} {change:>+7.1%}{flag}")
+            if regressed:
+                regressions.append(f"{case}/{stage}: {base_ms:.3f}ms -> {cur_ms:.3f}ms ({change:+.1%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (default 5)")
+    parser.add_argument("--seed", type=int, default=42, help="corpus seed (default 42)")
+    parser.add_argument("--output", default="benchmarks/results/latest.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed median slowdown as a fraction (default 0.20)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this (default 0.5)")
+    parser.add_argument("--write-corpus", metavar="DIR", help="also write the generated files to DIR")
+    args = parser.parse_args()
+
+    current = run(args.formats, args.sizes, max(1, args.repeat), args.seed, args.write_corpus)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config", {}).get("seed") != args.seed:
+        print("[warn] baseline was generated with a different seed; cases are not comparable")
+    regressions = compare(current, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions above {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark for CandidateIndex.rank (POST /rank).
+
+Fills an in-memory index with random skill sets and times ranking against
+JDs with few and many required skills. Rare-skill JDs take the posting-list
+path and common ones the bitset popcount path.
+
+Run from ml_api/:  python benchmarks/bench_rank.py [--candidates 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import SKILL_PATTERNS
+from candidate_index import CandidateIndex
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=1_000_000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vocabulary = list(SKILL_PATTERNS)
+    rng = random.Random(args.seed)
+    index = CandidateIndex(vocabulary, initial_capacity=args.candidates)
+
+    start = time.perf_counter()
+    for i in range(args.candidates):
+        index.add(f"cand_{i}", rng.sample(vocabulary, rng.randint(3, 20)))
+    print(f"indexed {args.candidates} candidates in {time.perf_counter() - start:.1f}s ({index.stats()['bitset_bytes'] / 1e6:.1f} MB of bitsets)")
+
+    print(f"{'jd skills':>10} {'ms / rank':>10}")
+    for n_skills in (1, 3, 10, 30):
+        job_skills = rng.sample(vocabulary, n_skills)
+        index.rank(job_skills, args.top_k)
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            index.rank(job_skills, args.top_k)
+        print(f"{n_skills:>10} {(time.perf_counter() - start) / runs * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark for EmbeddingIndex.search (POST /search).
+
+Fills an index with random unit vectors and times cosine top-k queries,
+either in memory or from the memory-mapped file (--directory).
+
+Run from ml_api/:  python benchmarks/bench_search.py [--vectors 200000] [--dim 100]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_index import EmbeddingIndex
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--directory", default=None, help="persist under this directory (default: a temp dir)")
+    parser.add_argument("--memory", action="store_true", help="keep the matrix in memory instead of a mapped file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    directory = None if args.memory else (args.directory or tempfile.mkdtemp(prefix="bench_search_"))
+    index = EmbeddingIndex(args.dim, directory)
+
+    start = time.perf_counter()
+    block = 10_000
+    for offset in range(len(index), args.vectors, block):
+        vectors = rng.standard_normal((min(block, args.vectors - offset), args.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        for i, vector in enumerate(vectors):
+            index.add(f"cand_{offset + i}", vector)
+    print(f"indexed {len(index)} vectors in {time.perf_counter() - start:.1f}s ({index.stats()['matrix_bytes'] / 1e6:.1f} MB, {directory or 'memory'})")
+
+    query = rng.standard_normal(args.dim).astype(np.float32)
+    query /= np.linalg.norm(query)
+    index.search(query, args.top_k)
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        index.search(query, args.top_k)
+    print(f"{(time.perf_counter() - start) / runs * 1000:.2f} ms / search (top {args.top_k})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for extract_skills_from_text.
+
+Compares the precompiled single-pass matcher against the old
+one-re.search-per-skill loop on resumes from 1 KB to 1 MB and checks
+that both return the same skills.
+
+Run from ml_api/:  python benchmarks/bench_skill_matcher.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import SKILL_PATTERNS, extract_skills_from_text
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+SAMPLE = (
+    "Senior engineer with 6 years of experience building REST API services in "
+    "Python, Django and FastAPI. Deployed on AWS with Docker, Kubernetes and "
+    "Terraform; CI/CD through Jenkins and GitHub Actions. Frontend work in React, "
+    "TypeScript and Next.js. Data pipelines with Pandas, NumPy and PostgreSQL. "
+    "Strong communication, leadership and problem solving skills. "
+)
+
+
+def legacy_extract_skills(text: str):
+    text_lower = text.lower()
+    return [skill for skill, pattern in SKILL_PATTERNS.items() if re.search(pattern, text_lower)]
+
+
+def make_text(size: int) -> str:
+    filler = "responsible for delivering features on time across several teams "
+    body = (SAMPLE + filler * 8) * (size // (len(SAMPLE) + len(filler) * 8) + 1)
+    return body[:size]
+
+
+def time_call(fn, text: str, min_seconds: float = 0.5) -> float:
+    """Return the mean per-call latency in milliseconds."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(text)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1000
+
+
+def main():
+    print(f"{'size':>10} {'legacy ms':>12} {'matcher ms':>12} {'speedup':>9}  same")
+    for size in SIZES:
+        text = make_text(size)
+        same = legacy_extract_skills(text) == extract_skills_from_text(text)
+        legacy_ms = time_call(legacy_extract_skills, text)
+        new_ms = time_call(extract_skills_from_text, text)
+        print(f"{size:>10} {legacy_ms:>12.3f} {new_ms:>12.3f} {legacy_ms / new_ms:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
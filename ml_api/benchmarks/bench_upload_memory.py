@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Peak RSS of the server process per upload, with uploads kept in memory
+versus spooled to disk (UPLOAD_SPOOL_KB, see uploads.py).
+
+Starts `uvicorn app:app` once per mode with EXTRACTION_POOL_SIZE=0, so
+extraction runs inside the measured process, then POSTs text-layer PDFs
+padded with embedded images (corpus.to_photo_pdf) to /analyze/file. Before
+each request the server's peak RSS is reset through /proc/<pid>/clear_refs;
+the reported number is its VmHWM after the request minus its RSS before.
+Linux only.
+
+Run from ml_api/:  python benchmarks/bench_upload_memory.py [--sizes-mb 1 10 40] [--requests 3]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ML_API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import resume_lines, to_photo_pdf
+
+MODES = {"memory": str(1024 * 1024), "spooled": "1024"}  # UPLOAD_SPOOL_KB
+
+
+def proc_status(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def reset_peak(pid: int) -> None:
+    with open(f"/proc/{pid}/clear_refs", "w") as f:
+        f.write("5")
+
+
+def start_server(mode: str, port: int, max_mb: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        EXTRACTION_POOL_SIZE="0",
+        UPLOAD_SPOOL_KB=MODES[mode],
+        MAX_UPLOAD_MB=str(max_mb),
+        MAX_REQUEST_MB=str(max_mb + 1),
+        EXTRACTION_CACHE_SIZE="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ML_API_DIR, env=env,
+    )
+    for _ in range(600):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--requests", type=int, default=3, help="uploads per size; the smallest peak is reported")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_upload_")
+    files = []
+    for size in args.sizes_mb:
+        path = os.path.join(directory, f"resume_{size}mb.pdf")
+        with open(path, "wb") as f:
+            f.write(to_photo_pdf(resume_lines(random.Random(size), 8), size * 1024 * 1024, seed=size))
+        files.append((size, path))
+
+    print(f"{'mode':<8} {'upload MB':>9} {'status':>6} {'rss before MB':>13} {'peak +MB':>9}")
+    for mode in MODES:
+        server = start_server(mode, args.port, max(args.sizes_mb) + 1)
+        try:
+            for size, path in files:
+                peaks = []
+                for _ in range(args.requests):
+                    before = proc_status(server.pid, "VmRSS")
+                    reset_peak(server.pid)
+                    with open(path, "rb") as f:
+                        r = httpx.post(f"http://127.0.0.1:{args.port}/analyze/file",
+                                       files={"file": (os.path.basename(path), f, "application/pdf")}, timeout=300)
+                    peaks.append(proc_status(server.pid, "VmHWM") - before)
+                print(f"{mode:<8} {os.path.getsize(path) / 1e6:>9.1f} {r.status_code:>6} {before / 1e6:>13.1f} {min(peaks) / 1e6:>9.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory with and without MODEL_MMAP.
+
+Starts N worker processes the way `uvicorn --workers N` does (each imports
+app, loads every model and reads all of its arrays), keeps them alive
+together, and prints each worker's private and shared resident memory from
+/proc/<pid>/smaps_rollup.
+With MODEL_MMAP=true and converted artifacts (convert_models_mmap.py), the
+model arrays should move from private to shared.
+
+Run from ml_api/:  python benchmarks/bench_worker_memory.py [--workers 4]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+
+import numpy as np
+
+ML_API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_API_DIR)
+
+
+def _arrays(obj, seen):
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        yield obj
+    elif isinstance(obj, dict):
+        for child in obj.values():
+            yield from _arrays(child, seen)
+    elif isinstance(obj, (list, tuple)):
+        for child in obj:
+            yield from _arrays(child, seen)
+    elif hasattr(obj, "__dict__"):
+        for child in vars(obj).values():
+            yield from _arrays(child, seen)
+
+
+def worker(mmap: bool, loaded, done) -> None:
+    os.environ["MODEL_MMAP"] = "true" if mmap else "false"
+    os.chdir(ML_API_DIR)
+    import app
+
+    app.warmup_models(list(app.MODEL_ARTIFACTS))
+    # Read every model array once, as a worker that has served a varied
+    # stream of resumes eventually does, so mapped pages are resident
+    seen = set()
+    for name in ("tfidf", "clf_cat", "clf_type", "w2v"):
+        for array in _arrays(app.get_model(name), seen):
+            if array.dtype != object:
+                array.sum()
+    loaded.wait()  # every worker has its models resident before anyone is measured
+    done.wait()
+
+
+def run(mmap: bool, workers: int):
+    ctx = mp.get_context("spawn")
+    loaded = ctx.Barrier(workers + 1)
+    done = ctx.Barrier(workers + 1)
+    procs = [ctx.Process(target=worker, args=(mmap, loaded, done)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    loaded.wait()
+
+    import metrics
+    usage = [metrics.process_memory(p.pid) for p in procs]
+    done.wait()
+    for p in procs:
+        p.join()
+    return usage
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'MODEL_MMAP':>10} {'worker':>6} {'rss MB':>8} {'private MB':>10} {'shared MB':>9} {'pss MB':>8}")
+    for mmap in (False, True):
+        usage = run(mmap, args.workers)
+        for i, u in enumerate(usage):
+            print(f"{str(mmap):>10} {i:>6} {u.get('rss', 0) / 1e6:>8.1f} {u.get('private', 0) / 1e6:>10.1f} "
+                  f"{u.get('shared', 0) / 1e6:>9.1f} {u.get('pss', 0) / 1e6:>8.1f}")
+        total_private = sum(u.get("private", 0) for u in usage)
+        total_pss = sum(u.get("pss", 0) for u in usage)
+        print(f"{str(mmap):>10} {'total':>6} {'':>8} {total_private / 1e6:>10.1f} {'':>9} {total_pss / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
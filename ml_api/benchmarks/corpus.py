@@ -0,0 +1,250 @@
+# ml_api/benchmarks/corpus.py
+# Deterministic synthetic resumes and job descriptions for the benchmarks.
+# The same seed always produces byte-identical TXT/DOCX/PDF files, so timings
+# from different runs (and machines) are measured on the same inputs.
+import datetime
+import io
+import random
+import zipfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+FORMATS = ["txt", "docx", "pdf", "pdf_scanned"]
+
+_FIXED_TIME = datetime.datetime(2024, 1, 1)
+
+# Approximate number of experience entries per size; each entry is ~600 bytes of text
+SIZES = {"small": 2, "medium": 8, "large": 32}
+
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "C++", "Go", "SQL", "React", "Angular",
+    "Vue.js", "Node.js", "Django", "Flask", "FastAPI", "Spring Boot", "Docker", "Kubernetes",
+    "AWS", "Azure", "GCP", "Terraform", "Jenkins", "Git", "PostgreSQL", "MySQL", "MongoDB",
+    "Redis", "Kafka", "Spark", "Pandas", "NumPy", "TensorFlow", "PyTorch", "scikit-learn",
+    "Machine Learning", "Deep Learning", "NLP", "REST API", "GraphQL", "CI/CD", "Linux",
+    "Agile", "Scrum", "Leadership", "Communication", "Problem Solving",
+]
+
+TITLES = [
+    "Software Engineer", "Senior Software Engineer", "Backend Developer", "Frontend Developer",
+    "Full Stack Developer", "Data Scientist", "Machine Learning Engineer", "DevOps Engineer",
+    "Data Engineer", "Cloud Architect",
+]
+
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Enterprises", "Vandelay"]
+
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Maintained", "Automated", "Delivered", "Scaled", "Refactored"]
+
+OBJECTS = [
+    "a customer-facing REST API", "the payments pipeline", "an internal analytics dashboard",
+    "the search service", "a recommendation engine", "the CI/CD workflow", "a data ingestion platform",
+    "the mobile backend", "an event streaming system", "the reporting warehouse",
+]
+
+OUTCOMES = [
+    "reducing latency by {n}%", "serving {n}k daily users", "cutting infrastructure cost by {n}%",
+    "improving test coverage to {n}%", "shortening release cycles by {n}%", "handling {n}M events per day",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    skills = rng.sample(SKILLS, 2)
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(10, 90))
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {skills[0]} and {skills[1]}, {outcome}."
+
+
+def resume_lines(rng: random.Random, entries: int) -> List[str]:
+    title = rng.choice(TITLES)
+    lines = [
+        f"Candidate {rng.randint(1000, 9999)}",
+        f"{title} | candidate{rng.randint(1, 999)}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"{title} with {rng.randint(2, 15)} years of experience. " + _sentence(rng),
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, rng.randint(8, 16))),
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(entries):
+        start = rng.randint(2005, 2022)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        lines.extend(f"- {_sentence(rng)}" for _ in range(4))
+        lines.append("")
+    lines += ["EDUCATION", f"B.Sc. Computer Science, State University ({rng.randint(2000, 2018)})"]
+    return lines
+
+
+def job_description(rng: random.Random) -> str:
+    title = rng.choice(TITLES)
+    required = rng.sample(SKILLS, rng.randint(5, 10))
+    return (
+        f"We are hiring a {title}. Required skills: {', '.join(required)}. "
+        f"You will {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)} and work closely with product and design. "
+        f"{rng.randint(2, 8)}+ years of experience preferred."
+    )
+
+
+# -----------------------------
+# File writers
+# -----------------------------
+def to_txt(lines: List[str]) -> bytes:
+    return "\n".join(lines).encode("utf-8")
+
+
+def to_docx(lines: List[str]) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    # python-docx stamps the current time into core properties; pin it so output is reproducible
+    doc.core_properties.created = doc.core_properties.modified = _FIXED_TIME
+    bio = io.BytesIO()
+    doc.save(bio)
+    # ...and the zip entry timestamps too
+    out = io.BytesIO()
+    with zipfile.ZipFile(bio) as src, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            dst.writestr(zipfile.ZipInfo(info.filename, _FIXED_TIME.timetuple()[:6]), src.read(info), zipfile.ZIP_DEFLATED)
+    return out.getvalue()
+
+
+def _pdf_escape(text: str) -> bytes:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1")
+
+
+def _wrap(lines: List[str], width: int) -> List[str]:
+    out = []
+    for line in lines:
+        while len(line) > width:
+            cut = line.rfind(" ", 0, width)
+            cut = cut if cut > 0 else width
+            out.append(line[:cut])
+            line = line[cut:].lstrip()
+        out.append(line)
+    return out
+
+
+def _write_pdf(page_streams: List[Tuple[bytes, Optional[Tuple[int, int, bytes]]]]) -> bytes:
+    """
+    Minimal PDF writer. Each page is (content stream, optional grayscale image
+    as (width, height, raw pixels)) drawn over a US Letter page.
+    """
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for stream, image in page_streams:
+        resources = b"/Font << /F1 3 0 R >>"
+        if image is not None:
+            width, height, pixels = image
+            data = zlib.compress(pixels)
+            objects.append(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>stream\n" % (width, height, len(data))
+                + data + b"\nendstream"
+            )
+            resources += b" /XObject << /Im0 %d 0 R >>" % len(objects)
+        objects.append(b"<< /Length %d >>stream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << %s >> /Contents %d 0 R >>"
+            % (resources, content_id)
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids))
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+LINES_PER_PAGE = 46
+CHARS_PER_LINE = 95
+
+
+def to_pdf(lines: List[str]) -> bytes:
+    """Text-layer PDF: every line is a Helvetica text object."""
+    wrapped = _wrap(lines, CHARS_PER_LINE)
+    pages = []
+    for start in range(0, max(len(wrapped), 1), LINES_PER_PAGE):
+        ops = []
+        for row, line in enumerate(wrapped[start:start + LINES_PER_PAGE]):
+            ops.append(b"BT /F1 10 Tf 50 %d Td (%s) Tj ET" % (750 - row * 15, _pdf_escape(line)))
+        pages.append((b"\n".join(ops), None))
+    return _write_pdf(pages)
+
+
+def to_photo_pdf(lines: List[str], target_bytes: int, seed: int = 0) -> bytes:
+    """
+    Text-layer PDF padded to about target_bytes with an incompressible
+    "photo" on every page, like a designed CV with large embedded images.
+    The text layer is the same as to_pdf's.
+    """
+    rng = random.Random(seed)
+    wrapped = _wrap(lines, CHARS_PER_LINE)
+    starts = range(0, max(len(wrapped), 1), LINES_PER_PAGE)
+    side = max(1, int((target_bytes / len(starts)) ** 0.5))
+    pages = []
+    for start in starts:
+        ops = [b"q 200 0 0 200 380 560 cm /Im0 Do Q"]
+        for row, line in enumerate(wrapped[start:start + LINES_PER_PAGE]):
+            ops.append(b"BT /F1 10 Tf 50 %d Td (%s) Tj ET" % (750 - row * 15, _pdf_escape(line)))
+        pages.append((b"\n".join(ops), (side, side, rng.randbytes(side * side))))
+    return _write_pdf(pages)
+
+
+def to_scanned_pdf(lines: List[str], dpi: int = 100) -> bytes:
+    """
+    Image-only PDF: each page is one grayscale bitmap of the text and has no
+    text layer, so extraction has to go through OCR. Needs Pillow.
+    """
+    from PIL import Image, ImageDraw
+
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    wrapped = _wrap(lines, CHARS_PER_LINE)
+    pages = []
+    for start in range(0, max(len(wrapped), 1), LINES_PER_PAGE):
+        img = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(img)
+        for row, line in enumerate(wrapped[start:start + LINES_PER_PAGE]):
+            draw.text((int(0.6 * dpi), int(0.5 * dpi) + row * int(dpi * 0.21)), line, fill=0)
+        pages.append((b"q 612 0 0 792 0 0 cm /Im0 Do Q", (width, height, img.tobytes())))
+    return _write_pdf(pages)
+
+
+WRITERS = {"txt": to_txt, "docx": to_docx, "pdf": to_pdf, "pdf_scanned": to_scanned_pdf}
+EXTENSIONS = {"txt": "txt", "docx": "docx", "pdf": "pdf", "pdf_scanned": "pdf"}
+
+def build_corpus(seed: int = 42, formats: Optional[List[str]] = None, sizes: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Return one document per (format, size):
+    {"id", "format", "size", "filename", "content", "text", "job_description"}.
+    The underlying resume text depends only on seed and size, so every format
+    of the same size carries the same words.
+    """
+    docs = []
+    for size in sizes or list(SIZES):
+        rng = random.Random(f"{seed}-{size}")
+        lines = resume_lines(rng, SIZES[size])
+        jd = job_description(rng)
+        for fmt in formats or FORMATS:
+            docs.append({
+                "id": f"{fmt}-{size}",
+                "format": fmt,
+                "size": size,
+                "filename": f"resume_{size}.{EXTENSIONS[fmt]}" if fmt != "pdf_scanned" else f"resume_{size}_scanned.pdf",
+                "content": WRITERS[fmt](lines),
+                "text": "\n".join(lines),
+                "job_description": jd,
+            })
+    return docs
@@ -0,0 +1,316 @@
+# ml_api/candidate_index.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+    _popcount = np.bitwise_count
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        as_bytes = words.view(np.uint8).reshape(words.shape + (8,))
+        return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+class CandidateIndex:
+    """
+    Skill sets of analyzed resumes, for ranking every stored candidate against a JD.
+
+    Each resume is one row of uint64 words, a bitset over the skill
+    vocabulary (SKILL_PATTERNS keys). A skill -> rows inverted index is kept
+    alongside it. A JD is scored by AND + popcount over the whole matrix, or
+    through the posting lists of its skills when those are shorter. Both give
+    the same matched count that generate_ml_fallback_analysis uses. Adding a
+    resume appends (or overwrites) one row and one posting per skill. With
+    db_path set, skill lists are also written to SQLite by name and rebuilt
+    into bitsets at startup, so vocabulary changes only drop unknown skills.
+    Worker processes sharing db_path pick up each other's additions before
+    ranking.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], db_path: Optional[str] = None, initial_capacity: int = 1024):
+        self.vocabulary = list(vocabulary)
+        self.skill_bit = {skill: i for i, skill in enumerate(self.vocabulary)}
+        self.words = max(1, (len(self.vocabulary) + 63) // 64)
+        self.db_path = db_path or None
+        self._lock = threading.Lock()
+        self._bits = np.zeros((max(1, initial_capacity), self.words), dtype=np.uint64)
+        self._skill_counts = np.zeros(max(1, initial_capacity), dtype=np.int32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._meta: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        # skill bit -> growable int32 array of rows (+ used length)
+        self._postings = [np.zeros(16, dtype=np.int32) for _ in self.vocabulary]
+        self._posting_len = np.zeros(len(self.vocabulary), dtype=np.int64)
+        self._db: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._synced_until = 0.0
+
+    def open(self) -> None:
+        """Create / open the SQLite file and load the stored candidates now instead of on first use."""
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        # Caller holds self._lock. Nothing touches the disk before this, so importing is side-effect free.
+        if self._db is not None or not self.db_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connect()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS candidates ("
+            "id TEXT PRIMARY KEY, filename TEXT, skills TEXT NOT NULL, added REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS candidates_added ON candidates (added)")
+        self._load()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def reopen(self) -> None:
+        """Open a fresh SQLite connection (a forked worker must not reuse its parent's)."""
+        self._lock = threading.Lock()
+        if self._db is not None:
+            self._connect()
+
+    # -----------------------------
+    # Encoding
+    # -----------------------------
+    def encode(self, skills: Sequence[str]) -> np.ndarray:
+        row = np.zeros(self.words, dtype=np.uint64)
+        for skill in skills:
+            bit = self.skill_bit.get(skill)
+            if bit is not None:
+                row[bit >> 6] |= np.uint64(1) << np.uint64(bit & 63)
+        return row
+
+    def decode(self, row: np.ndarray) -> List[str]:
+        return [skill for bit, skill in enumerate(self.vocabulary) if int(row[bit >> 6]) >> (bit & 63) & 1]
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def _grow(self) -> None:
+        capacity = self._bits.shape[0] * 2
+        bits = np.zeros((capacity, self.words), dtype=np.uint64)
+        bits[:self._size] = self._bits[:self._size]
+        counts = np.zeros(capacity, dtype=np.int32)
+        counts[:self._size] = self._skill_counts[:self._size]
+        self._bits, self._skill_counts = bits, counts
+
+    def _add_posting(self, bit: int, row: int) -> None:
+        used = self._posting_len[bit]
+        if used == len(self._postings[bit]):
+            grown = np.zeros(len(self._postings[bit]) * 2, dtype=np.int32)
+            grown[:used] = self._postings[bit]
+            self._postings[bit] = grown
+        self._postings[bit][used] = row
+        self._posting_len[bit] = used + 1
+
+    def _remove_posting(self, bit: int, row: int) -> None:
+        used = self._posting_len[bit]
+        postings = self._postings[bit][:used]
+        keep = postings[postings != row]
+        self._postings[bit][:len(keep)] = keep
+        self._posting_len[bit] = len(keep)
+
+    def _insert(self, candidate_id: str, skills: Sequence[str], meta: Dict[str, Any]) -> None:
+        # Caller holds self._lock
+        encoded = self.encode(skills)
+        known = [self.skill_bit[s] for s in dict.fromkeys(skills) if s in self.skill_bit]
+        row = self._rows.get(candidate_id)
+        if row is None:
+            if self._size == self._bits.shape[0]:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[candidate_id] = row
+            self._ids.append(candidate_id)
+            self._meta.append(meta)
+            new_bits = known
+        else:
+            # Re-analyzed resume: only touch postings of skills that changed
+            old = set(self.decode(self._bits[row]))
+            old_bits = {self.skill_bit[s] for s in old}
+            for bit in old_bits - set(known):
+                self._remove_posting(bit, row)
+            new_bits = [b for b in known if b not in old_bits]
+            self._meta[row] = meta
+        self._bits[row] = encoded
+        self._skill_counts[row] = len(known)
+        for bit in new_bits:
+            self._add_posting(bit, row)
+
+    def add(self, candidate_id: str, skills: Sequence[str], filename: Optional[str] = None) -> None:
+        meta = {"filename": filename, "added": time.time()}
+        with self._lock:
+            self._open()
+            self._insert(candidate_id, skills, meta)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO candidates (id, filename, skills, added) VALUES (?, ?, ?, ?)",
+                    (candidate_id, filename, json.dumps(list(skills)), meta["added"]),
+                )
+
+    def _load(self) -> None:
+        """Rebuild the bitsets and posting lists from SQLite in bulk."""
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        records = self._db.execute("SELECT id, filename, skills, added FROM candidates ORDER BY added").fetchall()
+        n = len(records)
+        if n == 0:
+            return
+        capacity = max(self._bits.shape[0], n)
+        self._bits = np.zeros((capacity, self.words), dtype=np.uint64)
+        self._skill_counts = np.zeros(capacity, dtype=np.int32)
+        for row, (candidate_id, filename, skills, added) in enumerate(records):
+            self._rows[candidate_id] = row
+            self._ids.append(candidate_id)
+            self._meta.append({"filename": filename, "added": added})
+            self._bits[row] = self.encode(json.loads(skills))
+        self._size = n
+        self._synced_until = records[-1][3]
+        for bit in range(len(self.vocabulary)):
+            column = (self._bits[:n, bit >> 6] >> np.uint64(bit & 63)) & np.uint64(1)
+            rows = np.flatnonzero(column).astype(np.int32)
+            self._postings[bit] = np.concatenate([rows, np.zeros(max(16, len(rows)), dtype=np.int32)])
+            self._posting_len[bit] = len(rows)
+        self._skill_counts[:n] = _popcount(self._bits[:n]).sum(axis=1, dtype=np.int32)
+
+    # Rows committed this many seconds before the newest one seen are re-read
+    # on sync, in case another process's slower write landed out of order
+    SYNC_OVERLAP = 5.0
+
+    def _sync(self) -> None:
+        """
+        Apply candidates written by other worker processes sharing db_path
+        (caller holds self._lock). PRAGMA data_version only changes when
+        another connection commits, so this is one cheap query otherwise.
+        """
+        self._open()
+        if self._db is None:
+            return
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        records = self._db.execute(
+            "SELECT id, filename, skills, added FROM candidates WHERE added >= ? ORDER BY added",
+            (self._synced_until - self.SYNC_OVERLAP,),
+        ).fetchall()
+        for candidate_id, filename, skills, added in records:
+            row = self._rows.get(candidate_id)
+            if row is not None and self._meta[row].get("added") == added:
+                continue
+            self._insert(candidate_id, json.loads(skills), {"filename": filename, "added": added})
+            self._synced_until = max(self._synced_until, added)
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+    def _matched_counts(self, job_bits: List[int]) -> np.ndarray:
+        n = self._size
+        posting_total = int(sum(self._posting_len[b] for b in job_bits))
+        if posting_total < n:
+            # Rare skills: touching only their postings is cheaper than scanning every row
+            counts = np.zeros(n, dtype=np.uint8)
+            for bit in job_bits:
+                counts[self._postings[bit][:self._posting_len[bit]]] += 1
+            return counts
+        mask = self.encode([self.vocabulary[b] for b in job_bits])
+        # One word column at a time avoids a slow reduction along a 2-wide axis
+        counts = np.zeros(n, dtype=np.uint8)
+        for w in range(self.words):
+            if mask[w]:
+                counts += _popcount(self._bits[:n, w] & mask[w]).astype(np.uint8, copy=False)
+        return counts
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, k: int, max_score: int) -> np.ndarray:
+        """
+        Rows of the k best scores, best first, ties in insertion order.
+        Scores are small integers, so a histogram finds the cut-off score
+        instead of partitioning the whole array.
+        """
+        hist = np.bincount(scores, minlength=max_score + 1)
+        at_least = np.cumsum(hist[::-1])[::-1]  # at_least[s] = rows scoring >= s
+        cutoff = int(np.flatnonzero(at_least >= k)[-1])
+        above = np.flatnonzero(scores > cutoff)
+        at_cutoff = np.flatnonzero(scores == cutoff)[:k - len(above)]
+        rows = np.concatenate([above, at_cutoff])
+        return rows[np.lexsort((rows, -scores[rows].astype(np.int32)))]
+
+    def rank(self, job_skills: Sequence[str], top_k: int = 10) -> Dict[str, Any]:
+        """
+        Top-k stored resumes by the fallback match score:
+        matched / required * 100 with a JD, min(skills * 5, 70) without
+        recognised JD skills. Ties are broken by insertion order.
+        """
+        job_bits = sorted({self.skill_bit[s] for s in job_skills if s in self.skill_bit})
+        with self._lock:
+            self._sync()
+            n = self._size
+            if n == 0:
+                return {"total": 0, "results": []}
+            if job_bits:
+                matched = self._matched_counts(job_bits)
+                # Score table built with the fallback's own int((matched / total) * 100)
+                total = len(job_bits)
+                table = np.array([int((m / total) * 100) for m in range(total + 1)], dtype=np.uint8)
+                scores = table[matched]
+            else:
+                matched = np.zeros(n, dtype=np.uint8)
+                scores = np.minimum(self._skill_counts[:n] * 5, 70).astype(np.uint8)
+
+            k = max(0, min(int(top_k), n))
+            if k == 0:
+                return {"total": n, "results": []}
+            top = self._top_rows(scores, k, 100)
+
+            job_set = [self.vocabulary[b] for b in job_bits]
+            results = []
+            for row in top:
+                skills = self.decode(self._bits[row])
+                skill_set = set(skills)
+                results.append({
+                    "candidate_id": self._ids[row],
+                    "filename": self._meta[row].get("filename"),
+                    "score": int(scores[row]),
+                    "matched_count": int(matched[row]),
+                    "matching_skills": [s for s in job_set if s in skill_set],
+                    "missing_skills": [s for s in job_set if s not in skill_set],
+                    "resume_skills": skills,
+                })
+            return {"total": n, "results": results}
+
+    def get(self, candidate_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            row = self._rows.get(candidate_id)
+            if row is None:
+                return None
+            return {"candidate_id": candidate_id, **self._meta[row], "skills": self.decode(self._bits[row])}
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            return {
+                "candidates": self._size,
+                "vocabulary_size": len(self.vocabulary),
+                "bitset_words": self.words,
+                "bitset_bytes": int(self._size * self.words * 8),
+                "postings": int(self._posting_len.sum()),
+                "db_path": self.db_path,
+            }
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Rewrite the model artifacts in MODEL_DIR so MODEL_MMAP=true can map them.
+
+Run once after training or downloading models (from ml_api/):
+    python convert_models_mmap.py            # everything in MODEL_DIR
+    python convert_models_mmap.py --check    # only report what would be mapped
+
+joblib can only memory-map arrays in uncompressed files, so the TF-IDF
+vectorizer and both classifiers are dumped again without compression. The
+original file is kept as foo.joblib.bak unless --no-backup is given. The
+Word2Vec training model is reduced to its KeyedVectors and saved as
+resume_w2v.kv, with the vectors in a separate .npy file for gensim's
+mmap='r'. The app prefers that file when it exists.
+
+Pickled Python objects (e.g. the TF-IDF vocabulary dict) are still loaded
+privately by each worker; only numpy arrays are shared.
+"""
+import argparse
+import os
+import shutil
+import sys
+
+import joblib
+import numpy as np
+
+MODELS_DIR = os.getenv("MODEL_DIR", "models")
+JOBLIB_MODELS = ["tfidf_vectorizer.joblib", "resume_category_classifier.joblib", "resume_skill_type_classifier.joblib"]
+W2V_MODEL = "resume_w2v.model"
+W2V_KV = "resume_w2v.kv"
+
+
+def mapped_arrays(obj, seen=None):
+    """(memory-mapped bytes, private array bytes) over the numpy arrays reachable from obj."""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0, 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        base = obj
+        while base is not None and not isinstance(base, np.memmap):
+            base = getattr(base, "base", None)
+        return (obj.nbytes, 0) if base is not None else (0, obj.nbytes)
+    mapped = private = 0
+    if isinstance(obj, dict):
+        children = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        children = obj
+    elif hasattr(obj, "__dict__"):
+        children = vars(obj).values()
+    else:
+        return 0, 0
+    for child in children:
+        m, p = mapped_arrays(child, seen)
+        mapped += m
+        private += p
+    return mapped, private
+
+
+def convert_joblib(path: str, backup: bool) -> None:
+    model = joblib.load(path)
+    tmp_path = path + ".tmp"
+    joblib.dump(model, tmp_path)  # no compress= -> arrays are stored raw and mappable
+    if backup:
+        shutil.copy2(path, path + ".bak")
+    os.replace(tmp_path, path)
+
+
+def convert_w2v(model_path: str, kv_path: str) -> None:
+    import gensim
+    wv = gensim.models.Word2Vec.load(model_path).wv
+    # sep_limit=0 stores every array in its own .npy file, which KeyedVectors.load(mmap="r") maps
+    wv.save(kv_path, sep_limit=0)
+
+
+def report(name: str, model) -> None:
+    mapped, private = mapped_arrays(model)
+    print(f"[check] {name}: {mapped / 1e6:.2f} MB mapped, {private / 1e6:.2f} MB private arrays")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="load with mmap and report, convert nothing")
+    parser.add_argument("--no-backup", action="store_true", help="do not keep foo.joblib.bak copies")
+    args = parser.parse_args()
+
+    for name in JOBLIB_MODELS:
+        path = os.path.join(MODELS_DIR, name)
+        if not os.path.exists(path):
+            print(f"[skip] {path} not found")
+            continue
+        if not args.check:
+            convert_joblib(path, backup=not args.no_backup)
+            print(f"[ok] {path} rewritten uncompressed")
+        report(name, joblib.load(path, mmap_mode="r"))
+
+    model_path = os.path.join(MODELS_DIR, W2V_MODEL)
+    kv_path = os.path.join(MODELS_DIR, W2V_KV)
+    if not args.check and os.path.exists(model_path):
+        convert_w2v(model_path, kv_path)
+        print(f"[ok] {model_path} -> {kv_path}")
+    if os.path.exists(kv_path):
+        import gensim
+        report(W2V_KV, gensim.models.KeyedVectors.load(kv_path, mmap="r"))
+    else:
+        print(f"[skip] {kv_path} not found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
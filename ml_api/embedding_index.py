@@ -0,0 +1,215 @@
+# ml_api/embedding_index.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def mean_embedding(tokens: Sequence[str], key_to_index: Dict[str, int], vectors: np.ndarray) -> Optional[np.ndarray]:
+    """
+    L2-normalized mean of the word vectors of tokens (out-of-vocabulary
+    tokens are skipped). Repeated tokens are looked up once and weighted by
+    their count, so the pooling is a single gather plus a matrix-vector
+    product. Returns None when no token has a vector.
+    """
+    counts: Dict[int, int] = {}
+    for token in tokens:
+        i = key_to_index.get(token)
+        if i is not None:
+            counts[i] = counts.get(i, 0) + 1
+    if not counts:
+        return None
+    rows = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    pooled = weights @ vectors[rows].astype(np.float32, copy=False)
+    norm = float(np.linalg.norm(pooled))
+    if norm == 0.0:
+        return None
+    return (pooled / norm).astype(np.float32)
+
+
+class EmbeddingIndex:
+    """
+    Contiguous float32 matrix of normalized resume embeddings with cosine top-k search.
+
+    Vectors are appended to a raw float32 file (directory/embeddings.f32,
+    one row per resume) that search reads through np.memmap, so millions of
+    rows are served from the page cache instead of being loaded into the
+    process. Row ids live in SQLite next to it; rows are allocated under its
+    write lock, so several worker processes can share one directory and see
+    each other's additions. Re-adding an id overwrites its row in place.
+    Without a directory everything stays in memory. Since rows are unit
+    length, cosine similarity is a plain dot product, computed in chunks with
+    a running top-k.
+    """
+
+    CHUNK_ROWS = 65536
+
+    def __init__(self, dim: int, directory: Optional[str] = None):
+        self.dim = int(dim)
+        self.directory = directory or None
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._meta: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._memory = np.zeros((0, self.dim), dtype=np.float32)
+        self._mmap: Optional[np.memmap] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._file = None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.matrix_path = os.path.join(self.directory, "embeddings.f32")
+            self._connect()
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rows (id TEXT PRIMARY KEY, row INTEGER NOT NULL, filename TEXT, added REAL NOT NULL)"
+            )
+            self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS rows_row ON rows (row)")
+            self._load()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(os.path.join(self.directory, "embeddings.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def reopen(self) -> None:
+        """Reopen SQLite and the matrix file (a forked worker must not share its parent's handles or file offset)."""
+        self._lock = threading.Lock()
+        if self.directory:
+            self._connect()
+            self._file = open(self.matrix_path, "r+b", buffering=0)
+            self._mmap = None
+
+    def _load(self) -> None:
+        stored = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if stored is not None and int(stored[0]) != self.dim:
+            # A retrained Word2Vec model with another size: old vectors are meaningless
+            print(f"[EmbeddingIndex] dimension changed {stored[0]} -> {self.dim}; starting a new index")
+            self._db.execute("DELETE FROM rows")
+            open(self.matrix_path, "wb").close()
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+        if not os.path.exists(self.matrix_path):
+            open(self.matrix_path, "wb").close()
+
+        complete_rows = os.path.getsize(self.matrix_path) // (self.dim * 4)
+        self._db.execute("DELETE FROM rows WHERE row >= ?", (complete_rows,))
+        self._sync()
+        # Drop a trailing partial row left by a crash mid-write
+        self._file = open(self.matrix_path, "r+b", buffering=0)
+        self._file.truncate(len(self._ids) * self.dim * 4)
+
+    def _sync(self) -> None:
+        """
+        Pick up rows appended by other worker processes sharing the directory
+        (caller holds self._lock). Rows are numbered densely by SQLite, so
+        anything at or past our row count is new.
+        """
+        new = self._db.execute(
+            "SELECT id, row, filename, added FROM rows WHERE row >= ? ORDER BY row", (len(self._ids),)
+        ).fetchall()
+        for candidate_id, row, filename, added in new:
+            if row != len(self._ids):
+                break
+            self._rows[candidate_id] = row
+            self._ids.append(candidate_id)
+            self._meta.append({"filename": filename, "added": added})
+
+    def _matrix(self) -> np.ndarray:
+        # Caller holds self._lock
+        n = len(self._ids)
+        if self._db is None:
+            return self._memory[:n]
+        if n == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self._mmap is None or self._mmap.shape[0] != n:
+            self._mmap = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        return self._mmap
+
+    def add(self, candidate_id: str, vector: np.ndarray, filename: Optional[str] = None) -> None:
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        added = time.time()
+        with self._lock:
+            if self._db is None:
+                row = self._rows.get(candidate_id, len(self._ids))
+                if row >= self._memory.shape[0]:
+                    grown = np.zeros((max(1024, self._memory.shape[0] * 2), self.dim), dtype=np.float32)
+                    grown[:self._memory.shape[0]] = self._memory
+                    self._memory = grown
+                self._memory[row] = vector
+            else:
+                # The write lock makes row allocation safe across worker processes
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._sync()
+                    row = self._rows.get(candidate_id, len(self._ids))
+                    self._file.seek(row * self.dim * 4)
+                    self._file.write(vector.tobytes())
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO rows (id, row, filename, added) VALUES (?, ?, ?, ?)",
+                        (candidate_id, row, filename, added),
+                    )
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+
+            if row == len(self._ids):
+                self._rows[candidate_id] = row
+                self._ids.append(candidate_id)
+                self._meta.append({"filename": filename, "added": added})
+            else:
+                self._meta[row] = {"filename": filename, "added": added}
+
+    def search(self, query: np.ndarray, top_k: int = 10) -> Dict[str, Any]:
+        """Rows with the highest cosine similarity to a normalized query vector, best first."""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            if self._db is not None:
+                self._sync()
+            matrix = self._matrix()
+            ids, meta = self._ids, self._meta
+            n = matrix.shape[0]
+            k = max(0, min(int(top_k), n))
+            if k == 0:
+                return {"total": n, "results": []}
+
+            best_rows = np.zeros(0, dtype=np.int64)
+            best_scores = np.zeros(0, dtype=np.float32)
+            for start in range(0, n, self.CHUNK_ROWS):
+                scores = matrix[start:start + self.CHUNK_ROWS] @ query
+                if len(scores) > k:
+                    part = np.argpartition(-scores, k - 1)[:k]
+                else:
+                    part = np.arange(len(scores))
+                best_rows = np.concatenate([best_rows, part + start])
+                best_scores = np.concatenate([best_scores, scores[part]])
+                if len(best_rows) > k:
+                    keep = np.argpartition(-best_scores, k - 1)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+            order = np.lexsort((best_rows, -best_scores))
+            return {
+                "total": n,
+                "results": [
+                    {
+                        "candidate_id": ids[best_rows[i]],
+                        "filename": meta[best_rows[i]].get("filename"),
+                        "similarity": round(float(best_scores[i]), 6),
+                    }
+                    for i in order
+                ],
+            }
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "vectors": len(self._ids),
+                "dim": self.dim,
+                "matrix_bytes": len(self._ids) * self.dim * 4,
+                "directory": self.directory,
+            }
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Export the Keras LSTM classifiers to .npz files for numpy_lstm.NumpyLSTMModel
+and check that both engines give the same outputs.
+
+Run once wherever TensorFlow is installed (from ml_api/):
+    python export_lstm_numpy.py                  # both models in MODEL_DIR
+    python export_lstm_numpy.py path/to/model.h5 # specific files
+
+Each foo.h5 is written next to itself as foo.npz. The parity check runs
+random padded token sequences through Keras and NumPy and exits non-zero
+if any output differs by more than --atol.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from numpy_lstm import NPZ_FORMAT_VERSION, NumpyLSTMModel
+
+MODELS_DIR = os.getenv("MODEL_DIR", "models")
+DEFAULT_MODELS = ["resume_category_lstm.h5", "resume_skilltype_lstm.h5"]
+
+
+def layer_config(layer):
+    """Return (config dict, {weight name: array}) for one Keras layer."""
+    kind = layer.__class__.__name__
+    cfg = {"type": kind}
+    weights = {}
+    values = layer.get_weights()
+
+    if kind == "Embedding":
+        cfg["mask_zero"] = bool(layer.get_config().get("mask_zero", False))
+        weights["embeddings"] = values[0]
+    elif kind == "LSTM":
+        c = layer.get_config()
+        cfg.update(
+            units=c["units"],
+            activation=c["activation"],
+            recurrent_activation=c["recurrent_activation"],
+            return_sequences=c["return_sequences"],
+            go_backwards=c.get("go_backwards", False),
+        )
+        weights["kernel"], weights["recurrent_kernel"] = values[0], values[1]
+        if len(values) > 2:
+            weights["bias"] = values[2]
+    elif kind == "Bidirectional":
+        if layer.merge_mode != "concat":
+            raise ValueError(f"Bidirectional merge_mode {layer.merge_mode!r} is not supported")
+        inner = layer.forward_layer
+        if inner.__class__.__name__ != "LSTM":
+            raise ValueError(f"Bidirectional {inner.__class__.__name__} is not supported")
+        c = inner.get_config()
+        cfg.update(
+            units=c["units"],
+            activation=c["activation"],
+            recurrent_activation=c["recurrent_activation"],
+            return_sequences=c["return_sequences"],
+        )
+        half = len(values) // 2
+        for prefix, part in (("forward_", values[:half]), ("backward_", values[half:])):
+            weights[prefix + "kernel"], weights[prefix + "recurrent_kernel"] = part[0], part[1]
+            if len(part) > 2:
+                weights[prefix + "bias"] = part[2]
+    elif kind == "Dense":
+        cfg["activation"] = layer.get_config()["activation"]
+        weights["kernel"] = values[0]
+        if len(values) > 1:
+            weights["bias"] = values[1]
+    elif kind in ("Dropout", "SpatialDropout1D", "InputLayer", "GlobalMaxPooling1D", "GlobalAveragePooling1D", "Flatten"):
+        pass
+    else:
+        raise ValueError(f"Layer {layer.name} ({kind}) is not supported by numpy_lstm")
+    return cfg, weights
+
+
+def export_model(keras_model, npz_path: str) -> None:
+    layers = []
+    arrays = {}
+    for index, layer in enumerate(keras_model.layers):
+        cfg, weights = layer_config(layer)
+        layers.append(cfg)
+        for name, value in weights.items():
+            arrays[f"{index}/{name}"] = np.asarray(value, dtype=np.float32)
+    config = {"format_version": NPZ_FORMAT_VERSION, "layers": layers}
+    np.savez_compressed(npz_path, __config__=np.array(json.dumps(config)), **arrays)
+
+
+def sequence_length(keras_model) -> int:
+    shape = keras_model.input_shape
+    if isinstance(shape, list):
+        shape = shape[0]
+    if shape and len(shape) > 1 and shape[1]:
+        return int(shape[1])
+    config_path = os.path.join(MODELS_DIR, "config.json")
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("max_len", 100))
+    return 100
+
+
+def parity_check(keras_model, numpy_model: NumpyLSTMModel, samples: int = 64, seed: int = 0) -> float:
+    """Max absolute difference between Keras and NumPy outputs on random padded inputs."""
+    rng = np.random.default_rng(seed)
+    steps = sequence_length(keras_model)
+    vocab = next(l for l in keras_model.layers if l.__class__.__name__ == "Embedding").get_weights()[0].shape[0]
+    x = np.zeros((samples, steps), dtype=np.int32)
+    for row in range(samples):
+        length = int(rng.integers(1, steps + 1))
+        x[row, :length] = rng.integers(1, vocab, size=length)
+    expected = keras_model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("models", nargs="*", help="Keras .h5 files (default: both LSTMs in MODEL_DIR)")
+    parser.add_argument("--atol", type=float, default=1e-4, help="max allowed |keras - numpy| (default 1e-4)")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    paths = args.models or [os.path.join(MODELS_DIR, name) for name in DEFAULT_MODELS]
+    failed = False
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"[skip] {path} not found")
+            continue
+        npz_path = os.path.splitext(path)[0] + ".npz"
+        keras_model = load_model(path)
+        export_model(keras_model, npz_path)
+        diff = parity_check(keras_model, NumpyLSTMModel.load(npz_path))
+        ok = diff <= args.atol
+        failed |= not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {path} -> {npz_path} (max abs diff {diff:.2e})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
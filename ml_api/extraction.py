@@ -0,0 +1,352 @@
+# ml_api/extraction.py
+# Document text extractors. Kept free of model/TensorFlow imports so the
+# extraction worker processes (see extraction_pool.py) start quickly.
+import io
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from docx import Document as DocxDocument
+
+from extraction_pool import time_left
+
+# Optional OCR imports (only used if available)
+try:
+    from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
+    import pytesseract
+    OCR_AVAILABLE = True
+except Exception:
+    OCR_AVAILABLE = False
+
+# Pages OCR'd concurrently per process. serve.py sets it from its thread budget;
+# otherwise the CPUs this process may run on (not every core of the host), split
+# between the EXTRACTION_POOL_SIZE processes (same default as app.py) that OCR side by side.
+_USABLE_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+_POOL_SIZE = int(os.getenv("EXTRACTION_POOL_SIZE", str(os.cpu_count() or 1)))  # 0 = extraction runs in threads
+OCR_THREADS = int(os.getenv("OCR_THREADS", str(max(1, _USABLE_CPUS // max(1, _POOL_SIZE)))))
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))  # shorter text over an image = scanned page
+
+# PDF text layer engines, fastest first. pdfium (pypdfium2) ships with
+# pdfplumber; PyMuPDF is optional. The default stays pdfplumber, whose text
+# the models and cached extractions were built on; "auto" picks the fastest
+# engine installed. Other engines lay out some lines differently, which can
+# change the skills found.
+PDF_ENGINES = ("pymupdf", "pdfium", "pdfminer", "pdfplumber")
+PDF_ENGINE = os.getenv("PDF_ENGINE", "pdfplumber").lower()  # pdfplumber | auto | pymupdf | pdfium | pdfminer
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0"))  # pages read (and OCR'd) per PDF, 0 = all
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "0"))  # stop once this much text is collected, 0 = no limit
+
+# Parallelism comes from OCR'ing pages side by side; keep each tesseract
+# process single-threaded so they do not oversubscribe the cores.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+# Extractors take the document as bytes or as the path of a spooled upload
+# (uploads.py); PDF files are memory-mapped rather than read into memory.
+Source = Union[bytes, str]
+
+
+def _open_source(source: Source):
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return io.BytesIO(source)
+
+
+def _page_needs_ocr(page_text: str, has_images: Callable[[], bool]) -> bool:
+    """A page is treated as scanned if it has no text layer, or only a few characters over an image."""
+    text = (page_text or "").strip()
+    if not text:
+        return True
+    return len(text) < OCR_MIN_PAGE_CHARS and has_images()
+
+
+# Each engine yields (get_text, has_images) for the first max_pages pages in
+# order; both are only called while that page is current. Reading a page's
+# text is separate from advancing, so one broken page can be skipped.
+PageIterator = Iterator[Tuple[Callable[[], str], Callable[[], bool]]]
+
+
+def _pages_pdfplumber(source: Source, max_pages: Optional[int]) -> PageIterator:
+    """Full layout analysis: slowest, but the reference output."""
+    import pdfplumber
+    with closing(_open_source(source)) as stream, pdfplumber.open(stream) as pdf:
+        for p in pdf.pages[:max_pages]:
+            yield lambda: p.extract_text() or "", lambda: bool(p.images)
+
+
+def _line_text(chars) -> str:
+    """
+    Join characters in content-stream order. Without layout analysis there
+    are no line objects, so a new line starts when the baseline moves by
+    more than half a character and a space is added at horizontal gaps.
+    """
+    out: List[str] = []
+    prev = None
+    for c in chars:
+        if prev is not None:
+            if abs(c.y0 - prev.y0) > 0.5 * max(c.height, prev.height, 1.0):
+                out.append("\n")
+            elif c.x0 - prev.x1 > 0.2 * max(c.width, prev.width, 1.0) and c._text != " " and prev._text != " ":
+                out.append(" ")
+        out.append(c.get_text())
+        prev = c
+    return "".join(out)
+
+
+def _pages_pdfminer(source: Source, max_pages: Optional[int]) -> PageIterator:
+    """pdfminer.six with laparams=None: the characters are read but never grouped into boxes."""
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LTChar, LTImage, LTLayoutContainer
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    def walk(item, chars, images):
+        for child in item:
+            if isinstance(child, LTChar):
+                chars.append(child)
+            elif isinstance(child, LTImage):
+                images.append(child)
+            elif isinstance(child, LTLayoutContainer):
+                walk(child, chars, images)
+
+    manager = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(manager, laparams=None)
+    interpreter = PDFPageInterpreter(manager, device)
+    images: List[Any] = []
+
+    def page_text(page) -> str:
+        chars: List[Any] = []
+        images.clear()
+        interpreter.process_page(page)
+        walk(device.get_result(), chars, images)
+        return _line_text(chars)
+
+    with closing(_open_source(source)) as stream:
+        for page in PDFPage.get_pages(stream, maxpages=max_pages or 0):
+            yield lambda: page_text(page), lambda: bool(images)
+
+
+def _pages_pdfium(source: Source, max_pages: Optional[int]) -> PageIterator:
+    """PDFium (Chrome's PDF library) through pypdfium2; reads a path directly from disk."""
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for i in range(min(len(pdf), max_pages or len(pdf))):
+            page = pdf[i]
+
+            def page_text() -> str:
+                textpage = page.get_textpage()
+                try:
+                    return textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+                finally:
+                    textpage.close()
+
+            yield page_text, lambda: any(True for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]))
+            page.close()
+    finally:
+        pdf.close()
+
+
+def _pages_pymupdf(source: Source, max_pages: Optional[int]) -> PageIterator:
+    """MuPDF through PyMuPDF (optional dependency)."""
+    import fitz
+    opened = fitz.open(source, filetype="pdf") if isinstance(source, str) else fitz.open(stream=source, filetype="pdf")
+    with opened as pdf:
+        for i in range(min(pdf.page_count, max_pages or pdf.page_count)):
+            page = pdf[i]
+            yield page.get_text, lambda: bool(page.get_images())
+
+
+def _pages_none(source: Source, max_pages: Optional[int]) -> PageIterator:
+    raise RuntimeError("no PDF text engine installed")
+
+
+_PAGE_READERS = {
+    "pymupdf": _pages_pymupdf,
+    "pdfium": _pages_pdfium,
+    "pdfminer": _pages_pdfminer,
+    "pdfplumber": _pages_pdfplumber,
+    "none": _pages_none,  # nothing installed: PDFs are OCR'd if possible, otherwise give no text
+}
+_ENGINE_MODULES = {"pymupdf": "fitz", "pdfium": "pypdfium2", "pdfminer": "pdfminer", "pdfplumber": "pdfplumber"}
+_ENGINE_PACKAGES = {"pymupdf": "PyMuPDF", "pdfium": "pypdfium2", "pdfminer": "pdfminer.six", "pdfplumber": "pdfplumber"}
+
+
+def available_pdf_engines() -> List[str]:
+    import importlib.util
+    return [name for name in PDF_ENGINES if importlib.util.find_spec(_ENGINE_MODULES[name]) is not None]
+
+
+def resolve_pdf_engine(name: str) -> str:
+    """
+    The engine to use for a PDF_ENGINE value; unknown or missing engines fall
+    back to auto. With none installed this is "none": PDFs are only OCR'd.
+    """
+    available = available_pdf_engines()
+    if not available:
+        packages = ", ".join(_ENGINE_PACKAGES[engine] for engine in PDF_ENGINES)
+        fallback = "only be OCR'd" if OCR_AVAILABLE else "give no text"
+        print(f"[Extraction] No PDF text engine installed (install one of: {packages}); PDFs will {fallback}")
+        return "none"
+    if name in available:
+        return name
+    if name != "auto":
+        print(f"[Extraction] PDF engine {name!r} is not available, using {available[0]}")
+    return available[0]
+
+
+PDF_ENGINE = resolve_pdf_engine(PDF_ENGINE)
+
+
+def _ocr_page(source: Source, page_number: int) -> str:
+    """
+    Rasterize and OCR a single 1-based page. In a pool worker, pdftoppm and
+    tesseract are killed when the task's deadline passes (time_left()).
+    """
+    def timeout() -> Optional[float]:
+        left = time_left()
+        return None if left is None else max(left, 0.01)  # pytesseract reads 0 as "no timeout"
+
+    if time_left() == 0:
+        return ""
+    convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+    images = convert(source, dpi=OCR_DPI, first_page=page_number, last_page=page_number, timeout=timeout())
+    return "\n".join(pytesseract.image_to_string(img, timeout=timeout() or 0) for img in images)
+
+
+def _ocr_pages(source: Source, page_numbers: List[int]) -> Dict[int, str]:
+    """
+    OCR the given pages in parallel. pdftoppm and tesseract run as
+    subprocesses, so threads are enough to use every core.
+    """
+    results: Dict[int, str] = {}
+    if not page_numbers:
+        return results
+    executor = ThreadPoolExecutor(max_workers=max(1, min(OCR_THREADS, len(page_numbers))))
+    try:
+        futures = {executor.submit(_ocr_page, source, n): n for n in page_numbers}
+        for future, n in futures.items():
+            try:
+                results[n] = future.result()
+            except Exception:
+                results[n] = ""
+    finally:
+        # If the pool's deadline interrupts us, drop the queued pages. The running
+        # ones stop at the same deadline, so the worker starts its next task clean.
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+def extract_text_from_pdf_bytes(source: Source, timings: Optional[Dict[str, Any]] = None,
+                                engine: Optional[str] = None, max_pages: Optional[int] = None,
+                                max_chars: Optional[int] = None) -> str:
+    """
+    Per-page hybrid extraction: pages with an embedded text layer keep the
+    text engine's output (PDF_ENGINE), image-only pages are rasterized and
+    OCR'd in parallel (if OCR is available). A page the engine fails on is
+    logged and left to OCR; pages already read are kept if the engine gives
+    up part way, and if it cannot open the file at all every page is OCR'd.
+
+    Only the first max_pages pages are looked at, and no further pages are
+    read once max_chars characters have been collected; the result is cut
+    to max_chars (defaults: PDF_MAX_PAGES, PDF_MAX_CHARS, both off).
+    If a timings dict is passed, the seconds spent in the engine and in
+    OCR, the pages read / OCR'd and whether max_chars cut the text short
+    are written to it.
+    """
+    engine = engine or PDF_ENGINE
+    max_pages = (PDF_MAX_PAGES if max_pages is None else max_pages) or None
+    max_chars = (PDF_MAX_CHARS if max_chars is None else max_chars) or None
+    start = time.perf_counter()
+    pages_text: List[str] = []
+    ocr_page_numbers: List[int] = []
+    collected = 0
+    truncated = False
+    try:
+        with closing(_PAGE_READERS[engine](source, max_pages)) as pages:
+            for number, (get_text, has_images) in enumerate(pages, start=1):
+                try:
+                    page_text = get_text()
+                except Exception as e:
+                    # Keep the other pages; this one is OCR'd below if OCR is available
+                    print(f"[Extraction] {engine} could not read page {number}: {e}")
+                    page_text, has_images = "", lambda: True
+                pages_text.append(page_text)
+                collected += len(page_text)
+                if OCR_AVAILABLE and _page_needs_ocr(page_text, has_images):
+                    ocr_page_numbers.append(number)
+                if max_chars and collected >= max_chars:
+                    truncated = True
+                    break
+    except Exception as e:
+        if pages_text:
+            # The engine gave up part way through: keep the pages it did read
+            print(f"[Extraction] {engine} stopped after page {len(pages_text)}: {e}")
+    if not pages_text:
+        ocr_page_numbers = []
+        if OCR_AVAILABLE:
+            try:
+                info = pdfinfo_from_path(source) if isinstance(source, str) else pdfinfo_from_bytes(source)
+                page_count = int(info.get("Pages", 0))
+            except Exception:
+                page_count = 0
+            page_count = min(page_count, max_pages or page_count)
+            pages_text = [""] * page_count
+            ocr_page_numbers = list(range(1, page_count + 1))
+
+    ocr_start = time.perf_counter()
+    for number, ocr_text in _ocr_pages(source, ocr_page_numbers).items():
+        if ocr_text.strip():
+            pages_text[number - 1] = ocr_text
+
+    text = "\n".join(t for t in pages_text if t).strip()
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+        truncated = True
+
+    if timings is not None:
+        timings[engine] = ocr_start - start
+        timings["pdf_pages"] = len(pages_text)
+        if truncated:
+            timings["pdf_truncated"] = True
+        if ocr_page_numbers:
+            timings["ocr"] = time.perf_counter() - ocr_start
+            timings["ocr_pages"] = len(ocr_page_numbers)
+
+    return text
+
+
+def extract_text_from_docx_bytes(source: Source, timings: Optional[Dict[str, Any]] = None) -> str:
+    start = time.perf_counter()
+    try:
+        # zipfile reads the members it needs from the path; no mmap (it needs seekable())
+        doc = DocxDocument(source if isinstance(source, str) else io.BytesIO(source))
+        paragraphs = [p.text for p in doc.paragraphs if p.text]
+        return "\n".join(paragraphs)
+    except Exception:
+        return ""
+    finally:
+        if timings is not None:
+            timings["docx"] = time.perf_counter() - start
+
+
+EXTRACTORS = {
+    "pdf": extract_text_from_pdf_bytes,
+    "docx": extract_text_from_docx_bytes,
+}
+
+
+def extract_with_timings(extractor: str, source: Source) -> Tuple[str, Dict[str, Any]]:
+    """
+    Pool entry point: run one extractor and return (text, timings) to the
+    parent. Pass spooled uploads by path so the file is not pickled over.
+    """
+    timings: Dict[str, Any] = {}
+    text = EXTRACTORS[extractor](source, timings)
+    return text, timings
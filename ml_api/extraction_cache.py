@@ -0,0 +1,102 @@
+# ml_api/extraction_cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache for extracted document text.
+
+    Keys are the SHA-256 of the uploaded bytes plus the extractor name and
+    version, so the same file uploaded to different endpoints is only parsed
+    (or OCR'd) once. Entries live in a bounded in-memory LRU and, when
+    disk_dir is set, in one file per key that survives restarts.
+    """
+
+    def __init__(self, max_items: int = 256, disk_dir: Optional[str] = None, version: str = "1"):
+        self.max_items = max(0, int(max_items))
+        self.disk_dir = disk_dir or None
+        self.version = version
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_errors": 0}
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def make_key(self, content: bytes, extractor: str, digest: Optional[str] = None) -> str:
+        """Pass digest (the SHA-256 hex of content) when it is already known, e.g. for a spooled upload."""
+        digest = digest or hashlib.sha256(content).hexdigest()
+        return f"{digest}-{extractor}-v{self.version}"
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".txt")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._items[key]
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                text = None
+            except OSError:
+                text = None
+                with self._lock:
+                    self._stats["disk_errors"] += 1
+            if text is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    self._put_memory(key, text)
+                return text
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._put_memory(key, text)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+            except OSError:
+                with self._lock:
+                    self._stats["disk_errors"] += 1
+
+    def _put_memory(self, key: str, text: str) -> None:
+        # Caller holds self._lock
+        if self.max_items == 0:
+            return
+        self._items[key] = text
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                **self._stats,
+                "items": len(self._items),
+                "max_items": self.max_items,
+                "disk_dir": self.disk_dir,
+                "version": self.version,
+            }
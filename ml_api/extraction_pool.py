@@ -0,0 +1,161 @@
+# ml_api/extraction_pool.py
+import asyncio
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a pooled extraction task exceeds its timeout."""
+
+
+class _WorkerDeadline(BaseException):
+    """
+    Raised by SIGALRM inside a worker. Derives from BaseException so the
+    extractors' broad `except Exception` fallbacks cannot swallow it.
+    """
+
+
+# time.monotonic() at which the task running in this worker process is aborted
+_deadline: Optional[float] = None
+
+
+def time_left() -> Optional[float]:
+    """
+    Seconds until the current pool task's deadline, or None outside a pool
+    worker. Extractors pass it as the timeout of their subprocesses so that
+    nothing they started outlives the task.
+    """
+    return None if _deadline is None else max(0.0, _deadline - time.monotonic())
+
+
+def _raise_deadline(signum, frame):
+    raise _WorkerDeadline()
+
+
+def _run_with_deadline(timeout: float, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Runs inside a worker process. Uses SIGALRM so a slow document is aborted
+    without killing the worker (not available on Windows; the parent's hard
+    deadline still applies there).
+    """
+    global _deadline
+    if not hasattr(signal, "setitimer"):
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _raise_deadline)
+    _deadline = time.monotonic() + timeout
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        _deadline = None
+
+
+class ExtractionPool:
+    """
+    Bounded process pool for CPU-heavy document extraction (pdfplumber, OCR).
+
+    Handlers await run() so the event loop keeps serving other requests. At
+    most `size` tasks are handed to the pool at once; the rest wait in FIFO
+    order without their timeout running. Each worker process is replaced after
+    recycle_after tasks (max_tasks_per_child, Python 3.11+; older versions
+    keep their workers), one at a time, which returns pdfplumber/Pillow
+    memory growth to the OS. If a task ignores its in-worker timeout, or a
+    worker dies, the pool is torn down and rebuilt. size=0 runs tasks in the
+    loop's default thread executor instead (no worker processes).
+    """
+
+    # Extra time the parent waits past the in-worker timeout before killing the pool
+    KILL_GRACE = 10.0
+
+    def __init__(self, size: int, timeout: float = 120.0, recycle_after: int = 100, start_method: str = "spawn"):
+        self.size = max(0, int(size))
+        self.timeout = timeout
+        self.recycle_after = max(1, int(recycle_after))
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._stats = {"tasks": 0, "in_flight": 0, "timeouts": 0, "broken": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                recycle = {"max_tasks_per_child": self.recycle_after} if sys.version_info >= (3, 11) else {}
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    **recycle,
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of a pool that has a stuck or crashed task."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # ProcessPoolExecutor has no public way to stop a running task
+        for proc in list((getattr(executor, "_processes", None) or {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.size))
+
+        async with self._slots:
+            with self._lock:
+                self._stats["tasks"] += 1
+                self._stats["in_flight"] += 1
+            try:
+                if self.size == 0:
+                    return await asyncio.wait_for(loop.run_in_executor(None, fn, *args), self.timeout)
+                return await self._run_in_pool(loop, fn, *args)
+            except (asyncio.TimeoutError, _WorkerDeadline):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise ExtractionTimeout(f"Extraction exceeded {self.timeout:g}s")
+            finally:
+                with self._lock:
+                    self._stats["in_flight"] -= 1
+
+    async def _run_in_pool(self, loop, fn: Callable[..., Any], *args: Any) -> Any:
+        executor = self._get_executor()
+        future = loop.run_in_executor(executor, _run_with_deadline, self.timeout, fn, *args)
+        try:
+            return await asyncio.wait_for(future, self.timeout + self.KILL_GRACE)
+        except asyncio.TimeoutError:
+            self._discard(executor)
+            raise
+        except BrokenProcessPool:
+            with self._lock:
+                self._stats["broken"] += 1
+            self._discard(executor)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "size": self.size,
+                "timeout": self.timeout,
+                "recycle_after": self.recycle_after,
+                "active": self._executor is not None,
+            }
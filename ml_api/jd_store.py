@@ -0,0 +1,140 @@
+# ml_api/jd_store.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class JobDescriptionStore:
+    """
+    Registered job descriptions with their skill requirements extracted once.
+
+    IDs are derived from the normalized JD text, so registering the same JD
+    again returns the existing entry. Everything is held in memory (a few
+    dozen open roles) and mirrored to SQLite when db_path is set. Skills are
+    re-extracted on load if skills_version (a fingerprint of the skill
+    patterns) changed since they were stored. Worker processes sharing
+    db_path see each other's registrations and deletions: every call first
+    checks PRAGMA data_version and reloads the table if it changed.
+    """
+
+    def __init__(self, extract_skills: Callable[[str], List[str]], skills_version: str, db_path: Optional[str] = None):
+        self.extract_skills = extract_skills
+        self.skills_version = skills_version
+        self.db_path = db_path or None
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._data_version = None
+
+    def open(self) -> None:
+        """Create / open the SQLite file and load the stored JDs now instead of on first use."""
+        with self._lock:
+            self._sync()
+
+    def _open(self) -> None:
+        # Caller holds self._lock. Nothing touches the disk before this, so importing is side-effect free.
+        if self._db is not None or not self.db_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connect()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_descriptions ("
+            "id TEXT PRIMARY KEY, title TEXT, text TEXT NOT NULL, skills TEXT NOT NULL, "
+            "skills_version TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._load()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def reopen(self) -> None:
+        """Open a fresh SQLite connection (a forked worker must not reuse its parent's)."""
+        self._lock = threading.Lock()
+        if self._db is not None:
+            self._connect()
+
+    def _entry(self, row) -> Dict[str, Any]:
+        jd_id, title, text, skills, version, created = row
+        entry = {"id": jd_id, "title": title, "text": text, "skills": json.loads(skills), "created": created}
+        if version != self.skills_version:
+            entry["skills"] = self.extract_skills(text)
+            self._save(entry)
+        return entry
+
+    def _load(self) -> None:
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        rows = self._db.execute("SELECT id, title, text, skills, skills_version, created FROM job_descriptions").fetchall()
+        self._items = {row[0]: self._entry(row) for row in rows}
+
+    def _sync(self) -> None:
+        """
+        Pick up JDs registered or deleted by other worker processes sharing
+        db_path (caller holds self._lock). PRAGMA data_version only changes
+        when another connection commits; the table is small, so a change
+        reloads it whole.
+        """
+        self._open()
+        if self._db is None:
+            return
+        if self._db.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+
+    def _save(self, entry: Dict[str, Any]) -> None:
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO job_descriptions (id, title, text, skills, skills_version, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (entry["id"], entry["title"], entry["text"], json.dumps(entry["skills"]), self.skills_version, entry["created"]),
+        )
+
+    @staticmethod
+    def make_id(text: str) -> str:
+        normalized = _WHITESPACE.sub(" ", text).strip().lower()
+        return "jd_" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+    def add(self, text: str, title: Optional[str] = None) -> Dict[str, Any]:
+        jd_id = self.make_id(text)
+        with self._lock:
+            self._sync()
+            existing = self._items.get(jd_id)
+            if existing is not None:
+                if title and title != existing["title"]:
+                    existing["title"] = title
+                    self._save(existing)
+                return existing
+            entry = {"id": jd_id, "title": title, "text": text, "skills": self.extract_skills(text), "created": time.time()}
+            self._items[jd_id] = entry
+            self._save(entry)
+            return entry
+
+    def get(self, jd_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            return self._items.get(jd_id)
+
+    def delete(self, jd_id: str) -> bool:
+        with self._lock:
+            self._sync()
+            if self._items.pop(jd_id, None) is None:
+                return False
+            if self._db is not None:
+                self._db.execute("DELETE FROM job_descriptions WHERE id = ?", (jd_id,))
+            return True
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            return sorted(self._items.values(), key=lambda e: e["created"])
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._items)
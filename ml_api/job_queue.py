@@ -0,0 +1,335 @@
+# ml_api/job_queue.py
+import json
+import os
+import secrets
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from uploads import SpooledUpload
+
+STATUSES = ("queued", "running", "completed", "failed")
+
+
+class JobQueue:
+    """
+    Durable queue of analysis jobs (POST /jobs).
+
+    A job is one or more uploaded files plus the options they are analyzed
+    with. The files are moved into files_dir/<job id>/ and the job, its files
+    and each file's result are rows in SQLite, so queued and half-finished
+    jobs survive a restart. A worker claims the oldest queued job under a
+    lease (lease_until) that it renews while it works. If its process dies
+    the lease runs out, another worker claims the job again, and only the
+    files without a result are redone. A job claimed more than max_attempts
+    times is marked failed instead of being retried. Worker processes that
+    share db_path share the queue, so unlike the caches there is no
+    memory-only mode: a job submitted to one worker must be visible to all.
+
+    Idle workers poll with a plain SELECT and only take SQLite's write lock
+    (BEGIN IMMEDIATE) when there is a job to claim. Every method blocks on
+    SQLite, so call them from a thread when on the event loop.
+    """
+
+    def __init__(self, db_path: str, files_dir: str = "jobs", max_attempts: int = 3, busy_timeout: float = 2.0):
+        if not db_path:
+            raise ValueError("JobQueue needs a SQLite path shared by all worker processes")
+        self.db_path = db_path
+        self.files_dir = files_dir
+        self.max_attempts = max_attempts
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "claimed": 0, "released": 0, "files_done": 0, "files_failed": 0}
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """Create / open the SQLite file now instead of on first use (e.g. at startup)."""
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        # Caller holds self._lock. Nothing touches the disk before this, so importing is side-effect free.
+        if self._db is not None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connect()
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, options TEXT NOT NULL, status TEXT NOT NULL, "
+            "total INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, created REAL NOT NULL, started REAL, "
+            "finished REAL, lease_until REAL);"
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);"
+            "CREATE TABLE IF NOT EXISTS job_files ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, filename TEXT, path TEXT, size INTEGER, sha256 TEXT, "
+            "status TEXT NOT NULL, result TEXT, error TEXT, PRIMARY KEY (job_id, idx));"
+        )
+
+    def _connect(self) -> None:
+        # A short busy timeout: a worker waiting on another's write lock gives up and polls again
+        self._db = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def reopen(self) -> None:
+        """Open a fresh SQLite connection (a forked worker must not reuse its parent's)."""
+        self._lock = threading.Lock()
+        if self._db is not None:
+            self._connect()
+
+    # -----------------------------
+    # Submitting
+    # -----------------------------
+    def submit(self, kind: str, options: Dict[str, Any], uploads: List[SpooledUpload]) -> Dict[str, Any]:
+        """
+        Queue a job. Spooled uploads are moved (not copied) into the job's
+        directory and in-memory ones written there. The caller may close
+        the uploads afterwards.
+        """
+        job_id = "job_" + secrets.token_hex(8)
+        directory = os.path.join(self.files_dir, job_id)
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for index, upload in enumerate(uploads):
+            path = os.path.join(directory, str(index))
+            if upload.spooled:
+                shutil.move(upload.path, path)
+                upload.path = None
+            else:
+                with open(path, "wb") as f:
+                    f.write(upload.data)
+            files.append((job_id, index, upload.filename, os.path.abspath(path), upload.size, upload.sha256, "queued"))
+
+        created = time.time()
+        with self._lock:
+            self._open()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, kind, options, status, total, created) VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (job_id, kind, json.dumps(options), len(files), created),
+                )
+                self._db.executemany(
+                    "INSERT INTO job_files (job_id, idx, filename, path, size, sha256, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    files,
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                shutil.rmtree(directory, ignore_errors=True)
+                raise
+            self._stats["submitted"] += 1
+        return {"id": job_id, "kind": kind, "status": "queued", "total": len(files), "created": created}
+
+    # -----------------------------
+    # Working
+    # -----------------------------
+    _CLAIMABLE = (
+        "SELECT id, kind, options, attempts FROM jobs "
+        "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) ORDER BY created LIMIT 1"
+    )
+
+    def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job (or one whose lease expired) and return it
+        with its unfinished files, or None when there is nothing to do.
+        """
+        while True:
+            now = time.time()
+            with self._lock:
+                self._open()
+                # Read-only check first (WAL readers never block), so an empty queue costs no write lock
+                if self._db.execute(self._CLAIMABLE, (now,)).fetchone() is None:
+                    return None
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._db.execute(self._CLAIMABLE, (now,)).fetchone()
+                    if row is None:
+                        self._db.execute("COMMIT")
+                        return None
+                    job_id, kind, options, attempts = row
+                    if attempts >= self.max_attempts:
+                        self._finish(job_id, "failed", f"Gave up after {attempts} attempts", now)
+                        self._db.execute("COMMIT")
+                        shutil.rmtree(os.path.join(self.files_dir, job_id), ignore_errors=True)
+                        continue
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                        "started = COALESCE(started, ?), lease_until = ? WHERE id = ?",
+                        (now, now + lease_seconds, job_id),
+                    )
+                    files = self._db.execute(
+                        "SELECT idx, filename, path, size, sha256 FROM job_files "
+                        "WHERE job_id = ? AND status = 'queued' ORDER BY idx",
+                        (job_id,),
+                    ).fetchall()
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._stats["claimed"] += 1
+            return {
+                "id": job_id,
+                "kind": kind,
+                "options": json.loads(options),
+                "files": [
+                    {"index": idx, "filename": filename, "path": path, "size": size, "sha256": sha256}
+                    for idx, filename, path, size, sha256 in files
+                ],
+            }
+
+    def renew(self, job_id: str, lease_seconds: float) -> None:
+        with self._lock:
+            self._open()
+            self._db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running'", (time.time() + lease_seconds, job_id)
+            )
+
+    def file_done(self, job_id: str, index: int, result: Optional[Dict[str, Any]] = None,
+                  error: Optional[str] = None) -> None:
+        """Store one file's result (or error) and delete the uploaded file."""
+        status = "error" if error is not None else "done"
+        with self._lock:
+            self._open()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                path = self._db.execute(
+                    "SELECT path FROM job_files WHERE job_id = ? AND idx = ?", (job_id, index)
+                ).fetchone()
+                self._db.execute(
+                    "UPDATE job_files SET status = ?, result = ?, error = ?, path = NULL WHERE job_id = ? AND idx = ?",
+                    (status, json.dumps(result) if result is not None else None, error, job_id, index),
+                )
+                column = "failed" if error is not None else "done"
+                self._db.execute(f"UPDATE jobs SET {column} = {column} + 1 WHERE id = ?", (job_id,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._stats["files_failed" if error is not None else "files_done"] += 1
+        if path and path[0]:
+            try:
+                os.unlink(path[0])
+            except OSError:
+                pass
+
+    def finish(self, job_id: str) -> str:
+        """Mark a job whose files all have a result as completed (failed if none succeeded)."""
+        with self._lock:
+            self._open()
+            done, failed, total = self._db.execute(
+                "SELECT done, failed, total FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            status = "failed" if total and failed == total else "completed"
+            self._finish(job_id, status, "All files failed" if status == "failed" else None, time.time())
+        shutil.rmtree(os.path.join(self.files_dir, job_id), ignore_errors=True)
+        return status
+
+    def _finish(self, job_id: str, status: str, error: Optional[str], now: float) -> None:
+        self._db.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished = ?, lease_until = NULL WHERE id = ?",
+            (status, error, now, job_id),
+        )
+
+    def release(self, job_id: str) -> None:
+        """Put a running job back in the queue, e.g. on shutdown; the attempt does not count."""
+        with self._lock:
+            self._open()
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), lease_until = NULL "
+                "WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+            self._stats["released"] += 1
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+    _JOB_COLUMNS = "id, kind, options, status, total, done, failed, attempts, error, created, started, finished"
+
+    @staticmethod
+    def _job(row) -> Dict[str, Any]:
+        job_id, kind, options, status, total, done, failed, attempts, error, created, started, finished = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "options": json.loads(options),
+            "progress": {"total": total, "done": done, "failed": failed, "pending": total - done - failed},
+            "attempts": attempts,
+            "error": error,
+            "created": created,
+            "started": started,
+            "finished": finished,
+        }
+
+    def get(self, job_id: str, results: bool = True) -> Optional[Dict[str, Any]]:
+        """The job with one entry per file ({"index", "filename", "status"} plus result or error)."""
+        with self._lock:
+            self._open()
+            row = self._db.execute(f"SELECT {self._JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._job(row)
+            if results:
+                files = self._db.execute(
+                    "SELECT idx, filename, status, result, error FROM job_files WHERE job_id = ? ORDER BY idx", (job_id,)
+                ).fetchall()
+        if results:
+            job["results"] = [
+                {"index": idx, "filename": filename, "status": status,
+                 **(json.loads(result) if result else {}), **({"error": error} if error is not None else {})}
+                for idx, filename, status, result, error in files
+            ]
+        return job
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs first, without per-file results."""
+        query = f"SELECT {self._JOB_COLUMNS} FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created DESC LIMIT ?"
+        with self._lock:
+            self._open()
+            rows = self._db.execute(query, params + (limit,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a job that is not running, with its files and results."""
+        with self._lock:
+            self._open()
+            deleted = self._db.execute(
+                "DELETE FROM jobs WHERE id = ? AND status != 'running'", (job_id,)
+            ).rowcount
+            if deleted:
+                self._db.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+        if deleted:
+            shutil.rmtree(os.path.join(self.files_dir, job_id), ignore_errors=True)
+        return bool(deleted)
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs (and their results) that finished more than older_than seconds ago."""
+        cutoff = time.time() - older_than
+        with self._lock:
+            self._open()
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('completed', 'failed') AND finished < ?", (cutoff,)
+            ).fetchall()]
+            for job_id in ids:
+                self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                self._db.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+        return len(ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            return {**self._stats, **{status: counts.get(status, 0) for status in STATUSES}}
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
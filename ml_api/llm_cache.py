@@ -0,0 +1,172 @@
+# ml_api/llm_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-exported or re-wrapped copies of a document share a key."""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class LLMCache:
+    """
+    Cache for parsed LLM responses (Ollama, OpenAI).
+
+    Keys hash the normalized resume text, the JD text, the provider and
+    model, the sampling parameters and a prompt-template version. Changing
+    any of these misses the cache. Entries live in an in-memory LRU and, when
+    db_path is set, in a SQLite table that survives restarts. Both tiers
+    honour ttl_seconds (0 = never expire). Only JSON-serializable values
+    should be put here; callers store successfully parsed answers only.
+    """
+
+    # Expired rows are purged from SQLite every this many puts
+    PURGE_EVERY = 500
+
+    def __init__(self, max_items: int = 1024, ttl_seconds: float = 7 * 24 * 3600, db_path: Optional[str] = None):
+        self.max_items = max(0, int(max_items))
+        self.ttl = max(0.0, float(ttl_seconds))
+        self.db_path = db_path or None
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0, "disk_errors": 0}
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """Create / open the SQLite file now instead of on first use (e.g. at startup)."""
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        # Caller holds self._lock. Nothing touches the disk before this, so importing is side-effect free.
+        if self._db is not None or not self.db_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connect()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def reopen(self) -> None:
+        """Open a fresh SQLite connection (a forked worker must not reuse its parent's)."""
+        self._lock = threading.Lock()
+        if self._db is not None:
+            self._connect()
+
+    def make_key(self, provider: str, model: str, params: Dict[str, Any], prompt_version: str,
+                 resume_text: str, job_description: str = "") -> str:
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "model": model,
+                "params": params,
+                "prompt_version": prompt_version,
+                "resume": normalize_text(resume_text),
+                "jd": normalize_text(job_description),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expires(self) -> float:
+        return time.time() + self.ttl if self.ttl else float("inf")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        expired = False
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._items.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._items[key]
+                expired = True
+
+            self._open()
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT value, expires FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error:
+                    row = None
+                    self._stats["disk_errors"] += 1
+                if row is not None:
+                    if row[1] > now:
+                        value = json.loads(row[0])
+                        self._stats["disk_hits"] += 1
+                        self._put_memory(key, row[1], value)
+                        return value
+                    expired = True
+
+            self._stats["expired" if expired else "misses"] += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        expires = self._expires()
+        with self._lock:
+            self._put_memory(key, expires, value)
+            self._open()
+            if self._db is None:
+                return
+            try:
+                # SQLite has no infinity literal; store a far-future timestamp instead
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), min(expires, 1e18)),
+                )
+                self._puts += 1
+                if self._puts % self.PURGE_EVERY == 0:
+                    self._db.execute("DELETE FROM llm_cache WHERE expires <= ?", (time.time(),))
+            except sqlite3.Error:
+                self._stats["disk_errors"] += 1
+
+    def _put_memory(self, key: str, expires: float, value: Any) -> None:
+        # Caller holds self._lock
+        if self.max_items == 0:
+            return
+        self._items[key] = (expires, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._open()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            disk_items = None
+            self._open()
+            if self._db is not None:
+                try:
+                    disk_items = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            return {
+                **self._stats,
+                "items": len(self._items),
+                "disk_items": disk_items,
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl,
+                "db_path": self.db_path,
+            }
@@ -0,0 +1,268 @@
+# ml_api/metrics.py
+# Minimal in-process metrics with Prometheus text exposition (no client
+# library or external service needed). Served by GET /metrics in app.py.
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Endpoint of the request being served; set by the HTTP middleware so code deep
+# in the pipeline (OCR, Ollama fallback) can label its counters.
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="none")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, amount: float = 1.0, **labels: str):
+        self.inc(amount, **labels)
+        try:
+            yield
+        finally:
+            self.dec(amount, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), t[0])) for k, (c, t) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, fn) -> None:
+        """fn() is called before each render, e.g. to copy pool/batcher stats into gauges."""
+        self._collectors.append(fn)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception:
+                pass
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "resume_api_stage_seconds",
+    "Latency of each pipeline stage in seconds",
+    ["stage"],
+)
+REQUESTS = REGISTRY.counter("resume_api_requests_total", "HTTP requests handled", ["endpoint", "method", "status"])
+REQUEST_ERRORS = REGISTRY.counter("resume_api_request_errors_total", "HTTP requests that ended in a 4xx/5xx or exception", ["endpoint"])
+REQUEST_SECONDS = REGISTRY.histogram("resume_api_request_seconds", "End-to-end request latency in seconds", ["endpoint"])
+OLLAMA_FALLBACKS = REGISTRY.counter("resume_api_ollama_fallbacks_total", "Requests answered by the ML fallback instead of Ollama", ["endpoint", "reason"])
+OCR_INVOCATIONS = REGISTRY.counter("resume_api_ocr_invocations_total", "Documents that needed OCR", ["endpoint"])
+OCR_PAGES = REGISTRY.counter("resume_api_ocr_pages_total", "Pages rasterized and OCR'd", ["endpoint"])
+PDF_PAGES = REGISTRY.counter("resume_api_pdf_pages_total", "PDF pages read by the text engine", ["engine"])
+NEAR_DUPLICATES = REGISTRY.counter("resume_api_near_duplicates_total", "Uploads matching an earlier resume (reused = its analysis was returned)", ["endpoint", "reused"])
+UPLOAD_BYTES = REGISTRY.counter("resume_api_upload_bytes_total", "Uploaded file bytes, by where they were kept", ["storage"])
+JOBS = REGISTRY.counter("resume_api_jobs_total", "Background jobs finished, by kind and final status", ["kind", "status"])
+JOB_FILES = REGISTRY.counter("resume_api_job_files_total", "Files processed by background jobs (ok or error)", ["kind", "outcome"])
+PDF_TRUNCATED = REGISTRY.counter("resume_api_pdf_truncated_total", "PDFs whose text was cut at PDF_MAX_CHARS", ["endpoint"])
+REQUESTS_IN_FLIGHT = REGISTRY.gauge("resume_api_requests_in_flight", "HTTP requests currently being served", ["endpoint"])
+WORK_IN_FLIGHT = REGISTRY.gauge("resume_api_work_in_flight", "Extraction tasks, LSTM rows and Ollama calls in progress", ["kind"])
+COMPONENT_STATS = REGISTRY.gauge("resume_api_component_stat", "Counters reported by caches, pools and batchers", ["component", "stat"])
+PROCESS_MEMORY = REGISTRY.gauge(
+    "resume_api_process_memory_bytes",
+    "Memory of this worker process from /proc/self/smaps_rollup (private = not shared with other workers)",
+    ["kind"],
+)
+
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+}
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    Resident memory of a process in bytes, split into shared and private
+    pages ({} where /proc/<pid>/smaps_rollup is unavailable). "private" is
+    what the process would give back if it exited, so with several workers
+    mapping the same model files it is the number that should stay flat as
+    workers are added.
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    usage: Dict[str, int] = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                field, _, rest = line.partition(":")
+                if field in _SMAPS_FIELDS:
+                    usage[_SMAPS_FIELDS[field]] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    usage["private"] = usage.get("private_clean", 0) + usage.get("private_dirty", 0)
+    usage["shared"] = usage.get("shared_clean", 0) + usage.get("shared_dirty", 0)
+    return usage
+
+
+def _collect_process_memory() -> None:
+    for kind, value in process_memory().items():
+        PROCESS_MEMORY.set(value, kind=kind)
+
+
+REGISTRY.add_collector(_collect_process_memory)
+
+
+def observe_stage(stage: str):
+    """Context manager timing one pipeline stage."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def timed_stage(stage: str):
+    """Decorator recording a function's (or coroutine's) latency under the given stage."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with observe_stage(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with observe_stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
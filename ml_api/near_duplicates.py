@@ -0,0 +1,351 @@
+# ml_api/near_duplicates.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: a cheap, well-spread 64-bit hash of each element (wrapping uint64 math)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * _M1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def shingle_hashes(tokens: Sequence[str], size: int = 3) -> np.ndarray:
+    """
+    Distinct 64-bit hashes of the size-word shingles of tokens (of the whole
+    text if it is shorter). Words are hashed with CRC-32, which unlike
+    hash() is the same in every process.
+    """
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    words = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+    size = min(size, len(words))
+    count = len(words) - size + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(size):
+            shingles = _mix64(shingles ^ words[j:j + count])
+    return np.unique(shingles)
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles. Permutation i is _mix64(x ^ seed_i);
+    the top 32 bits of each minimum are kept, so a signature is num_perm
+    uint32 values and the fraction of equal values estimates the Jaccard
+    similarity of two shingle sets.
+    """
+
+    CHUNK = 4096  # shingles hashed at once, bounds the (shingles x num_perm) temporary
+
+    def __init__(self, num_perm: int = 80, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = int(num_perm)
+        self.shingle_size = int(shingle_size)
+        with np.errstate(over="ignore"):
+            self.seeds = _mix64(np.arange(self.num_perm, dtype=np.uint64) + np.uint64(seed))
+
+    def signature(self, tokens: Sequence[str]) -> Optional[np.ndarray]:
+        """Signature of a cleaned token list, or None for an empty text."""
+        shingles = shingle_hashes(tokens, self.shingle_size)
+        if shingles.size == 0:
+            return None
+        mins = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(shingles), self.CHUNK):
+                block = _mix64(shingles[start:start + self.CHUNK, None] ^ self.seeds[None, :])
+                np.minimum(mins, block.min(axis=0), out=mins)
+        return (mins >> np.uint64(32)).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures of analyzed resumes with an LSH index for near-duplicate lookup.
+
+    Signatures are cut into bands of band_rows values and each band is hashed
+    to one uint64 key. Two resumes become candidates when any band key is
+    equal, which happens with probability 1 - (1 - J^r)^b for Jaccard J
+    (80 values in 16 bands of 5: 0.95 at J = 0.7, 0.005 at J = 0.2).
+    Candidates are then kept if their estimated similarity reaches threshold.
+
+    Band keys live in one sorted uint64 array per band (binary search,
+    no Python object per resume) plus a short unsorted tail of recent rows
+    that is scanned directly and merged into the sorted arrays every
+    merge_every additions. A document can have one stored result per key
+    (set_result()), e.g. its analysis, or its match against one JD. With
+    db_path set, signatures and results are kept in SQLite; signatures are
+    reloaded at startup and worker processes sharing db_path pick up each
+    other's additions before a lookup. Results stay in SQLite and are read
+    on a hit.
+    """
+
+    def __init__(self, num_perm: int = 80, band_rows: int = 5, threshold: float = 0.7,
+                 db_path: Optional[str] = None, merge_every: int = 4096, initial_capacity: int = 1024):
+        if num_perm % band_rows:
+            raise ValueError("num_perm must be a multiple of band_rows")
+        self.hasher = MinHasher(num_perm)
+        self.num_perm = num_perm
+        self.band_rows = band_rows
+        self.bands = num_perm // band_rows
+        self.threshold = float(threshold)
+        self.merge_every = max(1, int(merge_every))
+        self.db_path = db_path or None
+        self._lock = threading.Lock()
+        capacity = max(1, initial_capacity)
+        self._signatures = np.zeros((capacity, num_perm), dtype=np.uint32)
+        self._band_keys = np.zeros((capacity, self.bands), dtype=np.uint64)
+        self._size = 0
+        self._sorted_keys = np.zeros((self.bands, 0), dtype=np.uint64)
+        self._sorted_rows = np.zeros((self.bands, 0), dtype=np.int32)
+        self._merged = 0  # rows [0, _merged) are in the sorted arrays
+        self._ids: List[str] = []
+        self._meta: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._results: Dict[Tuple[str, str], Dict[str, Any]] = {}  # memory-only mode
+        self._stats = {"lookups": 0, "duplicates": 0, "merges": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._synced_until = 0.0
+
+    def open(self) -> None:
+        """Create / open the SQLite file and load the stored signatures now instead of on first use."""
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        # Caller holds self._lock. Nothing touches the disk before this, so importing is side-effect free.
+        if self._db is not None or not self.db_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connect()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "id TEXT PRIMARY KEY, filename TEXT, signature BLOB NOT NULL, added REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS signatures_added ON signatures (added)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (id TEXT NOT NULL, key TEXT NOT NULL, result TEXT NOT NULL, "
+            "PRIMARY KEY (id, key))"
+        )
+        self._load()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def reopen(self) -> None:
+        """Open a fresh SQLite connection (a forked worker must not reuse its parent's)."""
+        self._lock = threading.Lock()
+        if self._db is not None:
+            self._connect()
+
+    # -----------------------------
+    # Signatures
+    # -----------------------------
+    def signature(self, tokens: Sequence[str]) -> Optional[np.ndarray]:
+        return self.hasher.signature(tokens)
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, bands) uint64 keys for an (n, num_perm) block of signatures."""
+        rows = signatures.reshape(len(signatures), self.bands, self.band_rows).astype(np.uint64)
+        keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for j in range(self.band_rows):
+                keys = _mix64(keys ^ rows[:, :, j])
+        return keys
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def _grow(self, needed: int) -> None:
+        capacity = self._signatures.shape[0]
+        while capacity < needed:
+            capacity *= 2
+        signatures = np.zeros((capacity, self.num_perm), dtype=np.uint32)
+        signatures[:self._size] = self._signatures[:self._size]
+        keys = np.zeros((capacity, self.bands), dtype=np.uint64)
+        keys[:self._size] = self._band_keys[:self._size]
+        self._signatures, self._band_keys = signatures, keys
+
+    def _merge(self) -> None:
+        """Fold the unsorted tail into the per-band sorted arrays (caller holds self._lock)."""
+        n = self._size
+        if n == self._merged:
+            return
+        tail_rows = np.arange(self._merged, n, dtype=np.int32)
+        tail_keys = self._band_keys[self._merged:n].T
+        order = np.argsort(tail_keys, axis=1)
+        tail_keys = np.take_along_axis(tail_keys, order, axis=1)
+        tail_rows = tail_rows[order]
+        keys = np.empty((self.bands, n), dtype=np.uint64)
+        rows = np.empty((self.bands, n), dtype=np.int32)
+        for band in range(self.bands):
+            # Insert the sorted tail at its binary-search positions: one linear copy per band
+            at = np.searchsorted(self._sorted_keys[band], tail_keys[band], side="right")
+            keys[band] = np.insert(self._sorted_keys[band], at, tail_keys[band])
+            rows[band] = np.insert(self._sorted_rows[band], at, tail_rows[band])
+        self._sorted_keys, self._sorted_rows = keys, rows
+        self._merged = n
+        self._stats["merges"] += 1
+
+    def _insert(self, doc_id: str, signature: np.ndarray, meta: Dict[str, Any]) -> None:
+        # Caller holds self._lock
+        if doc_id in self._rows:
+            return  # same id = same cleaned text = same signature; the first upload is kept
+        if self._size == self._signatures.shape[0]:
+            self._grow(self._size + 1)
+        row = self._size
+        self._signatures[row] = signature
+        self._band_keys[row] = self.band_keys(signature[None, :])[0]
+        self._size += 1
+        self._rows[doc_id] = row
+        self._ids.append(doc_id)
+        self._meta.append(meta)
+        if self._size - self._merged >= self.merge_every:
+            self._merge()
+
+    def add(self, doc_id: str, signature: np.ndarray, filename: Optional[str] = None) -> None:
+        meta = {"filename": filename, "added": time.time()}
+        with self._lock:
+            self._open()
+            if doc_id in self._rows:
+                return
+            self._insert(doc_id, signature, meta)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO signatures (id, filename, signature, added) VALUES (?, ?, ?, ?)",
+                    (doc_id, filename, signature.astype(np.uint32).tobytes(), meta["added"]),
+                )
+
+    def set_result(self, doc_id: str, result: Dict[str, Any], key: str = "analysis") -> None:
+        """Store a result of an added document under key, for reuse by later near-duplicates."""
+        with self._lock:
+            self._open()
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (id, key, result) VALUES (?, ?, ?)", (doc_id, key, json.dumps(result))
+                )
+            elif doc_id in self._rows:
+                self._results[(doc_id, key)] = result
+
+    def get_result(self, doc_id: str, key: str = "analysis") -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._open()
+            if self._db is None:
+                return self._results.get((doc_id, key))
+            row = self._db.execute("SELECT result FROM results WHERE id = ? AND key = ?", (doc_id, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _load(self) -> None:
+        """Rebuild the signature matrix and sorted band keys from SQLite in bulk."""
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        records = self._db.execute("SELECT id, filename, signature, added FROM signatures ORDER BY added").fetchall()
+        records = [r for r in records if len(r[2]) == self.num_perm * 4]  # skip rows from another num_perm
+        n = len(records)
+        if n == 0:
+            return
+        self._grow(n)
+        self._signatures[:n] = np.frombuffer(b"".join(r[2] for r in records), dtype=np.uint32).reshape(n, self.num_perm)
+        self._band_keys[:n] = self.band_keys(self._signatures[:n])
+        for row, (doc_id, filename, _, added) in enumerate(records):
+            self._rows[doc_id] = row
+            self._ids.append(doc_id)
+            self._meta.append({"filename": filename, "added": added})
+        self._size = n
+        self._synced_until = records[-1][3]
+        self._merge()
+
+    # Rows committed this many seconds before the newest one seen are re-read
+    # on sync, in case another process's slower write landed out of order
+    SYNC_OVERLAP = 5.0
+
+    def _sync(self) -> None:
+        """
+        Apply signatures written by other worker processes sharing db_path
+        (caller holds self._lock). PRAGMA data_version only changes when
+        another connection commits, so this is one cheap query otherwise.
+        """
+        self._open()
+        if self._db is None:
+            return
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        records = self._db.execute(
+            "SELECT id, filename, signature, added FROM signatures WHERE added >= ? ORDER BY added",
+            (self._synced_until - self.SYNC_OVERLAP,),
+        ).fetchall()
+        for doc_id, filename, signature, added in records:
+            if doc_id not in self._rows and len(signature) == self.num_perm * 4:
+                self._insert(doc_id, np.frombuffer(signature, dtype=np.uint32), {"filename": filename, "added": added})
+            self._synced_until = max(self._synced_until, added)
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def _candidate_rows(self, keys: np.ndarray) -> np.ndarray:
+        found = []
+        for band in range(self.bands):
+            sorted_keys = self._sorted_keys[band]
+            lo = np.searchsorted(sorted_keys, keys[band], side="left")
+            hi = np.searchsorted(sorted_keys, keys[band], side="right")
+            if hi > lo:
+                found.append(self._sorted_rows[band, lo:hi])
+        if self._size > self._merged:
+            tail = self._band_keys[self._merged:self._size]
+            found.append(np.flatnonzero((tail == keys[None, :]).any(axis=1)).astype(np.int32) + self._merged)
+        if not found:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(found))
+
+    def find(self, signature: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        The most similar stored document at or above threshold, as
+        {"id", "filename", "similarity"}, or None. A stored copy of the same
+        text is found with similarity 1.0.
+        """
+        keys = self.band_keys(signature[None, :])[0]
+        with self._lock:
+            self._sync()
+            self._stats["lookups"] += 1
+            rows = self._candidate_rows(keys)
+            if rows.size == 0:
+                return None
+            similarity = (self._signatures[rows] == signature[None, :]).mean(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.threshold:
+                return None
+            row = int(rows[best])
+            self._stats["duplicates"] += 1
+            return {"id": self._ids[row], "filename": self._meta[row].get("filename"), "similarity": round(float(similarity[best]), 3)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            return {
+                "signatures": self._size,
+                "unmerged": self._size - self._merged,
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "threshold": self.threshold,
+                "signature_bytes": int(self._size * (self.num_perm * 4 + self.bands * 8 * 2 + 4 * self.bands)),
+                **self._stats,
+                "db_path": self.db_path,
+            }
@@ -0,0 +1,237 @@
+# ml_api/numpy_lstm.py
+# TensorFlow-free inference for the Keras LSTM classifiers.
+# Weights are exported once with export_lstm_numpy.py into a .npz file; this
+# module only needs NumPy to run the forward pass.
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+NPZ_FORMAT_VERSION = 1
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x: np.ndarray) -> np.ndarray:
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    None: lambda x: x,
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "softmax": _softmax,
+}
+
+
+def _lstm(x: np.ndarray, mask: Optional[np.ndarray], kernel, recurrent_kernel, bias, units: int,
+          activation: str, recurrent_activation: str, return_sequences: bool, go_backwards: bool = False,
+          zero_output_for_mask: bool = False) -> np.ndarray:
+    """
+    Batched Keras-compatible LSTM (gate order i, f, c, o).
+    x: (batch, steps, features); mask: (batch, steps) bool or None.
+    Masked steps carry the previous state forward, as Keras does, and with
+    return_sequences repeat the previous output (zeros when
+    zero_output_for_mask, as inside Bidirectional). Sequences come back in
+    processing order, i.e. reversed for go_backwards, like Keras.
+    """
+    act = ACTIVATIONS[activation]
+    rec_act = ACTIVATIONS[recurrent_activation]
+    batch, steps, _ = x.shape
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+
+    # Input projection for every step at once; only the recurrent part is sequential
+    x_proj = x @ kernel
+    if bias is not None:
+        x_proj = x_proj + bias
+
+    order = range(steps - 1, -1, -1) if go_backwards else range(steps)
+    outputs = np.zeros((batch, steps, units), dtype=np.float32) if return_sequences else None
+    for k, t in enumerate(order):
+        z = x_proj[:, t, :] + h @ recurrent_kernel
+        i = rec_act(z[:, :units])
+        f = rec_act(z[:, units:2 * units])
+        g = act(z[:, 2 * units:3 * units])
+        o = rec_act(z[:, 3 * units:])
+        c_new = f * c + i * g
+        h_new = o * act(c_new)
+        if mask is not None:
+            m = mask[:, t:t + 1]
+            c = np.where(m, c_new, c)
+            h = np.where(m, h_new, h)
+        else:
+            c, h = c_new, h_new
+        if return_sequences:
+            outputs[:, k, :] = h * mask[:, t:t + 1] if zero_output_for_mask and mask is not None else h
+    if return_sequences:
+        return outputs
+    return h
+
+
+class NumpyLSTMModel:
+    """
+    Forward pass for a Sequential Keras text classifier built from
+    Embedding, (Bidirectional) LSTM, Dense, global pooling and dropout layers.
+    Exposes predict / predict_on_batch like a Keras model.
+    """
+
+    def __init__(self, layers: List[Dict[str, Any]], weights: Dict[str, np.ndarray]):
+        self.layers = layers
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyLSTMModel":
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["__config__"]))
+            if config.get("format_version") != NPZ_FORMAT_VERSION:
+                raise ValueError(f"Unsupported npz format version: {config.get('format_version')}")
+            weights = {k: data[k].astype(np.float32) for k in data.files if k != "__config__"}
+        return cls(config["layers"], weights)
+
+    def _w(self, index: int, name: str) -> Optional[np.ndarray]:
+        return self.weights.get(f"{index}/{name}")
+
+    def _run_lstm(self, x, mask, index: int, cfg: Dict[str, Any], prefix: str = "", go_backwards: bool = False,
+                  zero_output_for_mask: bool = False):
+        return _lstm(
+            x, mask,
+            self._w(index, prefix + "kernel"),
+            self._w(index, prefix + "recurrent_kernel"),
+            self._w(index, prefix + "bias"),
+            cfg["units"], cfg["activation"], cfg["recurrent_activation"],
+            cfg["return_sequences"], go_backwards, zero_output_for_mask,
+        )
+
+    def predict_on_batch(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x)
+        mask = None
+        out: np.ndarray = x
+        for index, cfg in enumerate(self.layers):
+            kind = cfg["type"]
+            if kind == "Embedding":
+                ids = out.astype(np.int64)
+                out = self._w(index, "embeddings")[ids]
+                if cfg.get("mask_zero"):
+                    mask = ids != 0
+            elif kind == "LSTM":
+                out = self._run_lstm(out, mask, index, cfg, go_backwards=cfg.get("go_backwards", False))
+                if not cfg["return_sequences"]:
+                    mask = None
+            elif kind == "Bidirectional":
+                # Keras zeroes masked outputs here and re-reverses the backward sequence
+                fwd = self._run_lstm(out, mask, index, cfg, prefix="forward_", zero_output_for_mask=True)
+                bwd = self._run_lstm(out, mask, index, cfg, prefix="backward_", go_backwards=True,
+                                     zero_output_for_mask=True)
+                if cfg["return_sequences"]:
+                    bwd = bwd[:, ::-1]
+                out = np.concatenate([fwd, bwd], axis=-1)
+                if not cfg["return_sequences"]:
+                    mask = None
+            elif kind == "Dense":
+                out = out @ self._w(index, "kernel")
+                bias = self._w(index, "bias")
+                if bias is not None:
+                    out = out + bias
+                out = ACTIVATIONS[cfg["activation"]](out)
+            elif kind == "GlobalMaxPooling1D":
+                # Keras ignores the mask here: padded steps are pooled too
+                out = out.max(axis=1)
+                mask = None
+            elif kind == "GlobalAveragePooling1D":
+                if mask is not None:
+                    m = mask[:, :, None].astype(np.float32)
+                    out = (out * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1.0)
+                else:
+                    out = out.mean(axis=1)
+                mask = None
+            elif kind == "Flatten":
+                out = out.reshape(out.shape[0], -1)
+            elif kind in ("Dropout", "SpatialDropout1D", "InputLayer"):
+                continue  # inference-time identity
+            else:
+                raise ValueError(f"Unsupported layer type: {kind}")
+        return out
+
+    def predict(self, x: np.ndarray, batch_size: int = 256, **kwargs) -> np.ndarray:
+        x = np.asarray(x)
+        if len(x) <= batch_size:
+            return self.predict_on_batch(x)
+        return np.concatenate([self.predict_on_batch(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+
+
+def pad_sequences(sequences: List[List[int]], maxlen: int, padding: str = "post", truncating: str = "pre", value: int = 0) -> np.ndarray:
+    """NumPy equivalent of keras pad_sequences for integer sequences."""
+    out = np.full((len(sequences), maxlen), value, dtype=np.int32)
+    for i, seq in enumerate(sequences):
+        if not len(seq):
+            continue
+        trunc = seq[-maxlen:] if truncating == "pre" else seq[:maxlen]
+        if padding == "post":
+            out[i, :len(trunc)] = trunc
+        else:
+            out[i, -len(trunc):] = trunc
+    return out
+
+
+class NumpyTokenizer:
+    """
+    Reads a Keras Tokenizer JSON (tokenizer.to_json()) and reproduces
+    texts_to_sequences without importing TensorFlow.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        word_index = config.get("word_index", {})
+        self.word_index: Dict[str, int] = json.loads(word_index) if isinstance(word_index, str) else dict(word_index)
+        self.num_words = config.get("num_words")
+        self.filters = config.get("filters", '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n')
+        self.lower = config.get("lower", True)
+        self.split = config.get("split", " ")
+        self.char_level = config.get("char_level", False)
+        self.oov_token = config.get("oov_token")
+        self._table = str.maketrans({c: self.split for c in self.filters})
+
+    @classmethod
+    def from_json(cls, json_string: str) -> "NumpyTokenizer":
+        data = json.loads(json_string)
+        return cls(data.get("config", data))
+
+    def _words(self, text: str) -> List[str]:
+        if self.lower:
+            text = text.lower()
+        if self.char_level:
+            return list(text)
+        return [w for w in text.translate(self._table).split(self.split) if w]
+
+    def texts_to_sequences(self, texts: List[str]) -> List[List[int]]:
+        return [self.words_to_sequence(self._words(text)) for text in texts]
+
+    def accepts_words(self) -> bool:
+        """True if lowercase, space-separated letter words split exactly as _words would split their join."""
+        return not self.char_level and self.split == " " and not any(c.isalpha() for c in self.filters)
+
+    def words_to_sequence(self, words: List[str]) -> List[int]:
+        """texts_to_sequences for one text that is already split into words."""
+        oov_index = self.word_index.get(self.oov_token) if self.oov_token else None
+        seq = []
+        for w in words:
+            i = self.word_index.get(w)
+            if i is not None:
+                if self.num_words and i >= self.num_words:
+                    if oov_index is not None:
+                        seq.append(oov_index)
+                else:
+                    seq.append(i)
+            elif oov_index is not None:
+                seq.append(oov_index)
+        return seq
@@ -0,0 +1,155 @@
+# ml_api/ollama_client.py
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+
+class OllamaError(Exception):
+    """Raised when Ollama answers with a non-200 status."""
+
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(message or f"Ollama error: {status_code}")
+        self.status_code = status_code
+
+
+class OllamaClient:
+    """
+    Async Ollama client with one persistent connection pool.
+
+    At most max_concurrency requests are sent to Ollama at once (set it to the
+    server's OLLAMA_NUM_PARALLEL). The rest wait here in FIFO order instead of
+    queueing up as open connections on the server. The timeout covers the
+    request itself, not the time spent waiting for a slot.
+    """
+
+    def __init__(self, base_url: str, model: str, timeout: float = 120.0, max_concurrency: int = 1, connect_timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "in_flight": 0, "queued": 0, "errors": 0, "timeouts": 0, "stopped_early": 0}
+
+    async def _ensure_client(self) -> None:
+        # The pool and semaphore belong to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return
+        stale, stale_loop = self._client, self._loop
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._loop = loop
+        if stale is not None:
+            # Replaced because the loop changed (e.g. a second asyncio.run); do not leak its connections
+            await self._close_client(stale, stale_loop)
+
+    @staticmethod
+    async def _close_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a client created on `loop`, which may not be the running loop."""
+        if loop is not None and loop is not asyncio.get_running_loop() and loop.is_running():
+            # Still running in another thread: its connections can only be closed there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            await client.aclose()
+        except Exception:
+            # The loop is closed, so its sockets cannot be shut down cleanly; the pool is dropped either way
+            pass
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += delta
+
+    async def generate(self, prompt: str, options: Optional[Dict[str, Any]] = None,
+                       until: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        POST /api/generate and return {"response": text, ...}.
+
+        Without `until` this is a plain non-streaming request. With it the
+        response is streamed and until(text_so_far) is called after every
+        chunk; as soon as it returns something other than None the stream is
+        closed (Ollama stops generating when the client disconnects) and the
+        result carries "stopped_early": True.
+        """
+        await self._ensure_client()
+        payload = {"model": self.model, "prompt": prompt, "stream": until is not None}
+        if options:
+            payload["options"] = options
+
+        self._count("queued")
+        async with self._slots:
+            self._count("queued", -1)
+            self._count("requests")
+            self._count("in_flight")
+            try:
+                if until is not None:
+                    # httpx's read timeout is per chunk; bound the whole stream too
+                    try:
+                        return await asyncio.wait_for(self._generate_stream(payload, until), self.timeout)
+                    except asyncio.TimeoutError:
+                        raise httpx.ReadTimeout(f"Ollama stream exceeded {self.timeout:g}s")
+                response = await self._client.post("/api/generate", json=payload)
+                if response.status_code != 200:
+                    raise OllamaError(response.status_code)
+                return response.json()
+            except httpx.TimeoutException:
+                self._count("timeouts")
+                raise
+            except Exception:
+                self._count("errors")
+                raise
+            finally:
+                self._count("in_flight", -1)
+
+    async def _generate_stream(self, payload: Dict[str, Any], until: Callable[[str], Any]) -> Dict[str, Any]:
+        parts = []
+        async with self._client.stream("POST", "/api/generate", json=payload) as response:
+            if response.status_code != 200:
+                raise OllamaError(response.status_code)
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(response.status_code, f"Ollama error: {chunk['error']}")
+                parts.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    return {**chunk, "response": "".join(parts)}
+                if until("".join(parts)) is not None:
+                    self._count("stopped_early")
+                    return {"response": "".join(parts), "done": False, "stopped_early": True}
+        return {"response": "".join(parts), "done": False}
+
+    async def tags(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """GET /api/tags (installed models). Not subject to the concurrency limit."""
+        await self._ensure_client()
+        response = await self._client.get("/api/tags", timeout=timeout)
+        if response.status_code != 200:
+            raise OllamaError(response.status_code)
+        return response.json()
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await self._close_client(client, self._loop)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "max_concurrency": self.max_concurrency,
+                "timeout": self.timeout,
+                "model": self.model,
+                "base_url": self.base_url,
+            }
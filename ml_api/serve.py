@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Production entry point: load the models once, then fork N uvicorn workers.
+
+    python serve.py                      # workers and threads sized to the container
+    python serve.py --workers 4 --threads-per-worker 2
+    python serve.py --preload tfidf,clf_cat,clf_type,w2v
+
+`python app.py` / `uvicorn app:app` remain the single-process dev servers.
+Here the master process binds the port, imports app and loads the
+--preload artifacts, then forks the workers. All workers share the listening
+socket and the copy-on-write pages of the preloaded models (with MODEL_MMAP
+also the mapped arrays, see convert_models_mmap.py). A worker that dies is
+replaced by a fresh fork. SIGTERM / SIGINT stop the workers gracefully.
+
+Thread budget. TensorFlow, OpenBLAS/MKL (numpy, scikit-learn) and OpenMP
+each start one thread per core by default, so N workers on C cores run N*C
+busy threads and slow each other down. Before anything imports numpy the
+master sets, unless already set in the environment:
+
+    OMP_NUM_THREADS, OPENBLAS_NUM_THREADS, MKL_NUM_THREADS,
+    BLIS_NUM_THREADS, VECLIB_MAXIMUM_THREADS, NUMEXPR_NUM_THREADS
+                                  = threads per worker
+    TF_NUM_INTRAOP_THREADS        = threads per worker
+    TF_NUM_INTEROP_THREADS        = 1
+    EXTRACTION_POOL_SIZE          = threads per worker (processes per worker)
+    OCR_THREADS                   = threads per worker / EXTRACTION_POOL_SIZE
+                                    (pages OCR'd at once per extraction process)
+
+Defaults come from the CPUs this process may actually use: the scheduler
+affinity mask, capped by the cgroup CPU quota (cpu.max in cgroup v2,
+cpu.cfs_quota_us / cpu.cfs_period_us in v1), so a container limited to
+2 CPUs on a 64-core host gets 2 workers, not 64.
+
+    SERVE_WORKERS (or WEB_CONCURRENCY)  default: available CPUs
+    SERVE_THREADS_PER_WORKER            default: max(1, CPUs // workers)
+    SERVE_PRELOAD                       default: "all" ("" = nothing)
+    HOST / PORT                         default: 0.0.0.0 / 8000
+
+TensorFlow is not fork-safe, so with LSTM_ENGINE=keras the LSTMs and the
+Keras tokenizer are left out of the preload and loaded by each worker at
+startup instead (WARMUP_MODELS defaults to "all" here, so /ready waits for
+them). The numpy LSTM engine has no such restriction.
+
+In-memory state is per worker. The LLM cache, registered job descriptions,
+the candidate / embedding indexes and the background job queue are shared
+through their SQLite files, so keep those paths set (the defaults) when
+running more than one worker. Every worker runs JOB_WORKERS job tasks.
+"""
+import argparse
+import math
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+)
+# Artifacts that import TensorFlow when LSTM_ENGINE=keras
+TENSORFLOW_ARTIFACTS = ("lstm_cat", "lstm_type", "tokenizer")
+# A worker exiting sooner than this after its fork is treated as a crash loop
+MIN_WORKER_LIFETIME = 5.0
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the container's cgroup quota, or None when unlimited."""
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")  # cgroup v2: "<quota> <period>" or "max <period>"
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")  # cgroup v1, -1 = unlimited
+    period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def thread_budget(workers: Optional[int] = None, threads_per_worker: Optional[int] = None) -> Dict[str, int]:
+    cpus = available_cpus()
+    workers = workers or int(os.getenv("SERVE_WORKERS") or os.getenv("WEB_CONCURRENCY") or cpus)
+    workers = max(1, workers)
+    threads = threads_per_worker or int(os.getenv("SERVE_THREADS_PER_WORKER") or max(1, cpus // workers))
+    return {"cpus": cpus, "workers": workers, "threads_per_worker": max(1, threads)}
+
+
+def apply_thread_budget(budget: Dict[str, int]) -> Dict[str, str]:
+    """Export the per-worker limits; must run before numpy / TensorFlow are imported."""
+    threads = str(budget["threads_per_worker"])
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, threads)
+    os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+    os.environ.setdefault("EXTRACTION_POOL_SIZE", threads)
+    # Each extraction process OCRs pages side by side; split the worker's share between them
+    pool_size = int(os.environ["EXTRACTION_POOL_SIZE"])
+    os.environ.setdefault("OCR_THREADS", str(max(1, budget["threads_per_worker"] // max(1, pool_size))))
+    os.environ.setdefault("WARMUP_MODELS", "all")
+    return {name: os.environ[name] for name in THREAD_ENV_VARS + ("TF_NUM_INTEROP_THREADS", "EXTRACTION_POOL_SIZE", "OCR_THREADS")}
+
+
+def preload_models(app_module, names: str) -> None:
+    """Load artifacts in the master so workers inherit them (no test runs: no thread pools before fork)."""
+    wanted = app_module.parse_model_list(names) if names else []
+    if app_module.LSTM_ENGINE == "keras":
+        wanted = [name for name in wanted if name not in TENSORFLOW_ARTIFACTS]
+    for name in wanted:
+        start = time.perf_counter()
+        model = app_module.MODEL_ARTIFACTS[name].get()
+        state = "loaded" if model is not None else "unavailable"
+        print(f"[serve] preload {name}: {state} in {time.perf_counter() - start:.2f}s")
+    if app_module.EMBEDDING_INDEX_ENABLED:
+        app_module.get_embedding_index()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(config, sock: socket.socket) -> None:
+    import uvicorn
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=None, help="default: SERVE_WORKERS or available CPUs")
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="default: CPUs // workers")
+    parser.add_argument("--preload", default=os.getenv("SERVE_PRELOAD", "all"), help='artifacts loaded before forking ("all", names, or "")')
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    budget = thread_budget(args.workers, args.threads_per_worker)
+    limits = apply_thread_budget(budget)
+    print(f"[serve] {budget['cpus']} CPUs available -> {budget['workers']} workers x {budget['threads_per_worker']} threads")
+    print("[serve] " + " ".join(f"{k}={v}" for k, v in limits.items()))
+
+    # Only now: importing app pulls in numpy and reads the limits above
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import uvicorn
+    import app as app_module
+
+    preload_models(app_module, args.preload)
+    sock = bind_socket(args.host, args.port)
+    config = uvicorn.Config(app_module.app, log_level=args.log_level, timeout_graceful_shutdown=30)
+    print(f"[serve] listening on {args.host}:{args.port}")
+
+    workers: Dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(config, sock)
+            except BaseException as e:
+                print(f"[serve] worker {os.getpid()} failed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(budget["workers"]):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        print(f"[serve] worker {pid} exited with {code}; starting a replacement")
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)  # do not spin on a worker that cannot start
+        if not stopping:
+            spawn()
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
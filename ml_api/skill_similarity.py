@@ -0,0 +1,94 @@
+# ml_api/skill_similarity.py
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_GROUPS = re.compile(r"\((?:[^()]|\([^()]*\))*\)\??")
+_ESCAPES = re.compile(r"\\[a-zA-Z.+#]")
+_WORDS = re.compile(r"[a-z]+")
+
+
+def skill_tokens(skill: str, pattern: str) -> List[str]:
+    """
+    Words a skill is written with, read from the first alternative of its
+    regex (r'\\bmachine\\s+learning\\b|\\bml\\b' -> ['machine', 'learning']),
+    minus optional groups and lookarounds. The skill key itself comes first.
+    """
+    first = _ESCAPES.sub(" ", _GROUPS.sub(" ", pattern.split("|")[0]))
+    words = [w for w in _WORDS.findall(first.lower()) if w != skill]
+    return [skill] + words
+
+
+class SkillSimilarity:
+    """
+    Dense skill x skill cosine similarity over the canonical skill vocabulary.
+
+    Each skill's vector is its key's Word2Vec vector, or else the mean of
+    the vectors of the words in its pattern. The matrix is computed once from
+    the w2v model and saved next to it as an .npz. The fingerprint ties it to
+    the model file and skill patterns, so a stale file is recomputed. Skills
+    without any vector only match themselves. The diagonal is always 1, so a
+    single max over the resume's skills gives full credit for exact matches
+    and partial credit for near ones.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], matrix: np.ndarray, fingerprint: str = ""):
+        self.vocabulary = list(vocabulary)
+        self.index = {skill: i for i, skill in enumerate(self.vocabulary)}
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, tokens: Dict[str, List[str]], key_to_index: Dict[str, int], vectors: np.ndarray,
+              fingerprint: str = "") -> "SkillSimilarity":
+        vocabulary = list(tokens)
+        skill_vectors = np.zeros((len(vocabulary), vectors.shape[1]), dtype=np.float32)
+        for i, skill in enumerate(vocabulary):
+            words = tokens[skill]
+            if words and words[0] in key_to_index:
+                rows = [key_to_index[words[0]]]
+            else:
+                rows = [key_to_index[w] for w in words[1:] if w in key_to_index]
+            if rows:
+                skill_vectors[i] = vectors[rows].mean(axis=0)
+        norms = np.linalg.norm(skill_vectors, axis=1, keepdims=True)
+        skill_vectors = np.divide(skill_vectors, norms, out=np.zeros_like(skill_vectors), where=norms > 0)
+        matrix = np.clip(skill_vectors @ skill_vectors.T, -1.0, 1.0)
+        np.fill_diagonal(matrix, 1.0)
+        return cls(vocabulary, matrix, fingerprint)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, vocabulary=np.array(self.vocabulary), matrix=self.matrix, fingerprint=np.array(self.fingerprint))
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> Optional["SkillSimilarity"]:
+        """Load a saved matrix, or None if it was built from another model / skill table."""
+        with np.load(path) as data:
+            if str(data["fingerprint"]) != fingerprint:
+                return None
+            return cls([str(s) for s in data["vocabulary"]], data["matrix"], fingerprint)
+
+    def best_matches(self, job_skills: Sequence[str], resume_skills: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """
+        For each required skill, the most similar resume skill and its
+        similarity (1.0 for an exact match). Skills outside the vocabulary only
+        match exactly.
+        """
+        resume_known = [s for s in resume_skills if s in self.index]
+        resume_set = set(resume_skills)
+        job_rows = np.array([self.index.get(s, -1) for s in job_skills], dtype=np.int64)
+        results: List[Tuple[Optional[str], float]] = [(s, 1.0) if s in resume_set else (None, 0.0) for s in job_skills]
+        if not resume_known:
+            return results
+        known = job_rows >= 0
+        if known.any():
+            resume_rows = np.array([self.index[s] for s in resume_known], dtype=np.int64)
+            block = self.matrix[np.ix_(job_rows[known], resume_rows)]
+            best = block.argmax(axis=1)
+            best_sim = block[np.arange(len(best)), best]
+            for i, b, sim in zip(np.flatnonzero(known), best, best_sim):
+                if results[i][1] < 1.0:
+                    results[i] = (resume_known[b], float(sim))
+        return results
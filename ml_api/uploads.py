@@ -0,0 +1,184 @@
+# ml_api/uploads.py
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional, Union
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def format_limit(max_bytes: int) -> str:
+    """A byte limit for error messages: "20 MB", "0.5 MB", "512 bytes"."""
+    mb = max_bytes / (1024 * 1024)
+    if mb >= 0.01:
+        return f"{mb:.2f}".rstrip("0").rstrip(".") + " MB"
+    return f"{max_bytes} bytes"
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload:
+    """
+    One uploaded file, read once in chunks.
+
+    Files up to spool_bytes are kept as bytes (data); larger ones are written
+    to a named temporary file (path) that extractors and pool workers read
+    instead of holding the file in memory. The file belongs to this object,
+    not to the request, so a pool task or a queued job can still open it
+    after the UploadFile is closed. The SHA-256 is computed while reading,
+    for the extraction cache key. close() removes the file.
+    """
+
+    def __init__(self, filename: str = "", data: Optional[bytes] = None, path: Optional[str] = None,
+                 size: int = 0, sha256: str = ""):
+        self.filename = filename
+        self.data = data
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    @classmethod
+    def from_bytes(cls, content: bytes, filename: str = "") -> "SpooledUpload":
+        return cls(filename, data=content, size=len(content), sha256=hashlib.sha256(content).hexdigest())
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """What the extractors take: the bytes, or the path of the spooled file."""
+        return self.data if self.data is not None else self.path
+
+    @property
+    def spooled(self) -> bool:
+        return self.path is not None
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def spool_upload(file, spool_bytes: int, max_bytes: int = 0, directory: Optional[str] = None) -> SpooledUpload:
+    """
+    Read an UploadFile in CHUNK_SIZE pieces. Raises UploadTooLarge as soon as
+    more than max_bytes (0 = no limit) have been read.
+
+    Starlette has already parsed the whole multipart part by the time this
+    runs (keeping parts over 1 MB in its own temp file), so max_bytes bounds
+    what is processed, not what was received; UploadLimitMiddleware's
+    MAX_REQUEST_MB is what bounds the request while it streams in. Starlette's
+    own temp file is unnamed and closed with the request, so parts over
+    spool_bytes are copied into a named one in directory.
+    """
+    filename = file.filename or ""
+    size = getattr(file, "size", None)
+    if max_bytes and size is not None and size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {format_limit(max_bytes)} upload limit.")
+
+    digest = hashlib.sha256()
+    chunks = []
+    buffered = 0
+    spool = None
+    total = 0
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if max_bytes and total > max_bytes:
+                raise UploadTooLarge(f"File exceeds the {format_limit(max_bytes)} upload limit.")
+            digest.update(chunk)
+            if spool is None and buffered + len(chunk) > spool_bytes:
+                suffix = os.path.splitext(filename)[1][:16]
+                spool = tempfile.NamedTemporaryFile(prefix="upload_", suffix=suffix, dir=directory, delete=False)
+                for buffered_chunk in chunks:
+                    spool.write(buffered_chunk)
+                chunks = []
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                chunks.append(chunk)
+                buffered += len(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is not None:
+        spool.close()
+        return SpooledUpload(filename, path=spool.name, size=total, sha256=digest.hexdigest())
+    return SpooledUpload(filename, data=b"".join(chunks), size=total, sha256=digest.hexdigest())
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware that rejects request bodies larger than max_bytes with 413.
+
+    A Content-Length above the limit is refused before the body is read;
+    otherwise the bytes are counted as they stream in and the request fails
+    at the chunk that crosses the limit, so an oversized (or chunked) upload
+    never gets spooled in full.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the {format_limit(self.max_bytes)} limit."
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > self.max_bytes:
+            await self._reject(send, detail)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes a 413
+                    from starlette.exceptions import HTTPException
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Regression test for the durable job queue (ml_api/job_queue.py).
+Covers claim/requeue after a worker process dies, release on shutdown,
+giving up after max_attempts, and jobs submitted in one process being
+visible to (and claimable by) another. No server or models needed.
+
+    python test_job_queue.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_api"))
+
+from job_queue import JobQueue
+from uploads import SpooledUpload
+
+LEASE = 0.5
+
+
+def make_queue(workdir: str, **kwargs) -> JobQueue:
+    return JobQueue(os.path.join(workdir, "jobs.sqlite3"), os.path.join(workdir, "jobs"), **kwargs)
+
+
+def child(role: str, workdir: str) -> None:
+    """Runs in a separate process, like a second uvicorn worker."""
+    queue = make_queue(workdir)
+    if role == "submit":
+        job = queue.submit("analyze", {"from": "child"}, [SpooledUpload.from_bytes(b"child resume", "child.txt")])
+        print(job["id"])
+    elif role == "crash":
+        # Finish the first file, then die without finish() or release()
+        job = queue.claim(LEASE)
+        queue.file_done(job["id"], job["files"][0]["index"], {"text": "first"})
+        print(job["id"], flush=True)
+        os._exit(1)
+
+
+def run_child(role: str, workdir: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, os.path.abspath(__file__), role, workdir], capture_output=True, text=True, timeout=60
+    )
+
+
+def main() -> None:
+    print("=" * 60)
+    print("JOB QUEUE REGRESSION TEST")
+    print("=" * 60)
+
+    # Test 1: a job submitted by another process is visible and claimable here
+    print("\n✓ TEST 1: Cross-process visibility")
+    with tempfile.TemporaryDirectory() as workdir:
+        queue = make_queue(workdir)
+        queue.open()
+        proc = run_child("submit", workdir)
+        assert proc.returncode == 0, proc.stderr
+        job_id = proc.stdout.strip()
+        print(f"  Submitted {job_id} from pid != {os.getpid()}")
+        assert [job["id"] for job in queue.list(status="queued")] == [job_id], "Job not visible to this process"
+        job = queue.claim(LEASE)
+        assert job is not None and job["id"] == job_id, "Job not claimable by this process"
+        assert job["options"] == {"from": "child"}
+        with open(job["files"][0]["path"], "rb") as f:
+            assert f.read() == b"child resume", "Uploaded file not moved into the job directory"
+        assert queue.claim(LEASE) is None, "A leased job must not be claimed twice"
+        print("  ✓ Listed, claimed once, file readable")
+
+    # Test 2: the worker dies mid-job; after the lease runs out the job is reclaimed
+    # and only the file without a result is handed out again
+    print("\n✓ TEST 2: Claim/requeue after a crash")
+    with tempfile.TemporaryDirectory() as workdir:
+        queue = make_queue(workdir)
+        uploads = [SpooledUpload.from_bytes(f"resume {i}".encode(), f"r{i}.txt") for i in range(3)]
+        job_id = queue.submit("analyze", {}, uploads)["id"]
+        proc = run_child("crash", workdir)
+        assert proc.returncode == 1 and proc.stdout.strip() == job_id, proc.stderr
+        assert queue.get(job_id)["status"] == "running"
+        assert queue.claim(LEASE) is None, "Job reclaimed while the dead worker's lease was still valid"
+        time.sleep(LEASE + 0.2)
+        job = queue.claim(LEASE)
+        assert job is not None and job["id"] == job_id, "Expired lease was not reclaimed"
+        indexes = [f["index"] for f in job["files"]]
+        print(f"  Reclaimed with files {indexes}")
+        assert indexes == [1, 2], f"Expected only unfinished files [1, 2], got {indexes}"
+        for f in job["files"]:
+            queue.file_done(job_id, f["index"], {"text": f"file {f['index']}"})
+        assert queue.finish(job_id) == "completed"
+        done = queue.get(job_id)
+        assert done["attempts"] == 2 and done["progress"]["done"] == 3
+        assert [r.get("text") for r in done["results"]] == ["first", "file 1", "file 2"]
+        assert not os.path.exists(os.path.join(workdir, "jobs", job_id)), "Job files not cleaned up"
+        print("  ✓ Completed on the second attempt with all three results")
+
+    # Test 3: release() on shutdown requeues without using up an attempt
+    print("\n✓ TEST 3: Release on shutdown")
+    with tempfile.TemporaryDirectory() as workdir:
+        queue = make_queue(workdir)
+        job_id = queue.submit("analyze", {}, [SpooledUpload.from_bytes(b"x", "x.txt")])["id"]
+        queue.claim(60)
+        queue.release(job_id)
+        job = queue.get(job_id, results=False)
+        assert job["status"] == "queued" and job["attempts"] == 0, job
+        assert queue.claim(60)["id"] == job_id, "Released job not claimable right away"
+        print("  ✓ Requeued immediately, attempt not counted")
+
+    # Test 4: a job that keeps killing its worker is failed after max_attempts
+    print("\n✓ TEST 4: Give up after max_attempts")
+    with tempfile.TemporaryDirectory() as workdir:
+        queue = make_queue(workdir, max_attempts=2)
+        job_id = queue.submit("analyze", {}, [SpooledUpload.from_bytes(b"x", "x.txt")])["id"]
+        for _ in range(2):
+            assert queue.claim(0)["id"] == job_id
+        time.sleep(0.01)
+        assert queue.claim(0) is None
+        job = queue.get(job_id, results=False)
+        print(f"  Status: {job['status']} ({job['error']})")
+        assert job["status"] == "failed", job
+
+    print("\n" + "=" * 60)
+    print("✅ ALL JOB QUEUE TESTS PASSED")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        child(sys.argv[1], sys.argv[2])
+    else:
+        main()
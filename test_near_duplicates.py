@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Regression test for near-duplicate resume detection (ml_api/near_duplicates.py).
+Builds token lists with a known Jaccard similarity of 3-word shingles and
+checks hits and misses around NEAR_DUPLICATE_THRESHOLD, the SQLite-backed
+mode shared between processes, and stored results. No server needed.
+
+    python test_near_duplicates.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_api"))
+
+from near_duplicates import NearDuplicateIndex
+
+THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
+
+def resume_tokens(seed: int, length: int = 300) -> list:
+    return [f"w{seed}_{i}" for i in range(length)]
+
+
+def edit(tokens: list, similarity: float) -> list:
+    """
+    Replace a run of k words so that the 3-word shingle sets have Jaccard
+    similarity close to `similarity`: k + 2 of the n - 2 shingles change,
+    J = (n - k - 4) / (n + k).
+    """
+    n = len(tokens)
+    k = max(1, round((n * (1 - similarity) - 4) / (1 + similarity)))
+    return tokens[:10] + [f"x_{t}" for t in tokens[10:10 + k]] + tokens[10 + k:]
+
+
+def jaccard(a: list, b: list) -> float:
+    sa = {tuple(a[i:i + 3]) for i in range(len(a) - 2)}
+    sb = {tuple(b[i:i + 3]) for i in range(len(b) - 2)}
+    return len(sa & sb) / len(sa | sb)
+
+
+def main() -> None:
+    print("=" * 60)
+    print(f"NEAR-DUPLICATE REGRESSION TEST (threshold {THRESHOLD})")
+    print("=" * 60)
+
+    base = resume_tokens(1)
+    close = edit(base, min(0.97, THRESHOLD + 0.1))   # just above the threshold
+    far = edit(base, max(0.0, THRESHOLD - 0.2))      # below it, but with shared shingles
+    other = resume_tokens(2)                         # an unrelated resume
+    j_close, j_far = jaccard(base, close), jaccard(base, far)
+
+    # Test 1: memory-only index
+    print("\n✓ TEST 1: Hit / miss at the configured threshold")
+    index = NearDuplicateIndex(threshold=THRESHOLD)
+    index.add("base", index.signature(base), "base.pdf")
+
+    match = index.find(index.signature(base))
+    assert match == {"id": "base", "filename": "base.pdf", "similarity": 1.0}, match
+    print("  Identical text: similarity 1.0")
+
+    match = index.find(index.signature(close))
+    print(f"  Light edit (Jaccard {j_close:.2f}): {match}")
+    assert match is not None and match["id"] == "base", "Near-duplicate above the threshold was missed"
+    assert abs(match["similarity"] - j_close) < 0.15, "MinHash estimate far from the true Jaccard"
+
+    match = index.find(index.signature(far))
+    print(f"  Heavy edit (Jaccard {j_far:.2f}): {match}")
+    assert match is None, "Resume below the threshold was flagged"
+
+    match = index.find(index.signature(other))
+    assert match is None, "Unrelated resume was flagged"
+    print("  Unrelated resume: no match")
+
+    # Test 2: the same pair is a miss once the threshold is above its similarity
+    print("\n✓ TEST 2: Threshold is applied to the candidates")
+    strict = NearDuplicateIndex(threshold=min(1.0, j_close + 0.1))
+    strict.add("base", strict.signature(base))
+    assert strict.find(strict.signature(close)) is None, "Candidate below a stricter threshold was kept"
+    assert strict.find(strict.signature(base)) is not None
+    print(f"  Light edit not flagged at threshold {strict.threshold:.2f}")
+
+    # Test 3: SQLite mode; another process adds, this one finds it and its stored result
+    print("\n✓ TEST 3: Shared SQLite index")
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "near_duplicates.sqlite3")
+        index = NearDuplicateIndex(threshold=THRESHOLD, db_path=db_path)
+        assert index.find(index.signature(close)) is None
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import test_near_duplicates as t; "
+            "from near_duplicates import NearDuplicateIndex; "
+            "index = NearDuplicateIndex(threshold=t.THRESHOLD, db_path=sys.argv[2]); "
+            "index.add('base', index.signature(t.resume_tokens(1)), 'base.pdf'); "
+            "index.set_result('base', {'match_score': 42})"
+        )
+        here = os.path.dirname(os.path.abspath(__file__))
+        proc = subprocess.run([sys.executable, "-c", code, here, db_path], capture_output=True, text=True, timeout=60)
+        assert proc.returncode == 0, proc.stderr
+        match = index.find(index.signature(close))
+        assert match is not None and match["id"] == "base", "Signature added by another process not found"
+        assert index.get_result("base") == {"match_score": 42}
+        assert index.find(index.signature(far)) is None
+        print(f"  Found the other process's resume: {match}")
+
+        reloaded = NearDuplicateIndex(threshold=THRESHOLD, db_path=db_path)
+        assert len(reloaded) == 1 and reloaded.find(reloaded.signature(close))["id"] == "base"
+        print("  Reloaded after restart: 1 signature")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL NEAR-DUPLICATE TESTS PASSED")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
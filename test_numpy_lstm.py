@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Regression test for the TensorFlow-free LSTM engine (ml_api/numpy_lstm.py).
+Builds small Keras models with the layer combinations NumpyLSTMModel
+supports, exports them with export_lstm_numpy.export_model and requires
+the NumPy forward pass to match Keras on random padded inputs.
+Needs TensorFlow; no trained models or server.
+
+    python test_numpy_lstm.py
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_api"))
+
+import numpy as np
+from tensorflow import keras
+
+from export_lstm_numpy import export_model, parity_check
+from numpy_lstm import NumpyLSTMModel
+
+ATOL = 1e-4
+VOCAB, STEPS, EMBED, UNITS = 50, 12, 8, 6
+
+
+def build(*layers) -> keras.Model:
+    keras.utils.set_random_seed(0)
+    model = keras.Sequential(
+        [keras.Input(shape=(STEPS,)), keras.layers.Embedding(VOCAB, EMBED, mask_zero=True), *layers,
+         keras.layers.Dense(3, activation="softmax")]
+    )
+    return model
+
+
+CASES = {
+    "LSTM": lambda: build(keras.layers.LSTM(UNITS)),
+    "BiLSTM": lambda: build(keras.layers.Bidirectional(keras.layers.LSTM(UNITS))),
+    "LSTM return_sequences + max pooling": lambda: build(
+        keras.layers.LSTM(UNITS, return_sequences=True), keras.layers.GlobalMaxPooling1D()),
+    "BiLSTM return_sequences + max pooling": lambda: build(
+        keras.layers.Bidirectional(keras.layers.LSTM(UNITS, return_sequences=True)), keras.layers.GlobalMaxPooling1D()),
+    "BiLSTM return_sequences + average pooling": lambda: build(
+        keras.layers.Bidirectional(keras.layers.LSTM(UNITS, return_sequences=True)), keras.layers.GlobalAveragePooling1D()),
+    "LSTM go_backwards": lambda: build(keras.layers.LSTM(UNITS, go_backwards=True)),
+    # Flatten keeps the time order, so a sequence returned in the wrong order changes the output
+    "LSTM go_backwards return_sequences + flatten": lambda: build(
+        keras.layers.LSTM(UNITS, go_backwards=True, return_sequences=True), keras.layers.Flatten()),
+    "LSTM return_sequences + flatten": lambda: build(
+        keras.layers.LSTM(UNITS, return_sequences=True), keras.layers.Flatten()),
+}
+
+
+def main() -> None:
+    print("=" * 60)
+    print(f"NUMPY LSTM PARITY TEST (atol {ATOL:g})")
+    print("=" * 60)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for number, (name, make) in enumerate(CASES.items(), 1):
+            keras_model = make()
+            npz_path = os.path.join(workdir, f"model{number}.npz")
+            export_model(keras_model, npz_path)
+            diff = parity_check(keras_model, NumpyLSTMModel.load(npz_path))
+            ok = diff <= ATOL
+            print(f"\n{'✓' if ok else '✗'} TEST {number}: {name}")
+            print(f"  Max abs diff vs Keras: {diff:.2e}")
+            if not ok:
+                failures.append(name)
+
+    assert not failures, f"NumPy LSTM differs from Keras for: {', '.join(failures)}"
+    print("\n" + "=" * 60)
+    print("✅ ALL NUMPY LSTM PARITY TESTS PASSED")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Regression test for the single-pass skill matcher (_build_skill_matcher /
+extract_skills_from_tokens in ml_api/app.py). Runs the old
+one-re.search-per-skill loop over SKILL_PATTERNS and the matcher on the
+sample resumes, the benchmark corpus and inputs aimed at the punctuated and
+multi-word patterns, and requires the same skills in the same order, both on
+raw text and on cleaned text (as ProcessedDocument.skills). No server or
+trained models needed.
+
+    python test_skill_matcher.py
+"""
+
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "ml_api"))
+sys.path.insert(0, os.path.join(ROOT, "ml_api", "benchmarks"))
+
+from app import SKILL_PATTERNS, clean_tokens, extract_skills_from_text, extract_skills_from_tokens
+from corpus import build_corpus
+
+SAMPLE_FILES = ["test_resume.txt", "test_sample.txt"]
+
+# Each line targets an alternative the matcher checks by regex or by word lookup
+EDGE_CASES = [
+    "",
+    "PYTHON, Java and JavaScript; java-script, javascript's, python3, pythonic",
+    "C++ and C# developer, c++11, c++. c+ c#/.net csharp",
+    "node.js not node; nodejs, node .js, node-js, Node.JS",
+    "vue.js vuejs vue vue.jsx next.js nextjs next js",
+    "golang and go, gopher going go-lang",
+    "google cloud, google   cloud, googlecloud, gcp",
+    "ci/cd, ci / cd, cicd, ci cd, ci//cd, ci/cd/ct",
+    "scikit-learn, scikitlearn, scikit learn, scikit--learn",
+    "rest api, restful, restapi, rest  api, rest-api",
+    "asp.net, aspnet, asp net",
+    "machine learning, machine-learning, ml, mlops, machine\nlearning",
+    "problem solving, problem-solving, problemsolving",
+    "postgres, postgresql, mongo, mongodb, k8s, kubernetes",
+    "naïve résumé écrit en python",
+    "ts tsx typescript js jsx",
+]
+
+
+def legacy_extract_skills(cleaned_text: str):
+    """extract_skills_from_text before the matcher: one re.search per skill."""
+    found = []
+    text_lower = cleaned_text.lower()
+    for skill, pattern in SKILL_PATTERNS.items():
+        if re.search(pattern, text_lower):
+            if skill not in found:
+                found.append(skill)
+    return found
+
+
+def samples():
+    for name in SAMPLE_FILES:
+        with open(os.path.join(ROOT, name), encoding="utf-8-sig") as f:
+            yield name, f.read()
+    for seed in range(5):
+        for doc in build_corpus(seed=seed, formats=["txt"]):
+            yield f"corpus seed {seed} {doc['size']} resume", doc["text"]
+            yield f"corpus seed {seed} {doc['size']} JD", doc["job_description"]
+    for number, text in enumerate(EDGE_CASES, 1):
+        yield f"edge case {number}", text
+
+
+def main() -> None:
+    print("=" * 60)
+    print("SKILL MATCHER REGRESSION TEST")
+    print("=" * 60)
+
+    mismatches = []
+    checked = 0
+    for name, text in samples():
+        tokens = clean_tokens(text)
+        cleaned = " ".join(tokens)
+        for form, expected, actual in (
+            ("raw", legacy_extract_skills(text), extract_skills_from_text(text)),
+            ("cleaned", legacy_extract_skills(cleaned), extract_skills_from_tokens(tokens, cleaned)),
+        ):
+            checked += 1
+            if actual != expected:
+                mismatches.append(name)
+                print(f"\n✗ {name} ({form})\n  legacy:  {expected}\n  matcher: {actual}")
+
+    print(f"\n✓ TEST 1: {checked} texts, legacy loop vs matcher")
+    assert not mismatches, f"Matcher output differs from the legacy loop for: {', '.join(sorted(set(mismatches)))}"
+    print("  ✓ Same skills in the same order for every text")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL SKILL MATCHER TESTS PASSED")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()